@@ -0,0 +1,166 @@
+"""
+Content-addressed cache of repository archives
+Archives are kept as files named after their key (the commit SHA they were built from,
+or the server's ETag when the commit cannot be resolved) and evicted least-recently-used
+first once their total size exceeds max_bytes. A small SQLite index also remembers, per
+repository ref, which archive it resolved to last time and the validators needed to
+revalidate it with a conditional request. Archives still being read are pinned, so no
+concurrent request evicts them until the reader closes its cache.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Pins older than this are left by a crashed process and no longer protect an archive
+PIN_TIMEOUT_SECONDS = 24 * 3600
+
+
+class ArchiveCache:
+    """Directory of archive files with an SQLite index and LRU eviction by total bytes"""
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        """
+        Args:
+            directory: Folder holding the archives and index.sqlite3 (created on first use)
+            max_bytes: Upper bound for the summed size of all cached archives
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pins: List[str] = []  # tokens of the pins this instance holds
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS archives ("
+                "key TEXT PRIMARY KEY, file TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS archives_last_used ON archives (last_used)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refs ("
+                "ref TEXT PRIMARY KEY, key TEXT NOT NULL, "
+                "api_etag TEXT, archive_etag TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pins ("
+                "token TEXT PRIMARY KEY, key TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _file_for(self, key: str) -> str:
+        # Keys may hold quotes and slashes (ETags); the file name is a digest of the key
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".zip")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached archive for key, or None. Marks the entry as recently used."""
+        conn = self._connection()
+        row = conn.execute("SELECT file FROM archives WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.exists(row[0]):
+            # Removed behind our back: forget it
+            with conn:
+                conn.execute("DELETE FROM archives WHERE key = ?", (key,))
+            return None
+        with conn:
+            conn.execute("UPDATE archives SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def temp_file(self):
+        """Open a temporary file in the cache directory to download into (see add)"""
+        os.makedirs(self.directory, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.directory, suffix=".part", delete=False)
+
+    def add(self, key: str, temp_path: str) -> str:
+        """Move a downloaded temporary file into the cache under key and return its path.
+        Other archives are evicted down to max_bytes; the new one is always kept."""
+        path = self._file_for(key)
+        os.replace(temp_path, path)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archives (key, file, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, path, os.path.getsize(path), time.time()),
+            )
+        self.evict(keep=key)
+        return path
+
+    def evict(self, keep: Optional[str] = None):
+        """Delete least recently used archives until the cache fits in max_bytes"""
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM archives").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        pinned = {key for (key,) in conn.execute(
+            "SELECT key FROM pins WHERE created > ?", (time.time() - PIN_TIMEOUT_SECONDS,)
+        )}
+        doomed = []
+        for key, path, size in conn.execute("SELECT key, file, size FROM archives ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in pinned:
+                continue
+            doomed.append((key, path))
+            total -= size
+        with conn:
+            conn.executemany("DELETE FROM archives WHERE key = ?", [(key,) for key, _ in doomed])
+            conn.executemany("DELETE FROM refs WHERE key = ?", [(key,) for key, _ in doomed])
+        for _, path in doomed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def pin(self, key: str):
+        """Keep the archive of key from being evicted (by any process) until close()"""
+        token = uuid.uuid4().hex
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO pins (token, key, created) VALUES (?, ?, ?)", (token, key, time.time()))
+        self._pins.append(token)
+
+    def get_ref(self, ref: str) -> Optional[Dict[str, Any]]:
+        """What ref resolved to last time: {key, api_etag, archive_etag} or None"""
+        row = self._connection().execute(
+            "SELECT key, api_etag, archive_etag FROM refs WHERE ref = ?", (ref,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"key": row[0], "api_etag": row[1], "archive_etag": row[2]}
+
+    def set_ref(self, ref: str, key: str, api_etag: Optional[str] = None, archive_etag: Optional[str] = None):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO refs (ref, key, api_etag, archive_etag) VALUES (?, ?, ?, ?)",
+                (ref, key, api_etag, archive_etag),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Number of archives and total stored bytes"""
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM archives"
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def close(self):
+        """Release this instance's pins and close the index"""
+        if self._conn is not None:
+            if self._pins:
+                with self._conn:
+                    self._conn.executemany("DELETE FROM pins WHERE token = ?", [(token,) for token in self._pins])
+                self._pins = []
+            self._conn.close()
+            self._conn = None
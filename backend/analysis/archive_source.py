@@ -0,0 +1,193 @@
+"""
+Archive-backed source provider for Phase 1
+A ZipSource presents the members of a repository ZIP (e.g. a GitHub archive) as the
+tree they would form if extracted under root_path, without writing anything to disk.
+The analyzer walks that tree with its usual skip and .gitignore rules and decompresses
+only the members it analyzes, straight into memory.
+"""
+
+import io
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
+
+from analysis.source_reader import SkippedFile
+
+Archive = Union[str, IO[bytes]]
+
+
+class ZipSource:
+    def __init__(self, archive: Archive, root_path: str = "./repo", strip_top_level: bool = True):
+        """
+        Args:
+            archive: Path of a ZIP file or a seekable binary file object holding one
+            root_path: Directory the members are addressed under (as if extracted there)
+            strip_top_level: Drop a single top-level folder shared by every member
+                (GitHub archives wrap the tree in "<repo>-<branch>/")
+        """
+        self.archive = archive
+        self.root_path = root_path
+        self._zip = zipfile.ZipFile(archive)
+        self._members: Dict[str, zipfile.ZipInfo] = {}
+        self._listing: Dict[str, List[Tuple[str, str, bool]]] = {}
+        self._index(strip_top_level)
+
+    def _index(self, strip_top_level: bool):
+        names = []
+        for info in self._zip.infolist():
+            parts = [part for part in info.filename.split("/") if part]
+            if not parts or any(part in (".", "..") for part in parts) or info.filename.startswith("/"):
+                continue
+            names.append((parts, info))
+
+        # GitHub archives hold one "<repo>-<ref>/" folder; address its contents directly
+        tops = {parts[0] for parts, _ in names}
+        if strip_top_level and len(tops) == 1 and any(len(parts) > 1 for parts, _ in names):
+            names = [(parts[1:], info) for parts, info in names if len(parts) > 1]
+
+        children: Dict[str, Dict[str, Tuple[str, bool]]] = {self.root_path: {}}
+        for parts, info in names:
+            directory = self.root_path
+            for depth, part in enumerate(parts):
+                path = os.path.join(directory, part)
+                is_dir = depth < len(parts) - 1 or info.is_dir()
+                children[directory].setdefault(part, (path, is_dir))
+                if is_dir:
+                    children.setdefault(path, {})
+                    directory = path
+                else:
+                    self._members[path] = info
+
+        self._listing = {
+            directory: [(name, path, is_dir) for name, (path, is_dir) in sorted(entries.items())]
+            for directory, entries in children.items()
+        }
+
+    @property
+    def parallel_safe(self) -> bool:
+        """Worker processes can read the archive: it is a file path or an in-memory buffer,
+        or workers are forked (they get a private copy of an in-memory file object and
+        read an on-disk one positionally)"""
+        if isinstance(self.archive, (str, os.PathLike, io.BytesIO)):
+            return True
+        return multiprocessing.get_start_method() == "fork"
+
+    def reopen(self):
+        """Give this process its own handle: a forked worker must not move the file offset
+        it shares with the parent and its siblings"""
+        if isinstance(self.archive, (str, os.PathLike)):
+            self._zip = zipfile.ZipFile(self.archive)
+            return
+        fd = _file_descriptor(self.archive)
+        if fd is not None:
+            self._zip = zipfile.ZipFile(_PositionalFile(fd))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_zip"]
+        if not isinstance(self.archive, (str, os.PathLike)):
+            state["archive"] = self.archive.getvalue() if isinstance(self.archive, io.BytesIO) else None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.archive, bytes):
+            self.archive = io.BytesIO(self.archive)
+        self._zip = zipfile.ZipFile(self.archive)
+
+    def list_dir(self, directory: str) -> List[Tuple[str, str, bool]]:
+        """Sorted (name, path, is_dir) entries under directory, like a directory listing"""
+        return self._listing.get(directory, [])
+
+    def file_size(self, path: str) -> int:
+        return self._members[path].file_size
+
+    def read(self, path: str, max_bytes: int = None) -> bytes:
+        """Decompress one member; oversize members are refused from the header alone"""
+        info = self._members[path]
+        if max_bytes is not None and info.file_size > max_bytes:
+            raise SkippedFile("too large")
+        return self._zip.read(info)
+
+    def read_text(self, path: str) -> str:
+        return self.read(path).decode("utf-8", "ignore")
+
+    def extract(self, paths: Optional[Iterable[str]] = None, workers: int = 8) -> int:
+        """
+        Write members to their paths under root_path (the archive's top-level folder is
+        already stripped) and return how many were written. paths limits extraction to
+        those files; members are decompressed by a thread pool (zlib releases the GIL).
+        """
+        paths = list(self._members if paths is None else paths)
+        for directory in {os.path.dirname(path) for path in paths}:
+            os.makedirs(directory, exist_ok=True)
+
+        def extract_member(path: str):
+            with self._zip.open(self._members[path]) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for _ in executor.map(extract_member, paths):
+                pass
+        return len(paths)
+
+    def close(self):
+        self._zip.close()
+        if not isinstance(self.archive, (str, os.PathLike)):
+            self.archive.close()
+
+    def __enter__(self) -> "ZipSource":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _file_descriptor(archive: IO[bytes]) -> Optional[int]:
+    """OS file descriptor behind a file object; None for in-memory files (a spooled
+    temporary file that has not rolled over to disk is still in memory)"""
+    if isinstance(archive, io.BytesIO) or not getattr(archive, "_rolled", True):
+        return None
+    try:
+        return archive.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+class _PositionalFile(io.RawIOBase):
+    """Read-only view of a file descriptor with its own offset (os.pread), so processes
+    sharing the descriptor do not race on seek()"""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += os.fstat(self._fd).st_size
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        data = os.pread(self._fd, len(buffer), self._pos)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        # The descriptor belongs to the archive file object
+        super().close()
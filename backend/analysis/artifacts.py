@@ -0,0 +1,133 @@
+"""
+Record artifacts passed between the pipeline phases
+Results are written and read one record at a time. The format follows the file name:
+
+    *.ndjson / *.jsonl   one compact JSON object per line
+    *.dbrec              binary frames: magic, then a u32 length + compact JSON per record
+    *.json               legacy indented JSON array (read fully, kept for old outputs)
+
+A trailing .gz (gzip) or .zst (zstd, needs the optional zstandard package) compresses
+the stream, e.g. complex_functions.ndjson.gz.
+"""
+
+import gzip
+import io
+import json
+import struct
+from typing import IO, Any, Dict, Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst artifacts
+    zstandard = None
+
+MAGIC = b"DBRC"
+FORMAT_VERSION = 1
+_FRAME = struct.Struct("<I")
+
+
+def _split_name(path: str):
+    """(format, compression) from the file name"""
+    name = path.lower()
+    compression = None
+    for suffix in (".gz", ".zst"):
+        if name.endswith(suffix):
+            compression = suffix[1:]
+            name = name[: -len(suffix)]
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson", compression
+    if name.endswith(".dbrec"):
+        return "binary", compression
+    if name.endswith(".json"):
+        return "json", compression
+    raise ValueError(f"Unknown artifact format: {path}")
+
+
+def _open(path: str, mode: str, compression: str) -> IO[bytes]:
+    if compression == "gz":
+        return gzip.open(path, mode + "b", compresslevel=6)
+    if compression == "zst":
+        if zstandard is None:
+            raise ValueError("zstd artifacts need the zstandard package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, mode + "b")
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ArtifactWriter:
+    """Append records to an artifact; use as a context manager"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format, compression = _split_name(path)
+        self.count = 0
+        self._file = _open(path, "w", compression)
+        if self.format == "binary":
+            self._file.write(MAGIC + struct.pack("<H", FORMAT_VERSION))
+        elif self.format == "json":
+            self._file.write(b"[")
+
+    def write(self, record: Dict[str, Any]):
+        if self.format == "ndjson":
+            self._file.write(_encode(record) + b"\n")
+        elif self.format == "binary":
+            data = _encode(record)
+            self._file.write(_FRAME.pack(len(data)) + data)
+        else:
+            separator = b"\n" if self.count == 0 else b",\n"
+            self._file.write(separator + json.dumps(record, indent=2).encode("utf-8"))
+        self.count += 1
+
+    def close(self):
+        if self.format == "json":
+            self._file.write(b"\n]" if self.count else b"]")
+        self._file.close()
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Write every record to path and return how many were written"""
+    with ArtifactWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of an artifact one at a time"""
+    fmt, compression = _split_name(path)
+    with _open(path, "r", compression) as raw:
+        # Buffered reads return whole lines and exactly the requested frame sizes
+        f = io.BufferedReader(raw) if compression == "zst" else raw
+        if fmt == "ndjson":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+        elif fmt == "binary":
+            header = f.read(len(MAGIC) + 2)
+            if header[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a record artifact")
+            (version,) = struct.unpack("<H", header[len(MAGIC):])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported record artifact version {version}")
+            while True:
+                prefix = f.read(_FRAME.size)
+                if not prefix:
+                    break
+                (size,) = _FRAME.unpack(prefix)
+                yield json.loads(f.read(size))
+
+        else:
+            yield from json.load(f)
@@ -0,0 +1,249 @@
+"""
+Linear-time lexer for brace languages (Java, Go, C#, C++)
+One state-machine pass per file separates code from strings, char literals and
+comments, pairs the remaining braces with a stack and emits function spans. Every
+regex used here is anchored and deterministic, so nothing backtracks.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+# Start of anything that is not plain code
+_EVENT = re.compile(r"//|/\*|[\"'`]")
+_LINE_END = re.compile(r"[\r\n]")
+
+# Literal bodies (alternatives start with disjoint characters, so matching is linear)
+_STRING = re.compile(r'"(?:[^"\\\r\n]|\\[\s\S])*"?')
+_CHAR = re.compile(r"'(?:[^'\\\r\n]|\\[\s\S])*'?")
+_BACKTICK_STRING = re.compile(r"`[^`]*`?")
+_VERBATIM_STRING = re.compile(r'"(?:[^"]|"")*"?')
+_TEXT_BLOCK = re.compile(r'"""(?:[^"\\]|\\[\s\S]|"(?!""))*(?:""")?')
+_RAW_STRING_DELIMITER = re.compile(r'"([^()\\\s"]{0,16})\(')
+
+# Characters str.splitlines() breaks on; kept when blanking so lines stay aligned
+_NON_LINE_BREAK = re.compile("[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+_IDENTIFIER_CHAR = re.compile(r"\w")
+_RAW_PREFIXES = ("R", "u8R", "uR", "UR", "LR")
+_BRACE = re.compile(r"[{}]")
+_SIGNATURE_TOKEN = re.compile(r"[(){};]")
+# Go type literals that put braces inside a signature: interface{}, struct{}
+_TYPE_LITERAL = re.compile(r"\b(?:interface|struct)\s*$")
+# A header whose body has not opened within this many lines is not a definition
+_MAX_SIGNATURE_LINES = 50
+# Control statements that loose header patterns match, e.g. "} else if (x) {"
+_STATEMENT_KEYWORDS = frozenset({
+    "if", "else", "for", "foreach", "while", "do", "switch", "case", "catch", "return",
+    "throw", "new", "delete", "sizeof", "using", "lock", "fixed", "select", "go", "defer",
+})
+# Longest numeric literal looked back over when checking for digit separators
+_MAX_NUMBER_LENGTH = 64
+
+
+class BraceLexer:
+    """Single-pass string/comment/brace scanner shared by the brace languages"""
+
+    def __init__(
+        self,
+        char_literals: bool = True,
+        backtick_strings: bool = False,
+        text_blocks: bool = False,
+        verbatim_strings: bool = False,
+        raw_strings: bool = False,
+        digit_separators: bool = False,
+    ):
+        """
+        Args:
+            char_literals: '...' is a char/rune literal
+            backtick_strings: `...` is a raw multi-line string (Go)
+            text_blocks: \"\"\"...\"\"\" is a multi-line string (Java text blocks, C# raw strings)
+            verbatim_strings: @"..." is a multi-line string with "" escapes (C#)
+            raw_strings: R"delim(...)delim" raw strings (C++)
+            digit_separators: ' inside a number literal is a separator, e.g. 1'000 (C++14)
+        """
+        self.char_literals = char_literals
+        self.backtick_strings = backtick_strings
+        self.text_blocks = text_blocks
+        self.verbatim_strings = verbatim_strings
+        self.raw_strings = raw_strings
+        self.digit_separators = digit_separators
+
+    def mask(self, content: str) -> str:
+        """Return content with every string, char literal and comment blanked to spaces.
+        Line breaks are preserved, so the result splits into the same lines."""
+        pieces = []
+        pos = 0
+        length = len(content)
+
+        while pos < length:
+            event = _EVENT.search(content, pos)
+            if event is None:
+                break
+            start = event.start()
+            end = self._literal_end(content, start, event.group(0))
+            if end is None:
+                # Not a literal after all (e.g. digit separator): keep it as code
+                pieces.append(content[pos:start + 1])
+                pos = start + 1
+                continue
+            pieces.append(content[pos:start])
+            pieces.append(_NON_LINE_BREAK.sub(" ", content[start:end]))
+            pos = end
+
+        pieces.append(content[pos:])
+        return "".join(pieces)
+
+    def strip_comments(self, content: str) -> str:
+        """Return content with every comment removed. Strings are kept verbatim and the
+        line breaks inside block comments are preserved."""
+        pieces = []
+        pos = 0
+        length = len(content)
+
+        while pos < length:
+            event = _EVENT.search(content, pos)
+            if event is None:
+                break
+            start = event.start()
+            end = self._literal_end(content, start, event.group(0))
+            if end is None:
+                pieces.append(content[pos:start + 1])
+                pos = start + 1
+                continue
+            if event.group(0) in ("//", "/*"):
+                pieces.append(content[pos:start])
+                pieces.append(_NON_LINE_BREAK.sub("", content[start:end]))
+            else:
+                pieces.append(content[pos:end])
+            pos = end
+
+        pieces.append(content[pos:])
+        return "".join(pieces)
+
+    def _literal_end(self, content: str, start: int, token: str) -> Optional[int]:
+        """End offset of the string/comment starting at start, None if it is code"""
+        if token == "//":
+            line_end = _LINE_END.search(content, start)
+            return line_end.start() if line_end else len(content)
+
+        if token == "/*":
+            close = content.find("*/", start + 2)
+            return close + 2 if close != -1 else len(content)
+
+        if token == "`":
+            if not self.backtick_strings:
+                return None
+            return _BACKTICK_STRING.match(content, start).end()
+
+        if token == "'":
+            if not self.char_literals or (self.digit_separators and self._in_number(content, start)):
+                return None
+            return _CHAR.match(content, start).end()
+
+        # Double quote: pick the string flavour from the surrounding characters
+        if self.text_blocks and content.startswith('"""', start):
+            return _TEXT_BLOCK.match(content, start).end()
+        if self.verbatim_strings and self._prefixed_by(content, start, ("@", "$@", "@$")):
+            return _VERBATIM_STRING.match(content, start).end()
+        if self.raw_strings and self._prefixed_by(content, start, _RAW_PREFIXES):
+            delimiter = _RAW_STRING_DELIMITER.match(content, start)
+            if delimiter:
+                close = content.find(")" + delimiter.group(1) + '"', delimiter.end())
+                return close + len(delimiter.group(1)) + 2 if close != -1 else len(content)
+        return _STRING.match(content, start).end()
+
+    @staticmethod
+    def _prefixed_by(content: str, start: int, prefixes: Tuple[str, ...]) -> bool:
+        """True if one of the prefixes directly precedes start as a separate token"""
+        for prefix in prefixes:
+            begin = start - len(prefix)
+            if begin >= 0 and content.startswith(prefix, begin):
+                if begin == 0 or not _IDENTIFIER_CHAR.match(content, begin - 1):
+                    return True
+        return False
+
+    @staticmethod
+    def _in_number(content: str, start: int) -> bool:
+        """True if the quote at start continues a numeric literal (1'000, 0xFF'FF)"""
+        begin = start
+        limit = max(0, start - _MAX_NUMBER_LENGTH)
+        while begin > limit and (content[begin - 1].isalnum() or content[begin - 1] in "'_"):
+            begin -= 1
+        return begin < start and content[begin].isdigit()
+
+    def extract_functions(self, content: str, language: str, function_pattern: Pattern) -> List[Dict[str, Any]]:
+        """Find function headers on code-only lines and span each to its matching brace"""
+        lines = content.splitlines()
+        code_lines = self.mask(content).splitlines()
+        last_line = len(lines) - 1
+
+        # Pair every code brace: opens[(line, column)] = line of its matching "}"
+        closes: Dict[Tuple[int, int], int] = {}
+        stack: List[Tuple[int, int]] = []
+        for line_index, code in enumerate(code_lines):
+            if "{" not in code and "}" not in code:
+                continue
+            for brace in _BRACE.finditer(code):
+                if brace.group(0) == "{":
+                    position = (line_index, brace.start())
+                    stack.append(position)
+                    closes[position] = last_line  # unclosed braces run to the end of file
+                elif stack:
+                    closes[stack.pop()] = line_index
+
+        functions = []
+        i = 0
+        while i < len(code_lines):
+            func_match = function_pattern.search(code_lines[i])
+            body = None
+            if func_match and func_match.group(1) not in _STATEMENT_KEYWORDS:
+                body = self._find_body(code_lines, i, func_match.start())
+            if body is None:
+                i += 1
+                continue
+
+            end = closes[body]
+            body_line, body_column = body
+            functions.append({
+                "name": func_match.group(1),
+                "start_line": i + 1,
+                "end_line": end + 1,
+                "content": lines[i:end + 1],
+                # Code after the body's opening brace, strings and comments blanked
+                "body": [code_lines[body_line][body_column + 1:]] + code_lines[body_line + 1:end + 1],
+                "language": language,
+            })
+            i = end + 1
+
+        return functions
+
+    @staticmethod
+    def _find_body(code_lines: List[str], line: int, column: int) -> Optional[Tuple[int, int]]:
+        """
+        Position of the brace opening the body of the header at (line, column): the first
+        "{" outside the parameter list. A ";" or "}" before it means the header was a
+        declaration or a call, not a definition. Type literals in a result type, e.g.
+        map[string]interface{} or <-chan struct{ ok bool }, are skipped whole.
+        """
+        depth = 0
+        literal_depth = 0
+        for line in range(line, min(line + _MAX_SIGNATURE_LINES, len(code_lines))):
+            code = code_lines[line]
+            for token in _SIGNATURE_TOKEN.finditer(code, column):
+                char = token.group(0)
+                if literal_depth:
+                    if char == "{":
+                        literal_depth += 1
+                    elif char == "}":
+                        literal_depth -= 1
+                elif char == "(":
+                    depth += 1
+                elif char == ")":
+                    depth = max(0, depth - 1)
+                elif depth == 0:
+                    if char != "{":
+                        return None
+                    if not _TYPE_LITERAL.search(code, max(0, token.start() - 16), token.start()):
+                        return line, token.start()
+                    literal_depth = 1
+            column = 0
+        return None
@@ -0,0 +1,136 @@
+"""
+Repository-wide call graph between the functions of a FunctionStore
+Nodes are store rows. Each caller's edges point to the rows its called names resolve
+to, kept in CSR form: callees of row i are targets[offsets[i]:offsets[i + 1]], two
+flat uint32 arrays (4 bytes per edge and per function), so graphs of 500k+ functions
+stay a few megabytes on disk and load without any per-edge parsing.
+
+A called name resolves within the caller's language to the nearest scope defining it:
+the same file, else the same directory (package/module), else the whole repository.
+It becomes an edge only if that scope has exactly one definition; ambiguous names
+(overloads, same-named methods of different types) and unknown names (builtins,
+library calls) are dropped, as are self-calls. Edges keep the caller's first-call order.
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List
+
+from analysis.result_store import FunctionStore
+
+MAGIC = b"DBCG"
+FORMAT_VERSION = 1
+
+
+class CallGraph:
+    """Caller -> callee adjacency of store rows in CSR form"""
+
+    def __init__(self, offsets: array = None, targets: array = None):
+        self.offsets = offsets if offsets is not None else array("I", [0])
+        self.targets = targets if targets is not None else array("I")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def callees(self, row: int) -> array:
+        """Rows called by row, in first-call order"""
+        return self.targets[self.offsets[row]:self.offsets[row + 1]]
+
+    @classmethod
+    def build(cls, store: FunctionStore) -> "CallGraph":
+        """Resolve the called names of every store row to callee rows"""
+        # Directory of every interned path, as an id
+        directory_ids: Dict[str, int] = {}
+        path_directories = array("I", (
+            directory_ids.setdefault(os.path.dirname(path), len(directory_ids)) for path in store.paths.values
+        ))
+
+        # name id * language count + language id -> directory id -> rows defining that
+        # name there (one int key instead of a tuple per lookup)
+        languages = max(1, len(store.languages.values))
+        definitions: Dict[int, Dict[int, List[int]]] = {}
+        for row, (language_id, name_id, path_id) in enumerate(
+            zip(store.language_ids, store.name_ids, store.path_ids)
+        ):
+            key = name_id * languages + language_id
+            by_directory = definitions.get(key)
+            if by_directory is None:
+                definitions[key] = {path_directories[path_id]: [row]}
+            else:
+                by_directory.setdefault(path_directories[path_id], []).append(row)
+
+        # Names defined exactly once resolve from anywhere
+        unique = {
+            key: rows[0] for key, by_directory in definitions.items()
+            if len(by_directory) == 1 and len(rows := next(iter(by_directory.values()))) == 1
+        }
+
+        offsets = array("I", [0])
+        targets = array("I")
+        call_ids = store.call_ids.tolist()
+        call_offsets = store.call_offsets
+        path_ids = store.path_ids
+        find = definitions.get
+        for row, (language_id, path_id) in enumerate(zip(store.language_ids, store.path_ids)):
+            directory = path_directories[path_id]
+            seen = None
+            for name_id in call_ids[call_offsets[row]:call_offsets[row + 1]]:
+                key = name_id * languages + language_id
+                by_directory = find(key)
+                if by_directory is None:
+                    continue
+                nearby = by_directory.get(directory)
+                if nearby:
+                    if len(nearby) > 1:
+                        nearby = [callee for callee in nearby if path_ids[callee] == path_id] or nearby
+                    if len(nearby) > 1:
+                        continue  # defined more than once in the nearest scope: ambiguous
+                    callee = nearby[0]
+                else:
+                    callee = unique.get(key)
+                    if callee is None:
+                        continue  # defined more than once elsewhere: ambiguous
+                if seen is None:
+                    seen = {row}
+                if callee not in seen:
+                    seen.add(callee)
+                    targets.append(callee)
+            offsets.append(len(targets))
+        return cls(offsets, targets)
+
+    def write(self, path: str):
+        header = json.dumps({"count": len(self), "edges": self.edge_count}).encode()
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<HI", FORMAT_VERSION, len(header)))
+            f.write(header)
+            for column in (self.offsets, self.targets):
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+
+    @classmethod
+    def read(cls, path: str) -> "CallGraph":
+        with open(path, "rb") as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path} is not a call graph")
+            version, header_size = struct.unpack("<HI", f.read(6))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported call graph version {version}")
+            header = json.loads(f.read(header_size))
+
+            graph = cls(array("I"), array("I"))
+            graph.offsets.fromfile(f, header["count"] + 1)
+            graph.targets.fromfile(f, header["edges"])
+            if sys.byteorder == "big":
+                graph.offsets.byteswap()
+                graph.targets.byteswap()
+        return graph
@@ -3,18 +3,92 @@
 """
 Phase 1: Structural Code Complexity Pre-Analysis
 Goal: Analyze codebase and rank functions/code parts by complexity
-Output: Top 100 most complex code sections for further LLM analysis
+Output: Top 100 (top_k) most complex code sections for further LLM analysis
 """
 
+import hashlib
+import heapq
 import json
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, Dict, List
-
-
-@dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+if not __package__:
+    # Run as a script (python backend/analysis/complexity_analyzer.py): make the analysis package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.artifacts import write_records
+from analysis.archive_source import ZipSource
+from analysis.brace_lexer import BraceLexer
+from analysis.call_graph import CallGraph
+from analysis.disk_cache import DiskCache
+from analysis.ignore_rules import IgnoreRules, is_ignored
+from analysis.instrumentation import Profiler
+from analysis.metric_engine import MetricEngine, comment_pattern
+from analysis.python_frontend import extract_python_functions, split_source_lines
+from analysis.result_store import FunctionRecord, FunctionStore, result_dict
+from analysis.sharding import ShardEntry, merge_shards, merge_stores, shard_of, shard_path, write_shard
+from analysis.source_reader import Buffer, SkippedFile, SourceReader
+
+# Bump whenever extraction or metric semantics change so cached file results are not reused
+ANALYZER_VERSION = "6"
+
+DEFAULT_CACHE_PATH = "./.docubuddy_cache/phase1.sqlite3"
+STORE_PATH = "./complex_functions.store"
+# Caller -> callee edges between the stored functions (see analysis.call_graph)
+CALL_GRAPH_PATH = "./complex_functions.graph"
+# Top-K hand-off to Phase 2; the suffix picks the format (see analysis.artifacts)
+RESULTS_PATH = "./complex_functions.ndjson"
+
+# Infrastructure/non-code directories, pruned with their whole subtree
+SKIP_DIRS = frozenset({
+    ".git", ".svn", ".hg", ".bzr", "node_modules", "bower_components", "vendor",
+    "packages", ".gradle", ".maven", "target", "build", "bin", "obj", "out", ".vscode",
+    ".idea", ".eclipse", "__pycache__", ".pytest_cache", ".mypy_cache", "venv", "env",
+    ".env", "virtualenv", "dist", "coverage", ".nyc_output", "logs", "log", "tmp", "temp",
+    ".docker", "docker-compose", ".terraform", ".aws", "migrations", "assets", "static",
+    "public", "resources", "docs", "documentation", "wiki", "test", "tests", "spec",
+    "specs", ".settings", ".metadata",
+})
+
+# Infrastructure and config files (lower-cased names)
+SKIP_FILES = frozenset({
+    "package.json", "package-lock.json", "yarn.lock", "pom.xml", "build.gradle",
+    "settings.gradle", "gradle.properties", "build.xml", "ivy.xml", "makefile", "cmake",
+    "cmakecache.txt", "requirements.txt", "pipfile", "pipfile.lock", "poetry.lock",
+    "composer.json", "composer.lock", "gemfile", "gemfile.lock", ".gitignore",
+    ".gitattributes", ".gitmodules", ".dockerignore", "dockerfile", "readme.md",
+    "readme.txt", "readme.rst", "license", "license.txt", "license.md", "changelog.md",
+    "changelog.txt", "contributing.md", "code_of_conduct.md", ".editorconfig", ".eslintrc",
+    ".prettierrc", "tsconfig.json", "jsconfig.json", ".babelrc", "webpack.config.js",
+    ".travis.yml", ".circleci", "appveyor.yml", "jenkinsfile", ".github", "schema.sql",
+    "seeds.sql", "todo.txt", "notes.txt", "manifest.mf", "meta-inf",
+})
+
+# Non-code file extensions
+SKIP_EXTENSIONS = frozenset({
+    ".md", ".txt", ".rst", ".pdf", ".doc", ".docx", ".json", ".xml", ".yaml", ".yml",
+    ".ini", ".cfg", ".conf", ".properties", ".env", ".local", ".png", ".jpg", ".jpeg",
+    ".gif", ".svg", ".ico", ".bmp", ".mp3", ".mp4", ".avi", ".mov", ".wav", ".zip", ".tar",
+    ".gz", ".7z", ".rar", ".exe", ".dll", ".so", ".dylib", ".jar", ".war", ".ear", ".db",
+    ".sqlite", ".sqlite3", ".mdb", ".log", ".tmp", ".temp", ".cache", ".pem", ".key",
+    ".crt", ".cert", ".g4", ".sh", ".bash", ".zsh", ".fish", ".bat", ".cmd", ".ps1",
+    ".psm1", ".lock",
+})
+
+# Keywords a call_pattern also matches in front of "(", e.g. "if (", "func(" closures
+NON_CALL_KEYWORDS = frozenset({
+    "if", "elif", "else", "for", "foreach", "while", "do", "switch", "case", "catch", "except",
+    "return", "throw", "new", "delete", "sizeof", "alignof", "typeof", "nameof", "decltype",
+    "using", "lock", "fixed", "checked", "unchecked", "synchronized", "select", "go", "defer",
+    "func", "and", "or", "not", "in", "is", "assert", "lambda", "yield", "await", "with",
+})
+
+
+@dataclass(slots=True)
 class ComplexityMetrics:
     """Container for all complexity metrics"""
 
@@ -27,8 +101,49 @@ class ComplexityMetrics:
     total_score: float = 0.0
 
 
+class FileAnalysis(NamedTuple):
+    """Outcome of analyze_file: cache key, function records and whether they came from cache"""
+
+    cache_key: Optional[str]
+    records: List[FunctionRecord]
+    cache_hit: bool
+    skip_reason: Optional[str] = None  # set when the reader refused the file
+    calls: Sequence[List[str]] = ()  # names each record's function calls
+
+    def cache_value(self) -> bytes:
+        return json.dumps({"records": self.records, "calls": self.calls}).encode()
+
+
 class CodeComplexityAnalyzer:
-    def __init__(self):
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache: Optional[DiskCache] = None,
+        top_k: int = 100,
+        reader: Optional[SourceReader] = None,
+        excludes: Optional[List[str]] = None,
+        use_gitignore: bool = True,
+    ):
+        """
+        Args:
+            workers: Number of processes used by analyze_codebase (defaults to CPU count, 1 = serial)
+            cache: Persistent per-file result cache keyed by content hash (None disables caching)
+            top_k: Number of most complex functions analyze_codebase returns
+            reader: File reader enforcing size/line caps and binary detection
+            excludes: Extra .gitignore-style globs, relative to the analyzed root
+            use_gitignore: Honour the .gitignore files found while walking
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.top_k = top_k
+        self.reader = reader or SourceReader()
+        self.exclude_rules = IgnoreRules("", excludes or [])
+        self.use_gitignore = use_gitignore
+        self.github_repo_url = ""
+        self.stats: Dict[str, int] = {}
+        self.skipped_files: List[Dict[str, str]] = []
+        self.file_order: Dict[str, int] = {}  # stored path -> walk index (sharded runs only)
+
         # Language-specific patterns for different file types
         self.language_patterns = {
             "python": {
@@ -37,6 +152,8 @@ class CodeComplexityAnalyzer:
                 "class_pattern": r"^\s*class\s+(\w+)",
                 "branching_keywords": ["if", "elif", "for", "while", "try", "except", "with"],
                 "comment_patterns": [r"#.*", r'"""[\s\S]*?"""', r"'''[\s\S]*?'''"],
+                # Only for files the ast cannot parse (calls are otherwise read from the tree)
+                "call_pattern": r"(?<!def )\b(\w+)\s*\(",
             },
             "java": {
                 "extensions": [".java"],
@@ -44,6 +161,8 @@ class CodeComplexityAnalyzer:
                 "class_pattern": r"\b(?:public|private)?\s*class\s+(\w+)",
                 "branching_keywords": ["if", "else", "for", "while", "switch", "case", "try", "catch"],
                 "comment_patterns": [r"//.*", r"/\*[\s\S]*?\*/"],
+                "lexer": BraceLexer(text_blocks=True),
+                "call_pattern": r"(?<!new )\b(\w+)\s*\(",
             },
             "go": {
                 "extensions": [".go"],
@@ -51,6 +170,8 @@ class CodeComplexityAnalyzer:
                 "class_pattern": r"\btype\s+(\w+)\s+struct",
                 "branching_keywords": ["if", "for", "switch", "case", "select"],
                 "comment_patterns": [r"//.*", r"/\*[\s\S]*?\*/"],
+                "lexer": BraceLexer(backtick_strings=True),
+                "call_pattern": r"\b(\w+)\s*(?:\[[\w\s,.*\[\]]*\]\s*)?\(",
             },
             "csharp": {
                 "extensions": [".cs"],
@@ -58,6 +179,8 @@ class CodeComplexityAnalyzer:
                 "class_pattern": r"\b(?:public|private)?\s*class\s+(\w+)",
                 "branching_keywords": ["if", "else", "for", "while", "switch", "case", "try", "catch"],
                 "comment_patterns": [r"//.*", r"/\*[\s\S]*?\*/"],
+                "lexer": BraceLexer(text_blocks=True, verbatim_strings=True),
+                "call_pattern": r"(?<!new )\b(\w+)\s*(?:<[\w\s,.<>\[\]]*>\s*)?\(",
             },
             "cpp": {
                 "extensions": [".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"],
@@ -65,6 +188,8 @@ class CodeComplexityAnalyzer:
                 "class_pattern": r"\bclass\s+(\w+)",
                 "branching_keywords": ["if", "else", "for", "while", "switch", "case", "try", "catch"],
                 "comment_patterns": [r"//.*", r"/\*[\s\S]*?\*/"],
+                "lexer": BraceLexer(raw_strings=True, digit_separators=True),
+                "call_pattern": r"\b(\w+)\s*(?:<[\w\s,:*&<>]*>\s*)?\(",
             },
         }
 
@@ -78,51 +203,61 @@ class CodeComplexityAnalyzer:
             "documentation_penalty": 2.0,  # Penalty for poor documentation
         }
 
+        # Extension lookup table (the first language listing an extension wins)
+        self.extension_languages: Dict[str, str] = {}
+        for language, config in self.language_patterns.items():
+            for ext in config["extensions"]:
+                self.extension_languages.setdefault(ext, language)
+
+        # All metric patterns compiled once; analyze_function scores in a single pass
+        self.metric_engine = MetricEngine(self.language_patterns)
+        self.function_regexes = {
+            language: re.compile(config["function_pattern"])
+            for language, config in self.language_patterns.items()
+        }
+        self.call_regexes = {
+            language: re.compile(config["call_pattern"])
+            for language, config in self.language_patterns.items()
+        }
+
     def should_skip_directory(self, dirpath: str) -> bool:
         """Check if directory should be skipped (infrastructure/non-code directories)"""
-        skip_dirs = {".git", ".svn", ".hg", ".bzr", "node_modules", "bower_components", "vendor", 
-                     "packages", ".gradle", ".maven", "target", "build", "bin", "obj", "out", ".vscode",
-                     ".idea", ".eclipse", "__pycache__", ".pytest_cache", ".mypy_cache", "venv", "env", 
-                     ".env", "virtualenv", "dist", "coverage", ".nyc_output", "logs", "log", "tmp", 
-                     "temp", ".docker", "docker-compose", ".terraform", ".aws", "migrations", "assets", 
-                     "static", "public", "resources", "docs", "documentation", "wiki", "test", "tests",
-                     "spec", "specs", ".settings", ".metadata"}
-
         dir_name = os.path.basename(dirpath.rstrip(os.sep))
-        return dir_name in skip_dirs or dir_name.startswith(".")
+        return dir_name in SKIP_DIRS or dir_name.startswith(".")
 
     def should_skip_file(self, filepath: str) -> bool:
         """Check if file should be skipped (infrastructure/config files)"""
         filename = os.path.basename(filepath).lower()
-
-        # Skip common infrastructure and config files
-        skip_files = {"package.json", "package-lock.json", "yarn.lock", "pom.xml", "build.gradle", 
-                      "settings.gradle", "gradle.properties", "build.xml", "ivy.xml", "makefile", 
-                      "cmake", "cmakecache.txt", "requirements.txt", "pipfile", "pipfile.lock", 
-                      "poetry.lock", "composer.json", "composer.lock", "gemfile", "gemfile.lock", 
-                      ".gitignore", ".gitattributes", ".gitmodules", ".dockerignore", "dockerfile", 
-                      "readme.md", "readme.txt", "readme.rst", "license", "license.txt", "license.md", 
-                      "changelog.md", "changelog.txt", "contributing.md", "code_of_conduct.md", 
-                      ".editorconfig", ".eslintrc", ".prettierrc", "tsconfig.json", "jsconfig.json", 
-                      ".babelrc", "webpack.config.js", ".travis.yml", ".circleci", "appveyor.yml", 
-                      "jenkinsfile", ".github", "schema.sql", "seeds.sql", "todo.txt", "notes.txt", 
-                      "manifest.mf", "meta-inf"}
-
-        # Check exact filename matches
-        if filename in skip_files:
-            return True
-
-        # Check file extensions for non-code files
-        skip_extensions = {".md", ".txt", ".rst", ".pdf", ".doc", ".docx", ".json", ".xml", ".yaml", 
-                           ".yml", ".ini", ".cfg", ".conf", ".properties", ".env", ".local", ".png", 
-                           ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".bmp", ".mp3", ".mp4", ".avi", 
-                           ".mov", ".wav", ".zip", ".tar", ".gz", ".7z", ".rar", ".exe", ".dll", ".so", 
-                           ".dylib", ".jar", ".war", ".ear", ".db", ".sqlite", ".sqlite3", ".mdb", 
-                           ".log", ".tmp", ".temp", ".cache", ".pem", ".key", ".crt", ".cert", ".g4", 
-                           ".sh", ".bash", ".zsh", ".fish", ".bat", ".cmd", ".ps1", ".psm1", ".lock"}
-
-        ext = Path(filepath).suffix.lower()
-        return ext in skip_extensions
+        return filename in SKIP_FILES or os.path.splitext(filename)[1] in SKIP_EXTENSIONS
+
+    def language_for_path(
+        self, rel_path: str, gitignores: Optional[Callable[[str], Optional[IgnoreRules]]] = None
+    ) -> Optional[str]:
+        """
+        Language of a /-separated repository path, None if the walk would not analyze it.
+        gitignores(rel_dir) gives the rules of the .gitignore in that directory ("" for
+        the root) or None; without it only the exclude globs are applied.
+        """
+        parts = rel_path.split("/")
+        if any(self.should_skip_directory(directory) for directory in parts[:-1]):
+            return None
+        language = self.detect_language(rel_path)
+        if language in ("unknown", "skip"):
+            return None
+
+        # Same rule sets as collect_source_files, including pruned ancestor directories
+        rules = [self.exclude_rules] if self.exclude_rules.rules else []
+        rel_dir = ""
+        for depth, name in enumerate(parts):
+            if self.use_gitignore and gitignores is not None:
+                gitignore = gitignores(rel_dir)
+                if gitignore is not None:
+                    rules = rules + [gitignore]
+            child = f"{rel_dir}/{name}" if rel_dir else name
+            if rules and is_ignored(rules, child, depth < len(parts) - 1):
+                return None
+            rel_dir = child
+        return language
 
     def detect_language(self, filepath: str) -> str:
         """Detect programming language based on file extension"""
@@ -130,72 +265,20 @@ class CodeComplexityAnalyzer:
         if self.should_skip_file(filepath):
             return "skip"
 
-        ext = Path(filepath).suffix.lower()
-
-        for lang, config in self.language_patterns.items():
-            if ext in config["extensions"]:
-                return lang
-        return "unknown"
+        ext = os.path.splitext(filepath)[1].lower()
+        return self.extension_languages.get(ext, "unknown")
     
-    def strip_string_literals(self, line: str) -> str:
-        """Remove all string literals (single and double quoted) from the line."""
-        return re.sub(r'(["\'])(?:\\.|[^\\])*?\1', '', line)
-
     def extract_functions(self, content: str, language: str) -> List[Dict[str, Any]]:
         if language == "unknown":
             return []
 
-        config = self.language_patterns[language]
-        functions = []
-        lines = content.splitlines()
-        total_lines = len(lines)
-        i = 0
-
-        while i < total_lines:
-            line = lines[i]
-            func_match = re.search(config["function_pattern"], line)
-
-            if func_match:
-                func_name = func_match.group(1)
-                start_line = i + 1
-                function_lines = [line]
-
-                # Capture full multi-line signature
-                while "{" not in line and i + 1 < total_lines:
-                    i += 1
-                    line = lines[i]
-                    function_lines.append(line)
-                    if "{" in line:
-                        break
-
-                if "{" not in line:
-                    i += 1
-                    continue  # skip malformed/abstract
-
-                # Begin brace counting (ignore braces inside strings)
-                brace_count = self.strip_string_literals(line).count("{") - self.strip_string_literals(line).count("}")
-                i += 1
-
-                while i < total_lines and brace_count > 0:
-                    line = lines[i]
-                    code_only = self.strip_string_literals(line)
-                    brace_count += code_only.count("{") - code_only.count("}")
-                    function_lines.append(line)
-                    i += 1
-
-                end_line = start_line + len(function_lines) - 1
-                functions.append({
-                    "name": func_name,
-                    "start_line": start_line,
-                    "end_line": end_line,
-                    "content": function_lines,
-                    "language": language,
-                })
-            else:
-                i += 1
-
-        return functions
+        if language == "python":
+            # Python has no braces to count: use the ast-based front end
+            return extract_python_functions(content)
 
+        # Brace languages share one linear string/comment/brace lexer per file
+        config = self.language_patterns[language]
+        return config["lexer"].extract_functions(content, language, self.function_regexes[language])
 
     def calculate_cyclomatic_complexity(self, content: str, language: str) -> int:
         """Calculate cyclomatic complexity (number of decision points + 1)"""
@@ -329,7 +412,7 @@ class CodeComplexityAnalyzer:
 
         # Count comment lines
         for pattern in config["comment_patterns"]:
-            comment_lines += len(re.findall(pattern, content, re.MULTILINE))
+            comment_lines += comment_pattern(pattern).count(content)
 
         # Calculate documentation ratio
         doc_ratio = comment_lines / total_lines if total_lines > 0 else 0
@@ -350,24 +433,12 @@ class CodeComplexityAnalyzer:
 
     def analyze_function(self, function_data: Dict[str, Any]) -> ComplexityMetrics:
         """Analyze a single function and return complexity metrics"""
-        content = "\n".join(function_data["content"])
-        language = function_data["language"]
-
-        metrics = ComplexityMetrics()
-
-        # Calculate individual metrics
-        metrics.cyclomatic_complexity = self.calculate_cyclomatic_complexity(
-            content, language
-        )
-        metrics.nesting_depth = self.calculate_nesting_depth(content, language)
-        metrics.function_length = self.calculate_function_length(content)
-        metrics.parameter_count = self.count_parameters(content, language)
-        metrics.cognitive_complexity = self.calculate_cognitive_complexity(
-            content, language
-        )
-        metrics.documentation_score = self.calculate_documentation_score(
-            content, language
+        metrics = ComplexityMetrics(
+            *self.metric_engine.measure(function_data["content"], function_data["language"])
         )
+        # Front ends with a syntax tree (Python) supply exact structural metrics
+        for name, value in function_data.get("metrics", {}).items():
+            setattr(metrics, name, value)
 
         # Calculate total weighted score
         total_score = (
@@ -393,85 +464,375 @@ class CodeComplexityAnalyzer:
 
         return metrics
 
-    def analyze_codebase(self, root_path: str) -> List[Dict[str, Any]]:
-        """Analyze entire codebase and return ranked complexity results"""
-        results = []
-        skipped_dirs = set()
-
-        # Walk through all files
-        for root, dirs, files in os.walk(root_path):
-            # Skip infrastructure directories
-            if self.should_skip_directory(root):
-                if root not in skipped_dirs:
-                    print(f"Skipping directory: {root}")
-                    skipped_dirs.add(root)
-                continue
-
-            # Remove directories that should be skipped from dirs list
-            # This prevents os.walk from entering them
-            dirs[:] = [
-                d for d in dirs if not self.should_skip_directory(os.path.join(root, d))
-            ]
-
-            for file in files:
-                filepath = os.path.join(root, file)
-                language = self.detect_language(filepath)
-
-                if language in ["unknown", "skip"]:
+    def collect_source_files(self, root_path: str, source: Optional[ZipSource] = None) -> List[Tuple[str, str]]:
+        """
+        Walk the codebase and return (filepath, language) pairs. Entries are visited in
+        sorted order (a directory's files before its subdirectories), so the result does
+        not depend on the file system. Skipped and ignored directories are pruned
+        before they are listed. If a source is given, its listing (e.g. the members of
+        an archive, addressed as if extracted under root_path) is walked instead.
+        """
+        list_dir = source.list_dir if source is not None else _list_dir
+        read_text = source.read_text if source is not None else _read_text
+
+        source_files = []
+        if self.should_skip_directory(os.path.abspath(root_path)):
+            print(f"Skipping directory: {root_path}")
+            return source_files
+
+        # Stack of (directory, path relative to root, rule sets in effect there)
+        base_rules = [self.exclude_rules] if self.exclude_rules.rules else []
+        pending = [(root_path, "", base_rules)]
+        while pending:
+            directory, rel_dir, rules = pending.pop()
+            entries = list_dir(directory)
+
+            if self.use_gitignore:
+                for name, path, is_dir in entries:
+                    if name == ".gitignore" and not is_dir:
+                        rules = rules + [IgnoreRules(rel_dir, read_text(path).splitlines())]
+
+            subdirectories = []
+            for name, path, is_dir in entries:
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if is_dir:
+                    if name in SKIP_DIRS or name.startswith("."):
+                        continue
+                    if rules and is_ignored(rules, rel_path, True):
+                        continue
+                    subdirectories.append((path, rel_path, rules))
                     continue
 
+                lower = name.lower()
+                if lower in SKIP_FILES:
+                    continue
+                ext = os.path.splitext(lower)[1]
+                language = self.extension_languages.get(ext)
+                if language is None or ext in SKIP_EXTENSIONS:
+                    continue
+                if rules and is_ignored(rules, rel_path, False):
+                    continue
+                source_files.append((path, language))
+
+            # Depth-first, first subdirectory on top of the stack
+            pending.extend(reversed(subdirectories))
+
+        return source_files
+
+    def cache_key(self, data: Buffer, language: str) -> str:
+        """Key a file's results by its content, the analyzer version and the weights"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(ANALYZER_VERSION.encode())
+        digest.update(json.dumps(self.complexity_weights, sort_keys=True).encode())
+        digest.update(language.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def analyze_source(self, content: str, language: str) -> Tuple[List[FunctionRecord], List[List[str]]]:
+        """Extract and score every function of a single source text. Returns the records
+        and, per record, the names the function calls."""
+        records, calls = [], []
+        for func in self.extract_functions(content, language):
+            metrics = self.analyze_function(func)
+            records.append(FunctionRecord(
+                func["name"], func["start_line"], func["end_line"],
+                metrics.cyclomatic_complexity, metrics.nesting_depth, metrics.function_length,
+                metrics.parameter_count, metrics.cognitive_complexity,
+                metrics.documentation_score, metrics.total_score,
+            ))
+            calls.append(self.called_names(func))
+        return records, calls
+
+    def called_names(self, function_data: Dict[str, Any]) -> List[str]:
+        """Names a function calls, in first-call order. Front ends with a syntax tree
+        supply them; otherwise the language's call_pattern is matched on the body with
+        strings and comments blanked (or the raw lines without a lexer), so the
+        function's own header is not a call."""
+        if "calls" in function_data:
+            return function_data["calls"]
+        code = "\n".join(function_data.get("body") or function_data["content"])
+        names = self.call_regexes[function_data["language"]].findall(code)
+        return [name for name in dict.fromkeys(names) if name not in NON_CALL_KEYWORDS]
+
+    def function_contents(
+        self,
+        entries: List[Tuple[str, str, FunctionRecord]],
+        source: Optional[ZipSource] = None,
+        read: Optional[Callable[[str], Buffer]] = None,
+    ) -> List[Optional[str]]:
+        """Source text of each (filepath, language, record) function, reading every file
+        once: with read if given, else from the source's archive or the file system.
+        None where a file cannot be read."""
+        lines_by_file: Dict[str, Optional[List[str]]] = {}
+        contents = []
+        for filepath, language, record in entries:
+            if filepath not in lines_by_file:
                 try:
-                    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-
-                    # Extract functions from file
-                    functions = self.extract_functions(content, language)
-
-                    for func in functions:
-                        metrics = self.analyze_function(func)
-                        rel_path = os.path.relpath(filepath, root_path).replace(
-                            "\\", "/"
-                        )
-                        file_url = f"file:///{filepath}"
-                        # github_repo_url should be passed in or set globally
-                        github_url = f"{self.github_repo_url}{rel_path}#L{func['start_line']}-L{func['end_line']}"
-
-                        result = {
-                            "function_name": func["name"],
-                            "file_url": file_url,
-                            "github_url": github_url,
-                            "start_line": func["start_line"],
-                            "end_line": func["end_line"],
-                            "language": language,
-                            "rule_analysis": {
-                                "cyclomatic_complexity": metrics.cyclomatic_complexity,
-                                "nesting_depth": metrics.nesting_depth,
-                                "function_length": metrics.function_length,
-                                "parameter_count": metrics.parameter_count,
-                                "cognitive_complexity": metrics.cognitive_complexity,
-                                "documentation_score": metrics.documentation_score,
-                                "rule_score": metrics.total_score,
-                            },
-                        }
-                        results.append(result)
-
+                    if read is not None:
+                        content = self.reader.decode(read(filepath))
+                    elif source is not None:
+                        content = self.reader.decode(source.read(filepath, self.reader.max_file_bytes))
+                    else:
+                        with self.reader.open(filepath) as data:
+                            content = self.reader.decode(data)
+                    # Same line splitting as the front end that numbered the lines
+                    lines = split_source_lines(content) if language == "python" else content.splitlines()
                 except Exception as e:
-                    print(f"Error processing {filepath}: {e}")
-                    continue
-
-        # Sort by complexity score (descending) and return top 100
-        results.sort(key=lambda x: x["rule_analysis"]["rule_score"], reverse=True)
-        return results[:100]
-
-
-def main(repo_url: str):
-    """Analyze a codebase for function complexity and output the results."""
-
-    analyzer = CodeComplexityAnalyzer()
-    codebase_path = r"./repo"
-    analyzer.github_repo_url = repo_url
-    print(f"\n🔍 Analyzing codebase at: {codebase_path}...\n")
-    top_complex_functions = analyzer.analyze_codebase(codebase_path)
+                    print(f"Cannot read {filepath}: {e}")
+                    lines = None
+                lines_by_file[filepath] = lines
+            lines = lines_by_file[filepath]
+            contents.append("\n".join(lines[record.start_line - 1:record.end_line]) if lines is not None else None)
+        return contents
+
+    def top_results(
+        self,
+        entries: List[Tuple[float, int, int, str, str, FunctionRecord]],
+        root_path: str,
+        source: Optional[ZipSource] = None,
+    ) -> List[Dict[str, Any]]:
+        """Result dicts of top_entries with each function's source as function_content"""
+        contents = self.function_contents(
+            [(filepath, language, record) for *_, filepath, language, record in entries], source
+        )
+        results = []
+        for (*_, filepath, language, record), content in zip(entries, contents):
+            result = self.build_result(filepath, root_path, language, record)
+            result["function_content"] = content
+            results.append(result)
+        return results
+
+    def analyze_file(self, filepath: str, language: str, source: Optional[ZipSource] = None) -> FileAnalysis:
+        """Analyze a single file, serving unchanged content from the cache. With a
+        source, the file is decompressed from its archive member instead of read."""
+        try:
+            if source is not None:
+                data = source.read(filepath, self.reader.max_file_bytes)
+                self.reader.check(data)
+                return self._analyze_data(data, language)
+            with self.reader.open(filepath) as data:
+                return self._analyze_data(data, language)
+
+        except SkippedFile as e:
+            return FileAnalysis(None, [], False, str(e))
+
+        except Exception as e:
+            print(f"Error processing {filepath}: {e}")
+            return FileAnalysis(None, [], False)
+
+    def analyze_buffer(self, data: Buffer, name: str, language: str) -> FileAnalysis:
+        """Analyze file contents that are already in memory (e.g. a git blob)"""
+        try:
+            self.reader.check(data)
+            return self._analyze_data(data, language)
+
+        except SkippedFile as e:
+            return FileAnalysis(None, [], False, str(e))
+
+        except Exception as e:
+            print(f"Error processing {name}: {e}")
+            return FileAnalysis(None, [], False)
+
+    def _analyze_data(self, data: Buffer, language: str) -> FileAnalysis:
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(data, language)
+            # Read-only lookup: the parent process owns all cache writes
+            cached = self.cache.get(key, touch=False)
+            if cached is not None:
+                value = json.loads(cached)
+                records = [FunctionRecord(*record) for record in value["records"]]
+                return FileAnalysis(key, records, True, calls=value["calls"])
+
+        content = self.reader.decode(data)
+        records, calls = self.analyze_source(content, language)
+        return FileAnalysis(key, records, False, calls=calls)
+
+    @staticmethod
+    def relative_path(filepath: str, root_path: str) -> str:
+        return os.path.relpath(filepath, root_path).replace("\\", "/")
+
+    def build_result(self, filepath: str, root_path: str, language: str, record: FunctionRecord) -> Dict[str, Any]:
+        """Materialize the JSON result dict for one function record"""
+        rel_path = self.relative_path(filepath, root_path)
+        # github_repo_url should be passed in or set globally
+        return result_dict(root_path, rel_path, language, record, self.github_repo_url)
+
+    def analyze_codebase(
+        self,
+        root_path: str,
+        store: Optional[FunctionStore] = None,
+        profiler: Optional[Profiler] = None,
+        source: Optional[ZipSource] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze entire codebase and return the top_k most complex functions.
+        If a store is given, every analyzed function is also appended to it.
+        If a profiler is given, the walk, analysis and cache flush are timed as stages.
+        If a source is given, the codebase is read from its archive instead of root_path.
+        """
+        # Only the survivors are materialized as result dicts
+        entries = self.top_entries(root_path, store, profiler, source=source)
+        return self.top_results(entries, root_path, source)
+
+    def top_entries(
+        self,
+        root_path: str,
+        store: Optional[FunctionStore] = None,
+        profiler: Optional[Profiler] = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        source: Optional[ZipSource] = None,
+    ) -> List[Tuple[float, int, int, str, str, FunctionRecord]]:
+        """
+        The top_k functions as (score, -file index, -function index, filepath, language,
+        record), best first. Indices refer to the full walk, so with shard_count > 1 only
+        the files of shard_index are analyzed but their keys stay globally comparable.
+        """
+        profiler = profiler or Profiler()
+        # Min-heap of the best top_k entries seen so far. Keys are (score, -file index,
+        # -function index): the root is the lowest score and, on ties, the function found
+        # last, so the survivors match a stable descending sort of every function.
+        top = []
+        with profiler.stage("walk"):
+            indexed_files = list(enumerate(self.collect_source_files(root_path, source)))
+        if shard_count > 1:
+            indexed_files = [
+                (file_index, (filepath, language))
+                for file_index, (filepath, language) in indexed_files
+                if shard_of(self.relative_path(filepath, root_path), shard_count) == shard_index
+            ]
+        workers = min(self.workers, len(indexed_files))
+        if source is not None and not source.parallel_safe:
+            workers = 1  # worker processes could not get their own handle on the archive
+        self.stats = {
+            "files_walked": len(indexed_files), "files_analyzed": 0, "files_skipped": 0,
+            "functions_extracted": 0, "cache_hits": 0, "cache_misses": 0,
+        }
+        self.skipped_files = []
+        self.file_order = {}
+
+        if workers > 1:
+            # Spread per-file extraction and scoring over a process pool. map() yields
+            # in submission order, so the merged list matches the serial walk order.
+            tasks = [task for _, task in indexed_files]
+            chunksize = max(1, len(tasks) // (workers * 8))
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self, source)
+            )
+            analyses = executor.map(_analyze_file_task, tasks, chunksize=chunksize)
+        else:
+            executor = None
+            analyses = (
+                self.analyze_file(filepath, language, source) for _, (filepath, language) in indexed_files
+            )
+
+        hit_keys, new_entries = [], []
+        with profiler.stage("analyze", workers=workers):
+            try:
+                for (file_index, (filepath, language)), analysis in zip(indexed_files, analyses):
+                    if analysis.skip_reason is not None:
+                        # Cheap record instead of a parse for oversize or binary files
+                        print(f"Skipping file ({analysis.skip_reason}): {filepath}")
+                        self.stats["files_skipped"] += 1
+                        self.skipped_files.append({"file_url": f"file:///{filepath}", "reason": analysis.skip_reason})
+                        continue
+
+                    self.stats["files_analyzed"] += 1
+                    self.stats["functions_extracted"] += len(analysis.records)
+                    if analysis.cache_key is not None:
+                        if analysis.cache_hit:
+                            self.stats["cache_hits"] += 1
+                            hit_keys.append(analysis.cache_key)
+                        else:
+                            self.stats["cache_misses"] += 1
+                            new_entries.append((analysis.cache_key, analysis.cache_value()))
+                            if len(new_entries) >= 256:
+                                self.cache.put_many(new_entries)
+                                new_entries = []
+
+                    if store is not None and analysis.records:
+                        rel_path = self.relative_path(filepath, root_path)
+                        for record, calls in zip(analysis.records, analysis.calls):
+                            store.add(rel_path, language, record, calls)
+                        if shard_count > 1:
+                            self.file_order[rel_path] = file_index
+
+                    for function_index, record in enumerate(analysis.records):
+                        entry = (record.total_score, -file_index, -function_index, filepath, language, record)
+                        if len(top) < self.top_k:
+                            heapq.heappush(top, entry)
+                        elif entry[:3] > top[0][:3]:
+                            heapq.heapreplace(top, entry)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        if self.cache is not None:
+            with profiler.stage("cache_flush"):
+                self.cache.touch(hit_keys)
+                self.cache.put_many(new_entries)
+                self.cache.evict()
+
+        top.sort(key=lambda entry: entry[:3], reverse=True)
+        return top
+
+
+def _list_dir(directory: str) -> List[Tuple[str, str, bool]]:
+    """Sorted (name, path, is_dir) entries of a directory. Symlinked directories are not
+    followed (like os.walk) and unreadable entries are left out."""
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        print(f"Cannot list {directory}: {e}")
+        return []
+
+    listing = []
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    listing.append((entry.name, entry.path, True))
+            elif entry.is_file():
+                listing.append((entry.name, entry.path, False))
+        except OSError:
+            continue
+    return listing
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+# Analyzer instance and archive owned by each pool worker (set once by the pool initializer)
+_worker_analyzer: Optional[CodeComplexityAnalyzer] = None
+_worker_source: Optional[ZipSource] = None
+
+
+def _init_worker(analyzer: CodeComplexityAnalyzer, source: Optional[ZipSource] = None):
+    global _worker_analyzer, _worker_source
+    _worker_analyzer = analyzer
+    _worker_source = source
+    if source is not None:
+        source.reopen()
+
+
+def _analyze_file_task(task: Tuple[str, str]) -> FileAnalysis:
+    filepath, language = task
+    return _worker_analyzer.analyze_file(filepath, language, _worker_source)
+
+
+def write_call_graph(store: FunctionStore, path: str) -> CallGraph:
+    """Resolve and write the call graph of every stored function"""
+    graph = CallGraph.build(store)
+    graph.write(path)
+    print(f"🕸️ Call graph: {graph.edge_count} edges between {len(graph)} functions saved to {path}")
+    return graph
+
+
+def print_summary(top_complex_functions: List[Dict[str, Any]], stats: Dict[str, int], functions_stored: int, saved_to: str):
     total_files_analyzed = len({func["file_url"] for func in top_complex_functions})
     languages_found = sorted({func["language"] for func in top_complex_functions})
     summary = (
@@ -479,11 +840,84 @@ def main(repo_url: str):
         f"   📂 Files analyzed: {total_files_analyzed}\n"
         f"   🧬 Languages found: {', '.join(languages_found)}\n"
         f"   🔍 Functions analyzed: {len(top_complex_functions)}\n"
-        "\n✅ Results saved to complex_functions.json\n"
+        f"   ⏭️ Files skipped (too large/binary): {stats['files_skipped']}\n"
+        f"   ♻️ Cache hits/misses: {stats['cache_hits']}/{stats['cache_misses']}\n"
+        f"   🗃️ Functions stored: {functions_stored}\n"
+        f"\n✅ Results saved to {saved_to}\n"
     )
     print(summary)
-    with open("./complex_functions.json", "w", encoding="utf-8") as f:
-        json.dump(top_complex_functions, f, indent=2)
+
+
+def main(
+    repo_url: str,
+    workers: Optional[int] = None,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    top_k: int = 100,
+    profiler: Optional[Profiler] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    source: Optional[ZipSource] = None,
+):
+    """
+    Analyze a codebase for function complexity and output the results.
+    With a source, the repository is read from its archive (addressed as ./repo)
+    rather than from an extracted checkout.
+
+    With shard_count > 1 only the files of shard_index are analyzed and a shard artifact
+    and store are written next to the usual outputs; merge_main combines them and
+    builds the call graph, which needs every shard's functions.
+    """
+
+    profiler = profiler or Profiler()
+    cache = DiskCache(cache_path) if cache_path else None
+    analyzer = CodeComplexityAnalyzer(workers=workers, cache=cache, top_k=top_k)
+    codebase_path = r"./repo"
+    analyzer.github_repo_url = repo_url
+    print(f"\n🔍 Analyzing codebase at: {codebase_path}...\n")
+    store = FunctionStore(codebase_path, repo_url)
+    entries = analyzer.top_entries(codebase_path, store, profiler, shard_index, shard_count, source)
+    top_complex_functions = analyzer.top_results(entries, codebase_path, source)
+    for name in ("files_walked", "files_skipped", "functions_extracted", "cache_hits", "cache_misses"):
+        profiler.count(name, analyzer.stats[name])
+
+    results_path, store_path = RESULTS_PATH, STORE_PATH
+    if shard_count > 1:
+        results_path = shard_path(RESULTS_PATH, shard_index, shard_count)
+        store_path = shard_path(STORE_PATH, shard_index, shard_count)
+    print_summary(top_complex_functions, analyzer.stats, len(store), f"{results_path} and {store_path}")
+
+    with profiler.stage("write_results"):
+        if shard_count > 1:
+            shard_entries = (
+                ShardEntry(score, -neg_file_index, -neg_function_index, result)
+                for (score, neg_file_index, neg_function_index, *_), result in zip(entries, top_complex_functions)
+            )
+            write_shard(
+                results_path, shard_index, shard_count, analyzer.stats,
+                analyzer.skipped_files, analyzer.file_order, shard_entries,
+            )
+        else:
+            write_records(results_path, top_complex_functions)
+        store.write(store_path)
+    if shard_count == 1:
+        with profiler.stage("call_graph"):
+            write_call_graph(store, CALL_GRAPH_PATH)
+    if cache is not None:
+        cache.close()
+
+
+def merge_main(shard_count: int, top_k: int = 100):
+    """Merge the shard artifacts and stores of a sharded run into the usual outputs"""
+    results_paths = [shard_path(RESULTS_PATH, index, shard_count) for index in range(shard_count)]
+    store_paths = [shard_path(STORE_PATH, index, shard_count) for index in range(shard_count)]
+    merged = merge_shards(results_paths, top_k)
+    store = merge_stores(store_paths, merged.file_order)
+
+    print_summary(merged.top, merged.stats, len(store), f"{RESULTS_PATH} and {STORE_PATH}")
+    write_records(RESULTS_PATH, merged.top)
+    store.write(STORE_PATH)
+    write_call_graph(store, CALL_GRAPH_PATH)
+    return merged.top
 
 
 if __name__ == "__main__":
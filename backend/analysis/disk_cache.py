@@ -0,0 +1,111 @@
+"""
+Size-bounded persistent key/value cache
+Values are stored as blobs in a single SQLite file and evicted least-recently-used
+first once the total stored size exceeds max_bytes.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class DiskCache:
+    """SQLite-backed blob cache with LRU eviction by total bytes"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite file holding the cache (created on first use)
+            max_bytes: Upper bound for the summed size of all stored values
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self):
+        # Connections are per process; pool workers reopen the file lazily
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        return state
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets worker processes read while the parent writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+        return self._conn
+
+    def get(self, key: str, touch: bool = True) -> Optional[bytes]:
+        """Return the stored value or None. touch=False skips the LRU update (read-only)."""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and touch:
+                self.touch([key])
+        except sqlite3.Error as e:
+            print(f"Cache read failed ({self.path}): {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def touch(self, keys: Iterable[str]):
+        """Mark entries as recently used"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in keys]
+            )
+
+    def put_many(self, items: List[Tuple[str, bytes]]):
+        """Store several values in one transaction, then evict down to max_bytes"""
+        if not items:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, value, len(value), now) for key, value in items],
+            )
+        self.evict()
+
+    def put(self, key: str, value: bytes):
+        self.put_many([(key, value)])
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of entries and total stored bytes"""
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
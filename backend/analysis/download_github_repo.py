@@ -1,39 +1,278 @@
-import io
+import hashlib
 import os
 import shutil
-import zipfile
+import sys
+import tempfile
+from typing import IO, Optional, Tuple
+from urllib.parse import urlparse
 
 import requests
 from fastapi import HTTPException
+from requests.adapters import HTTPAdapter
 
+if not __package__:
+    # Run as a script (python backend/analysis/download_github_repo.py): make the analysis package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def download_github_repo_zip(repo_url: str, dest_folder: str = "./repo"):
+from analysis.archive_cache import ArchiveCache
+from analysis.archive_source import ZipSource
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+
+# Point these at a local server to stand in for GitHub (e.g. in offline tests)
+GITHUB_URL = os.getenv("DOCUBUDDY_GITHUB_URL", "https://github.com").rstrip("/")
+GITHUB_API_URL = os.getenv("DOCUBUDDY_GITHUB_API_URL", "https://api.github.com").rstrip("/")
+# Archives larger than this are refused (override with DOCUBUDDY_MAX_ARCHIVE_BYTES)
+MAX_ARCHIVE_BYTES = int(os.getenv("DOCUBUDDY_MAX_ARCHIVE_BYTES", 1024 * 1024 * 1024))
+# Archives up to this size stay in memory, bigger ones spill to a temporary file
+SPOOL_BYTES = 16 * 1024 * 1024
+CHUNK_BYTES = 1024 * 1024
+# Resumed range requests after an interrupted transfer
+DOWNLOAD_RETRIES = 3
+TIMEOUT = (10, 60)  # connect, read (seconds)
+# Threads decompressing archive members during extraction
+EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+
+_session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """Process-wide session, so repeated downloads reuse pooled connections"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Repository ZIP exceeds {max_bytes} bytes")
+
+
+def stream_download(
+    url: str,
+    out: IO[bytes],
+    max_bytes: int = MAX_ARCHIVE_BYTES,
+    retries: int = DOWNLOAD_RETRIES,
+    session: Optional[requests.Session] = None,
+    if_none_match: Optional[str] = None,
+) -> Optional[requests.structures.CaseInsensitiveDict]:
+    """
+    Stream url into out chunk by chunk and return the response headers. An interrupted
+    transfer is resumed with a Range request for the missing tail (If-Range guards
+    against the archive changing in between); servers without range support restart
+    from the beginning. Raises HTTPException 413 as soon as max_bytes is exceeded.
+    With if_none_match (a cached ETag), returns None if the server answers 304.
+    """
+    session = session or get_session()
+    written = 0
+    validator = None
+    for attempt in range(retries + 1):
+        headers = {}
+        if if_none_match and not written:
+            headers["If-None-Match"] = if_none_match
+        if written:
+            headers["Range"] = f"bytes={written}-"
+            if validator:
+                headers["If-Range"] = validator
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                if response.status_code == 304 and if_none_match:
+                    return None
+                if response.status_code == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    if not content_range.startswith(f"bytes {written}-"):
+                        raise HTTPException(status_code=400, detail="Unexpected partial repository ZIP")
+                    total = content_range.rpartition("/")[2]
+                elif response.status_code == 200:
+                    # Full body (no range support, or the archive changed): start over
+                    out.seek(0)
+                    out.truncate()
+                    written = 0
+                    total = response.headers.get("Content-Length")
+                else:
+                    raise HTTPException(status_code=400, detail="Failed to download repository ZIP")
+
+                total = int(total) if total and total.isdigit() else None
+                if total is not None and total > max_bytes:
+                    raise _too_large(max_bytes)
+                etag = response.headers.get("ETag")
+                validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+
+                for chunk in response.iter_content(CHUNK_BYTES):
+                    if written + len(chunk) > max_bytes:
+                        raise _too_large(max_bytes)
+                    out.write(chunk)
+                    written += len(chunk)
+                if total is not None and written < total:
+                    raise requests.ConnectionError(f"connection closed after {written} of {total} bytes")
+                return response.headers
+
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == retries:
+                raise HTTPException(status_code=502, detail=f"Repository ZIP download failed: {e}")
+            print(f"Download interrupted after {written} bytes, resuming: {e}")
+
+
+def fetch_github_repo_zip(repo_url: str, max_bytes: int = MAX_ARCHIVE_BYTES) -> IO[bytes]:
+    """Download the main branch archive into a spooled temporary file (in memory while
+    small, on disk beyond SPOOL_BYTES), without extracting it"""
     zip_url = f"{repo_url}/archive/refs/heads/main.zip"
-    response = requests.get(zip_url)
+    archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    try:
+        stream_download(zip_url, archive, max_bytes)
+    except BaseException:
+        archive.close()
+        raise
+    archive.seek(0)
+    return archive
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to download repository ZIP")
 
-    if os.path.exists(dest_folder):
-        shutil.rmtree(dest_folder)
+def resolve_commit(repo_url: str, ref: str = "main", known: Optional[Tuple[str, str]] = None) -> Optional[Tuple[str, str]]:
+    """
+    (commit SHA, ETag) that ref of the repository points to, from the commits API.
+    known is the (SHA, ETag) of an earlier lookup: it is revalidated with If-None-Match,
+    and a 304 reply does not count against the API rate limit. None if the API cannot
+    be reached or refuses the request.
+    """
+    slug = urlparse(repo_url).path.strip("/")
+    headers = {"Accept": "application/vnd.github.sha"}
+    if os.getenv("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.getenv('GITHUB_TOKEN')}"
+    if known is not None and known[1]:
+        headers["If-None-Match"] = known[1]
+    try:
+        response = get_session().get(f"{GITHUB_API_URL}/repos/{slug}/commits/{ref}", headers=headers, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Cannot resolve {slug}@{ref}: {e}")
+        return None
+    if response.status_code == 304 and known is not None:
+        return known
+    sha = response.text.strip()
+    if response.status_code != 200 or len(sha) != 40:
+        print(f"Cannot resolve {slug}@{ref}: HTTP {response.status_code}")
+        return None
+    return sha, response.headers.get("ETag")
 
-    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_ref:
-        zip_ref.extractall(dest_folder)
 
-    inner_folder = os.path.join(dest_folder, os.listdir(dest_folder)[0])
+def _download_into_cache(
+    url: str, cache: ArchiveCache, max_bytes: int, key: Optional[str] = None, if_none_match: Optional[str] = None
+) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Stream url into the cache and return (key, path, ETag), or None on a 304. Without
+    a key the archive is stored under its ETag, or its content digest if there is none."""
+    with cache.temp_file() as f:
+        temp_path = f.name
+        try:
+            headers = stream_download(url, f, max_bytes, if_none_match=if_none_match)
+        except BaseException:
+            f.close()
+            os.remove(temp_path)
+            raise
+    if headers is None:
+        os.remove(temp_path)
+        return None
 
-    # Move contents one level up
-    for item in os.listdir(inner_folder):
-        src = os.path.join(inner_folder, item)
-        dst = os.path.join(dest_folder, item)
+    etag = headers.get("ETag")
+    if key is None and etag:
+        key = f"etag:{url}:{etag}"
+    elif key is None:
+        digest = hashlib.sha256()
+        with open(temp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                digest.update(chunk)
+        key = f"sha256:{digest.hexdigest()}"
+    return key, cache.add(key, temp_path), etag
+
+
+def cached_github_repo_zip(repo_url: str, cache: ArchiveCache, ref: str = "main",
+                           max_bytes: int = MAX_ARCHIVE_BYTES) -> Tuple[str, str]:
+    """
+    (key, path) of the archive of ref, served from the cache when unchanged.
+    The ref is resolved to its commit SHA (conditionally, see resolve_commit) and the
+    immutable archive of that commit is downloaded only if it is not cached yet. If
+    the commit cannot be resolved, the branch archive is revalidated by ETag instead.
+    """
+    ref_url = f"{repo_url}@{ref}"
+    known = cache.get_ref(ref_url)
+    known_commit = (known["key"], known["api_etag"]) if known and known["api_etag"] else None
+    resolved = resolve_commit(repo_url, ref, known_commit)
+
+    if resolved is not None:
+        sha, api_etag = resolved
+        path = cache.get(sha)
+        if path is None:
+            print(f"Downloading {repo_url} at {sha}")
+            _, path, _ = _download_into_cache(f"{repo_url}/archive/{sha}.zip", cache, max_bytes, key=sha)
+        else:
+            print(f"Using cached archive of {repo_url} at {sha}")
+        cache.set_ref(ref_url, sha, api_etag=api_etag)
+        return sha, path
+
+    url = f"{repo_url}/archive/refs/heads/{ref}.zip"
+    cached_path = cache.get(known["key"]) if known and known["archive_etag"] else None
+    downloaded = _download_into_cache(
+        url, cache, max_bytes, if_none_match=known["archive_etag"] if cached_path else None
+    )
+    if downloaded is None:
+        print(f"Using cached archive of {repo_url} (not modified)")
+        return known["key"], cached_path
+    key, path, etag = downloaded
+    cache.set_ref(ref_url, key, archive_etag=etag)
+    return key, path
+
+
+def open_github_repo_zip(repo_url: str, dest_folder: str = "./repo", cache: Optional[ArchiveCache] = None) -> ZipSource:
+    """Download the archive (or take it from the cache) and expose its members as if
+    extracted to dest_folder. A cached archive stays pinned until cache is closed, so
+    keep the cache open while the source (and any worker reopening it) is in use."""
+    if cache is not None:
+        key, path = cached_github_repo_zip(repo_url, cache)
+        cache.pin(key)
+        return ZipSource(path, root_path=dest_folder)
+    return ZipSource(fetch_github_repo_zip(repo_url), root_path=dest_folder)
+
+
+def extract_source_files(source: ZipSource, analyzer: Optional[CodeComplexityAnalyzer] = None,
+                         workers: int = EXTRACT_WORKERS) -> int:
+    """Extract only the files Phase 1 would analyze (same skip, extension and .gitignore
+    rules) and return how many were written"""
+    analyzer = analyzer or CodeComplexityAnalyzer(workers=1)
+    paths = [filepath for filepath, _ in analyzer.collect_source_files(source.root_path, source)]
+    return source.extract(paths, workers)
+
+
+def download_github_repo_zip(repo_url: str, dest_folder: str = "./repo", cache: Optional[ArchiveCache] = None,
+                             source_only: bool = True):
+    """
+    Download the archive and extract it into dest_folder (without the archive's
+    top-level folder). With source_only, assets, docs, lockfiles and other members the
+    analyzer would skip are never written.
+    """
+    marker = os.path.join(dest_folder, ".docubuddy_archive")
+    if cache is not None:
+        key, archive = cached_github_repo_zip(repo_url, cache)
+        # Same archive as the one already extracted there: nothing to do
+        if os.path.exists(marker):
+            with open(marker) as f:
+                if f.read() == key:
+                    return dest_folder
+    else:
+        key, archive = None, fetch_github_repo_zip(repo_url)
+
+    if os.path.exists(dest_folder):
+        shutil.rmtree(dest_folder)
 
-        if os.path.isdir(src):
-            shutil.move(src, dst)
+    with ZipSource(archive, root_path=dest_folder) as source:
+        os.makedirs(dest_folder, exist_ok=True)
+        if source_only:
+            extract_source_files(source)
         else:
-            shutil.move(src, dst)
+            source.extract()
 
-    # Remove the now-empty inner folder
-    shutil.rmtree(inner_folder)
+    if key is not None:
+        with open(marker, "w") as f:
+            f.write(key)
 
     return dest_folder
 
@@ -0,0 +1,126 @@
+"""
+Compiled .gitignore-style matchers for the Phase 1 walker
+Each .gitignore (and the user's exclude globs) becomes one IgnoreRules object whose
+patterns are translated to regular expressions once. Without negations all patterns
+share a single alternation, so a path is tested with one regex call.
+"""
+
+import re
+from typing import List, Optional, Pattern, Tuple
+
+
+def _translate(pattern: str) -> str:
+    """Regex body for one gitignore glob (no anchors)"""
+    i = 0
+    out = []
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == length and (i == 0 or pattern[i - 1] == "/"):
+            out.append(".*")
+            i += 2
+        elif char == "*":
+            out.append("[^/]*")
+            i += 1
+        elif char == "?":
+            out.append("[^/]")
+            i += 1
+        elif char == "[":
+            start = i + 1
+            if pattern[start:start + 1] in ("!", "^"):
+                start += 1
+            close = pattern.find("]", start + 1)  # a leading "]" is part of the set
+            if close == -1:
+                out.append(re.escape(char))
+                i += 1
+                continue
+            body = pattern[i + 1:close]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = close + 1
+        elif char == "\\" and i + 1 < length:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
+
+
+def compile_pattern(line: str) -> Optional[Tuple[Pattern, bool, bool]]:
+    """(regex, negated, directories only) for one .gitignore line, None for blanks/comments"""
+    line = line.rstrip("\r\n")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated or line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+    anchored = "/" in line
+    body = _translate(line.lstrip("/"))
+    regex = "^" + body + "$" if anchored else "^(?:.*/)?" + body + "$"
+    return re.compile(regex), negated, dir_only
+
+
+class IgnoreRules:
+    """The patterns of one .gitignore, matched against paths relative to its directory"""
+
+    def __init__(self, base: str, lines: List[str]):
+        """
+        Args:
+            base: Directory of the .gitignore relative to the walk root ("" for the root)
+            lines: Pattern lines in file order
+        """
+        self.prefix = base.strip("/") + "/" if base.strip("/") else ""
+        self.rules = [rule for rule in map(compile_pattern, lines) if rule is not None]
+        self.has_negation = any(negated for _, negated, _ in self.rules)
+        if not self.has_negation:
+            # One alternation per target kind: files can only match file patterns
+            self._any = self._combine([regex for regex, _, _ in self.rules])
+            self._files = self._combine([regex for regex, _, dir_only in self.rules if not dir_only])
+
+    @staticmethod
+    def _combine(regexes: List[Pattern]) -> Optional[Pattern]:
+        if not regexes:
+            return None
+        return re.compile("|".join(f"(?:{regex.pattern})" for regex in regexes))
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no pattern matches.
+        rel_path is /-separated and relative to the walk root."""
+        if self.prefix:
+            if not rel_path.startswith(self.prefix):
+                return None
+            rel_path = rel_path[len(self.prefix):]
+
+        if not self.has_negation:
+            regex = self._any if is_dir else self._files
+            return True if regex is not None and regex.match(rel_path) else None
+
+        # Last matching pattern wins
+        for regex, negated, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and regex.match(rel_path):
+                return not negated
+        return None
+
+
+def is_ignored(rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    """Apply rule sets ordered from the root down: the deepest matching one decides"""
+    for rule_set in reversed(rules):
+        result = rule_set.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Incremental Phase 1 between two commits of a local git checkout
+Only files touched by `git diff base head` are read (straight from the object
+database, no checkout needed) and re-analyzed; every other file keeps its rows from
+the previous run's FunctionStore. The merged store yields the new top-K, so the cost
+of a push is proportional to the diff instead of the repository.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+if not __package__:
+    # Run as a script (python backend/analysis/incremental.py): make the analysis package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.artifacts import write_records
+from analysis.complexity_analyzer import (
+    CALL_GRAPH_PATH,
+    DEFAULT_CACHE_PATH,
+    RESULTS_PATH,
+    STORE_PATH,
+    CodeComplexityAnalyzer,
+    write_call_graph,
+)
+from analysis.disk_cache import DiskCache
+from analysis.ignore_rules import IgnoreRules
+from analysis.instrumentation import Profiler
+from analysis.result_store import FunctionStore
+
+
+class DiffSummary(NamedTuple):
+    """Paths (relative, /-separated) whose head contents must be analyzed or dropped"""
+
+    changed: List[str]  # added, modified or renamed/copied targets
+    removed: List[str]  # deleted paths and rename sources
+
+
+def git(repo_path: str, *args: str) -> bytes:
+    result = subprocess.run(["git", "-C", repo_path, *args], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.decode(errors='ignore').strip()}")
+    return result.stdout
+
+
+def diff_paths(repo_path: str, base: str, head: str) -> DiffSummary:
+    """Parse `git diff --name-status -z -M base head`"""
+    fields = git(repo_path, "diff", "--name-status", "-z", "-M", base, head).decode("utf-8", "surrogateescape").split("\0")
+    changed, removed = [], []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in "RC":
+            source, target = fields[i + 1], fields[i + 2]
+            if status == "R":
+                removed.append(source)
+            changed.append(target)
+            i += 3
+            continue
+        path = fields[i + 1]
+        if status == "D":
+            removed.append(path)
+        else:
+            changed.append(path)
+        i += 2
+    return DiffSummary(changed, removed)
+
+
+def read_blobs(repo_path: str, revision: str, paths: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """Yield (path, contents) for each path at revision through one `git cat-file --batch`;
+    paths that are not blobs at that revision (submodules, missing) are left out"""
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    try:
+        for path in paths:
+            process.stdin.write(f"{revision}:{path}\n".encode("utf-8", "surrogateescape"))
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) != 3:
+                continue  # "<object> missing"
+            size = int(header[2])
+            data = process.stdout.read(size)
+            process.stdout.read(1)  # trailing newline
+            if header[1] == b"blob":
+                yield path, data
+    finally:
+        process.stdin.close()
+        process.stdout.close()
+        process.wait()
+
+
+def read_gitignores(repo_path: str, revision: str, paths: List[str]) -> Dict[str, IgnoreRules]:
+    """Rules of the .gitignore files at revision in the root and every directory above
+    paths, keyed by directory ("" for the root)"""
+    directories = {""}
+    for path in paths:
+        parts = path.split("/")[:-1]
+        directories.update("/".join(parts[:depth]) for depth in range(1, len(parts) + 1))
+    gitignore_paths = sorted(f"{directory}/.gitignore" if directory else ".gitignore" for directory in directories)
+
+    rules = {}
+    for path, data in read_blobs(repo_path, revision, gitignore_paths):
+        directory = path.rpartition("/")[0]
+        rules[directory] = IgnoreRules(directory, data.decode("utf-8", "ignore").splitlines())
+    return rules
+
+
+class IncrementalAnalyzer:
+    def __init__(self, analyzer: CodeComplexityAnalyzer, repo_path: str):
+        """
+        Args:
+            analyzer: Configured Phase 1 analyzer (weights, reader caps, cache, top_k)
+            repo_path: Local git checkout holding both revisions
+        """
+        self.analyzer = analyzer
+        self.repo_path = repo_path
+        self.stats: Dict[str, int] = {}
+
+    def analyze_changes(self, previous: FunctionStore, base: str, head: str = "HEAD",
+                        profiler: Optional[Profiler] = None) -> FunctionStore:
+        """Return a new store equal to previous with every file touched between base and
+        head re-analyzed at head. Files keep their position in the previous walk order;
+        files new to the store are appended."""
+        profiler = profiler or Profiler()
+        with profiler.stage("diff"):
+            diff = diff_paths(self.repo_path, base, head)
+
+        # Filter like the full walk: skip lists, exclude globs and .gitignore at head
+        gitignores = read_gitignores(self.repo_path, head, diff.changed) if self.analyzer.use_gitignore else {}
+        languages = {}
+        for path in diff.changed:
+            language = self.analyzer.language_for_path(path, gitignores.get)
+            if language is not None:
+                languages[path] = language
+        dropped: Set[str] = set(diff.changed) | set(diff.removed)
+
+        records = {}
+        new_entries = []
+        self.stats = {"files_changed": len(diff.changed), "files_removed": len(diff.removed),
+                      "files_analyzed": 0, "files_skipped": 0, "cache_hits": 0}
+        with profiler.stage("analyze"):
+            for path, data in read_blobs(self.repo_path, head, list(languages)):
+                analysis = self.analyzer.analyze_buffer(data, path, languages[path])
+                if analysis.skip_reason is not None:
+                    print(f"Skipping file ({analysis.skip_reason}): {path}")
+                    self.stats["files_skipped"] += 1
+                    continue
+                self.stats["files_analyzed"] += 1
+                if analysis.cache_hit:
+                    self.stats["cache_hits"] += 1
+                elif analysis.cache_key is not None:
+                    new_entries.append((analysis.cache_key, analysis.cache_value()))
+                records[path] = list(zip(analysis.records, analysis.calls))
+
+        if self.analyzer.cache is not None and new_entries:
+            self.analyzer.cache.put_many(new_entries)
+
+        with profiler.stage("merge"):
+            # Same root as the previous run, so file URLs match a full run
+            merged = FunctionStore(previous.root_path, previous.github_repo_url)
+            for index in range(len(previous)):
+                path = previous.rel_path(index)
+                if path not in dropped:
+                    merged.add(path, previous.language(index), previous.record(index), previous.calls(index))
+                elif path in records:
+                    # First row of a changed file: put its new rows in the same place
+                    for record, calls in records.pop(path):
+                        merged.add(path, languages[path], record, calls)
+            for path, file_records in records.items():
+                for record, calls in file_records:
+                    merged.add(path, languages[path], record, calls)
+        return merged
+
+
+def main(
+    repo_path: str,
+    base: str,
+    head: str = "HEAD",
+    store_path: str = STORE_PATH,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    top_k: int = 100,
+    profiler: Optional[Profiler] = None,
+):
+    """Re-analyze the base..head diff on top of the stored previous run and write the new
+    top-K results (with their source at head), store and call graph."""
+    cache = DiskCache(cache_path) if cache_path else None
+    analyzer = CodeComplexityAnalyzer(workers=1, cache=cache, top_k=top_k)
+    incremental = IncrementalAnalyzer(analyzer, repo_path)
+
+    previous = FunctionStore.read(store_path)
+    store = incremental.analyze_changes(previous, base, head, profiler=profiler)
+    top_indices = store.top_indices(top_k)
+    top_complex_functions = list(store.iter_dicts(top_indices))
+    blobs = dict(read_blobs(repo_path, head, sorted({store.rel_path(index) for index in top_indices})))
+    contents = analyzer.function_contents(
+        [(store.rel_path(index), store.language(index), store.record(index)) for index in top_indices],
+        read=blobs.__getitem__,
+    )
+    for result, content in zip(top_complex_functions, contents):
+        result["function_content"] = content
+
+    stats = incremental.stats
+    print(
+        "\n📌 Incremental Analysis Summary:\n"
+        f"   🔀 Files changed/removed: {stats['files_changed']}/{stats['files_removed']}\n"
+        f"   📂 Files re-analyzed: {stats['files_analyzed']} (skipped {stats['files_skipped']}, cached {stats['cache_hits']})\n"
+        f"   🗃️ Functions stored: {len(store)}\n"
+    )
+    write_records(RESULTS_PATH, top_complex_functions)
+    store.write(store_path)
+    write_call_graph(store, CALL_GRAPH_PATH)
+    if cache is not None:
+        cache.close()
+    return top_complex_functions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("repo_path", help="Local git checkout")
+    parser.add_argument("base", help="Revision the stored results were computed for")
+    parser.add_argument("head", nargs="?", default="HEAD")
+    parser.add_argument("--store", default=STORE_PATH, help="FunctionStore of the base run (rewritten for head)")
+    parser.add_argument("--top-k", type=int, default=100)
+    args = parser.parse_args()
+    main(os.path.abspath(args.repo_path), args.base, args.head, args.store, top_k=args.top_k)
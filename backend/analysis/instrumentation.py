@@ -0,0 +1,93 @@
+"""
+Lightweight pipeline instrumentation
+A Profiler records nested stage timings and named counters for one analysis request.
+as_dict() gives the per-stage breakdown returned by the API, write_chrome_trace() dumps
+every stage as a Chrome trace (chrome://tracing, Perfetto) for offline inspection.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Open stages of the current thread or asyncio task (tasks overlap on one thread), per
+# profiler id. Replaced, never mutated, so every context keeps its own stacks.
+_open_stages: contextvars.ContextVar[Dict[int, Tuple[str, ...]]] = contextvars.ContextVar(
+    "profiler_open_stages", default={}
+)
+
+
+class Profiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counters: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []  # finished stages in completion order
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **args) -> Iterator[None]:
+        """Time the enclosed block. Nested stages are reported as "outer.inner"."""
+        stacks = _open_stages.get()
+        stack = stacks.get(id(self), ()) + (name,)
+        token = _open_stages.set({**stacks, id(self): stack})
+        path = ".".join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            _open_stages.reset(token)
+            with self._lock:
+                self.events.append({
+                    "name": path,
+                    "start": start - self.started,
+                    "duration": duration,
+                    "thread": threading.get_ident(),
+                    "args": args,
+                })
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Total seconds per stage (summed over repeats) plus all counters"""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for event in self.events:
+            entry = stages.setdefault(event["name"], {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += event["duration"]
+            entry["calls"] += 1
+        for entry in stages.values():
+            entry["seconds"] = round(entry["seconds"], 4)
+
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+    def write_chrome_trace(self, path: str):
+        """Write the stages as complete ("X") events in the Chrome trace event format"""
+        pid = os.getpid()
+        trace = [
+            {
+                "name": event["name"].rsplit(".", 1)[-1],
+                "cat": event["name"],
+                "ph": "X",
+                "ts": round(event["start"] * 1e6, 1),
+                "dur": round(event["duration"] * 1e6, 1),
+                "pid": pid,
+                "tid": event["thread"],
+                "args": event["args"],
+            }
+            for event in self.events
+        ]
+        trace.append({
+            "name": "counters", "ph": "C", "ts": round((time.perf_counter() - self.started) * 1e6, 1),
+            "pid": pid, "args": dict(self.counters),
+        })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
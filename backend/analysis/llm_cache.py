@@ -0,0 +1,72 @@
+"""
+Persistent cache of LLM analysis responses
+Responses are keyed by a hash of everything that determines them (model, system
+message, prompt, temperature, max_tokens), so the same function context is only paid
+for once across runs and forks of a repository. Entries expire after ttl_seconds and
+the least recently used are evicted once the cache exceeds max_bytes (see DiskCache).
+Only successfully parsed responses are stored, never the fallback.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from analysis.disk_cache import DiskCache
+
+DEFAULT_LLM_CACHE_PATH = "./.docubuddy_cache/llm.sqlite3"
+
+
+class LLMResponseCache:
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH, ttl_seconds: float = 30 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite file holding the cache
+            ttl_seconds: Age after which a stored response is no longer served
+            max_bytes: Upper bound for the summed size of all stored responses
+        """
+        self.store = DiskCache(path, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "saved_prompt_tokens": 0, "saved_completion_tokens": 0}
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Hash of the chat completion arguments that determine the response"""
+        identity = {
+            "model": request["model"],
+            "messages": request["messages"],
+            "temperature": request.get("temperature"),
+            "max_tokens": request.get("max_tokens"),
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The stored response for request, or None if missing or expired"""
+        value = self.store.get(self.key(request))
+        entry = json.loads(value) if value is not None else None
+        if entry is None or time.time() - entry["created"] > self.ttl_seconds:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.stats["saved_prompt_tokens"] += entry["prompt_tokens"]
+        self.stats["saved_completion_tokens"] += entry["completion_tokens"]
+        return entry["response"]
+
+    def put(self, request: Dict[str, Any], response: Dict[str, Any], prompt_tokens: int = 0,
+            completion_tokens: int = 0):
+        """Store a parsed response with the tokens it cost (reported as saved on hits)"""
+        entry = {
+            "created": time.time(),
+            "response": response,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        }
+        self.store.put(self.key(request), json.dumps(entry).encode("utf-8"))
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def close(self):
+        self.store.close()
@@ -4,14 +4,40 @@ Phase 2: LLM-Based Code Complexity Analysis
 Uses OpenAI API to provide semantic complexity analysis of the top complex functions
 """
 
+import asyncio
 import json
 import os
 import re
+import sys
 from dataclasses import dataclass
-from typing import Any, Dict, List
-
-from analysis.llm_prompt import create_analysis_prompt
-from openai import OpenAI
+from typing import Any, Dict, List, Optional, Tuple
+
+if not __package__:
+    # Run as a script (python backend/analysis/llm_complexity_analyzer.py): make the analysis package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.archive_source import ZipSource
+from analysis.artifacts import read_records, write_records
+from analysis.call_graph import CallGraph
+from analysis.instrumentation import Profiler
+from analysis.llm_cache import DEFAULT_LLM_CACHE_PATH, LLMResponseCache
+from analysis.llm_prompt import create_analysis_prompt, create_batch_analysis_prompt
+from analysis.python_frontend import split_source_lines
+from analysis.rate_limit import RateLimiter
+from analysis.result_store import FunctionStore
+from analysis.scoring import PercentileNormalizer
+from analysis.symbol_index import SymbolIndex
+from analysis.token_budget import ContextBudgeter, TokenCounter, context_window, max_output_tokens
+from openai import AsyncOpenAI, OpenAI
+
+SYSTEM_MESSAGE = "You are an expert code complexity analyzer. Always respond with valid JSON in the exact format requested. Do not include any text before or after the JSON."
+# Every item of a batch answer must carry these ratings to be accepted
+RATING_FIELDS = ("semantic_complexity", "cognitive_load", "maintainability", "documentation_quality", "refactoring_urgency")
+# Call-like names that are not calls of repository functions (compared lowercased)
+CALL_KEYWORDS = frozenset({
+    "if", "for", "while", "switch", "try", "catch", "return", "new", "class", "function",
+    "var", "let", "const", "def", "print", "console", "log", "tostring", "length", "size",
+})
 
 
 @dataclass
@@ -35,17 +61,71 @@ class LLMComplexityMetrics:
 
 
 class LLMComplexityAnalyzer:
-    def __init__(self, api_key: str, model: str):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        profiler: Optional[Profiler] = None,
+        base_url: Optional[str] = None,
+        concurrency: int = 1,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        cache: Optional[LLMResponseCache] = None,
+        batch_token_budget: Optional[int] = None,
+        batch_size: int = 8,
+        max_prompt_tokens: Optional[int] = None,
+    ):
         """
         Initialize the LLM analyzer
 
         Args:
             api_key: OpenAI API key
             model: Model to use (gpt-4, gpt-4-turbo, gpt-3.5-turbo)
+            profiler: Records API call timings, call counts and token usage
+            base_url: OpenAI-compatible endpoint (None: OPENAI_BASE_URL or the OpenAI API)
+            concurrency: Requests in flight at once; above 1 functions are analyzed
+                concurrently with an async client (results keep the serial order)
+            requests_per_minute: Request budget of the concurrent mode (None: unlimited)
+            tokens_per_minute: Token budget of the concurrent mode (None: unlimited)
+            cache: Persistent response cache consulted before every API call
+            batch_token_budget: Pack several functions into one request whose prompt stays
+                within this many tokens (None: one request per function)
+            batch_size: Most functions per batched request, capped so that their answers
+                (max_tokens_per_answer each) fit the model's completion limit
+            max_prompt_tokens: Token budget of a single-function prompt; larger contexts are
+                compacted and cut down (None: the model's context window minus max_tokens)
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model = model
+        self.profiler = profiler or Profiler()
+        self.concurrency = max(1, concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.cache = cache
+        self.batch_token_budget = batch_token_budget
+        self.max_tokens_per_answer = 1000  # Completion tokens per function of a batch
+        self.batch_size = max(1, min(batch_size, max_output_tokens(model) // self.max_tokens_per_answer))
+        # Maps a structural score onto 1-10; set by analyze_top_functions
+        self.structural_normalizer: Optional[PercentileNormalizer] = None
+        # Definitions related functions are looked up in; set by analyze_top_functions
+        self.symbol_index: Optional[SymbolIndex] = None
+        # Phase 1 call graph over the store's rows (preferred over the symbol index) and
+        # where the store's sources are read from; set by analyze_top_functions
+        self.store: Optional[FunctionStore] = None
+        self.call_graph: Optional[CallGraph] = None
+        self.source: Optional[ZipSource] = None
+        self._store_rows: Dict[Tuple[str, int], int] = {}
+        self._source_lines: Dict[str, Optional[List[str]]] = {}
         self.max_tokens_per_request = 4000  # Adjust based on your model
+        self.temperature = 0.1  # Low temperature for consistent analysis
+        self.token_counter = TokenCounter(model)
+        self.budgeter = ContextBudgeter(
+            self.token_counter,
+            max_prompt_tokens or context_window(model) - self.max_tokens_per_request,
+            overhead=self.token_counter.count_messages(SYSTEM_MESSAGE, create_analysis_prompt("")),
+        )
 
         # Language-specific patterns for dependency extraction
         self.dependency_patterns = {
@@ -83,35 +163,19 @@ class LLMComplexityAnalyzer:
         matches = re.findall(pattern, code)
 
         # Filter out common keywords and built-ins
-        keywords = {
-            "if",
-            "for",
-            "while",
-            "switch",
-            "try",
-            "catch",
-            "return",
-            "new",
-            "class",
-            "function",
-            "var",
-            "let",
-            "const",
-            "def",
-            "print",
-            "console",
-            "log",
-            "toString",
-            "length",
-            "size",
-        }
-
-        return [match for match in set(matches) if match.lower() not in keywords]
+        return [match for match in set(matches) if match.lower() not in CALL_KEYWORDS]
 
     def find_related_functions(
         self, target_function: Dict[str, Any], all_functions: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Find functions that are called by the target function"""
+        """Find functions that are called by the target function: its callees in the
+        Phase 1 call graph if loaded, otherwise names it calls looked up in
+        self.symbol_index (an index of all_functions is built if there is none)"""
+        if self.call_graph is not None:
+            row = self._store_rows.get((self.get_file_path(target_function), target_function["start_line"]))
+            if row is not None:
+                return [self.store_function(callee) for callee in self.call_graph.callees(row)[:5]]
+
         if not target_function.get("function_content"):
             return []
 
@@ -120,27 +184,62 @@ class LLMComplexityAnalyzer:
             target_function["function_content"], target_function["language"]
         )
 
-        # Get file paths
-        target_file_path = self.get_file_path(target_function)
+        if self.symbol_index is None:
+            self.symbol_index = SymbolIndex.build(all_functions, self.get_file_path)
 
-        # Find matching functions in the codebase
-        related = []
-        for func in all_functions:
-            if func["function_name"] in called_functions:
-                func_file_path = self.get_file_path(func)
-                # Limit to same file or same package for relevance
-                if func_file_path == target_file_path or os.path.dirname(
-                    func_file_path
-                ) == os.path.dirname(target_file_path):
-                    related.append(func)
+        # Definitions in the same package (directory) for relevance, top 5 most relevant
+        return self.symbol_index.lookup(called_functions, self.get_file_path(target_function), limit=5)
 
-        # Limit to top 5 most relevant dependencies
-        return related[:5]
+    def store_function(self, row: int) -> Dict[str, Any]:
+        """A store row as a result dict with its source read from self.source (the
+        Phase 1 archive) or the checkout under the store's root path"""
+        func = self.store.to_dict(row)
+        path = self.get_file_path(func)
+        if path not in self._source_lines:
+            try:
+                if self.source is not None:
+                    content = self.source.read_text(path)
+                else:
+                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                        content = f.read()
+                # Same line numbering as the Phase 1 front ends
+                lines = split_source_lines(content) if func["language"] == "python" else content.splitlines()
+            except Exception as e:
+                print(f"Cannot read {path}: {e}")
+                lines = None
+            self._source_lines[path] = lines
+        lines = self._source_lines[path]
+        if lines is not None:
+            func["function_content"] = "\n".join(lines[func["start_line"] - 1:func["end_line"]])
+        return func
+
+    def load_call_graph(self, graph_file: str, functions: List[Dict[str, Any]]):
+        """Use the Phase 1 call graph of self.store to find the related functions of
+        functions (their rows are located once)"""
+        graph = CallGraph.read(graph_file)
+        if len(graph) != len(self.store):
+            print(f"Ignoring {graph_file}: it does not match the function store")
+            return
+        self.call_graph = graph
+        wanted = {(self.get_file_path(func), func["start_line"]) for func in functions}
+        paths = {self.get_file_path(func) for func in functions}
+        path_ids = {}
+        for path_id, rel_path in enumerate(self.store.paths.values):
+            file_path = os.path.join(self.store.root_path, rel_path).replace("/", os.sep)
+            if file_path in paths:
+                path_ids[path_id] = file_path
+        self._store_rows = {}
+        for row, (path_id, start_line) in enumerate(zip(self.store.path_ids, self.store.start_lines)):
+            file_path = path_ids.get(path_id)
+            if file_path is not None and (file_path, start_line) in wanted:
+                self._store_rows[(file_path, start_line)] = row
+        print(f"Loaded call graph: {graph.edge_count} edges between {len(graph)} functions")
 
     def build_analysis_context(
         self, target_function: Dict[str, Any], related_functions: List[Dict[str, Any]]
-    ) -> str:
-        """Build comprehensive context for LLM analysis"""
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build comprehensive context for LLM analysis, shrunk to the prompt token
+        budget. Returns the context and the budget report (see ContextBudgeter.fit)."""
 
         context_parts = []
 
@@ -160,61 +259,215 @@ class LLMComplexityAnalyzer:
             f"\nStructural Complexity Score: {target_function['rule_analysis']['rule_score']:.2f}"
         )
 
-        # Add function code if available
-        if target_function.get("function_content"):
-            context_parts.append("\n=== FUNCTION CODE ===")
-            context_parts.append(target_function["function_content"])
-        else:
-            context_parts.append("\n=== FUNCTION CODE ===")
-            context_parts.append(
-                "(Function content not available - analyzing based on metrics only)"
-            )
+        def render(target_code: Optional[str], related_code: List[Optional[str]]) -> str:
+            parts = list(context_parts)
 
-        # Add related functions for context
-        if related_functions:
-            context_parts.append("\n=== RELATED FUNCTIONS (Dependencies) ===")
-            for i, func in enumerate(related_functions, 1):
-                context_parts.append(
-                    f"\n--- Related Function {i}: {func['function_name']} ---"
+            # Add function code if available
+            parts.append("\n=== FUNCTION CODE ===")
+            if target_code:
+                parts.append(target_code)
+            else:
+                parts.append(
+                    "(Function content not available - analyzing based on metrics only)"
                 )
-                if func.get("function_content"):
-                    context_parts.append(func["function_content"])
-                else:
-                    context_parts.append("(Content not available)")
 
-        return "\n".join(context_parts)
+            # Add related functions for context
+            if related_functions:
+                parts.append("\n=== RELATED FUNCTIONS (Dependencies) ===")
+                for i, (func, code) in enumerate(zip(related_functions, related_code), 1):
+                    parts.append(f"\n--- Related Function {i}: {func['function_name']} ---")
+                    if code:
+                        parts.append(code)
+                    elif func.get("function_content"):
+                        parts.append("(Content omitted to fit the token budget)")
+                    else:
+                        parts.append("(Content not available)")
+
+            return "\n".join(parts)
+
+        return self.budgeter.fit(
+            render,
+            target_function.get("function_content"),
+            [func.get("function_content") for func in related_functions],
+            target_function["language"],
+        )
+
+    def create_request(self, prompt: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Chat completion arguments for one analysis prompt (max_tokens defaults to
+        max_tokens_per_request)"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens or self.max_tokens_per_request,
+            "temperature": self.temperature,
+        }
 
     def call_openai_api(self, prompt: str) -> Dict[str, Any]:
-        """Make API call to OpenAI"""
+        """Make API call to OpenAI (answered from the response cache when possible)"""
+        request = self.create_request(prompt)
+        cached = self._cached_response(request)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert code complexity analyzer. Always respond with valid JSON in the exact format requested. Do not include any text before or after the JSON.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=self.max_tokens_per_request,
-                temperature=0.1,  # Low temperature for consistent analysis
-            )
+            with self.profiler.stage("llm_call"):
+                response = self.client.chat.completions.create(**request)
+            return self._parse_response(request, response)
+
+        except Exception as e:
+            print(f"API call error: {e}")
+            self.profiler.count("llm_fallbacks")
+            return self._create_fallback_response()
 
-            content = response.choices[0].message.content.strip()
+    async def call_openai_api_async(
+        self, client: AsyncOpenAI, limiter: RateLimiter, prompt: str, check_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Make API call to OpenAI with the async client, within the rate limits"""
+        request = self.create_request(prompt)
+        cached = self._cached_response(request) if check_cache else None
+        if cached is not None:
+            return cached
+        # Reserve the worst case (prompt plus a full completion), refund the rest later
+        reserved = self.token_counter.count_messages(SYSTEM_MESSAGE, prompt) + self.max_tokens_per_request
+        try:
+            await limiter.acquire(reserved)
+            with self.profiler.stage("llm_call"):
+                response = await client.chat.completions.create(**request)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                limiter.refund(reserved - (usage.total_tokens or 0))
+            return self._parse_response(request, response)
+
+        except Exception as e:
+            print(f"API call error: {e}")
+            self.profiler.count("llm_fallbacks")
+            return self._create_fallback_response()
 
-            # Extract JSON from response if it contains extra text
-            content = self._extract_json_from_response(content)
+    async def call_openai_batch_async(
+        self, client: AsyncOpenAI, limiter: RateLimiter, batch: List[Tuple[int, str, str]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze a batch of (index, context, single prompt) items in one request and return
+        the well-formed answers by index. Each answer is cached under its function's
+        single-function request, so later runs hit the cache in either mode.
+        """
+        ids = {f"F{index + 1}": index for index, _, _ in batch}
+        prompt = create_batch_analysis_prompt([(f"F{index + 1}", context) for index, context, _ in batch])
+        # Every answer gets its own share of the completion, so none is cut off
+        request = self.create_request(prompt, self.max_tokens_per_answer * len(batch))
+        reserved = self.token_counter.count_messages(SYSTEM_MESSAGE, prompt) + request["max_tokens"]
+        try:
+            await limiter.acquire(reserved)
+            with self.profiler.stage("llm_batch_call", functions=len(batch)):
+                response = await client.chat.completions.create(**request)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                limiter.refund(reserved - (usage.total_tokens or 0))
+            self.record_usage(response)
+            self.profiler.count("llm_batches")
+            self.profiler.count("llm_batch_functions", len(batch))
+            answers = self._parse_batch_items(response.choices[0].message.content or "", ids)
 
-            return json.loads(content)
+        except Exception as e:
+            print(f"Batch API call error: {e}")
+            return {}
+
+        if self.cache is not None and answers:
+            # Attribute the batch's tokens evenly to its answers
+            prompt_tokens = (usage.prompt_tokens or 0) // len(batch) if usage is not None else 0
+            completion_tokens = (usage.completion_tokens or 0) // len(batch) if usage is not None else 0
+            for index, _, single_prompt in batch:
+                if index in answers:
+                    self.cache.put(self.create_request(single_prompt), answers[index], prompt_tokens, completion_tokens)
+        return answers
+
+    def _parse_batch_items(self, content: str, ids: Dict[str, int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Answers of a batch response by index. Objects are decoded one at a time, so a
+        malformed or truncated item (or extra text around the array) does not lose the
+        others; items with an unknown function_id or missing ratings are dropped.
+        """
+        decoder = json.JSONDecoder()
+        answers = {}
+        pos = content.find("{")
+        while pos != -1:
+            try:
+                item, end = decoder.raw_decode(content, pos)
+            except json.JSONDecodeError:
+                item, end = None, pos + 1
+            if (
+                isinstance(item, dict)
+                and ids.get(item.get("function_id")) is not None
+                and all(isinstance(item.get(field), (int, float)) for field in RATING_FIELDS)
+            ):
+                answers.setdefault(ids[item.pop("function_id")], item)
+                pos = content.find("{", end)
+            else:
+                # Not an answer (or a wrapper around the answers): look inside it
+                pos = content.find("{", pos + 1)
+        return answers
+
+    def pack_batches(self, items: List[Tuple[int, str, str]]) -> List[List[Tuple[int, str, str]]]:
+        """Group (index, context, prompt) items, in order, into batches of at most
+        batch_size functions whose combined prompt fits batch_token_budget. An item too
+        large to share a request ends up alone and is sent as a single-function prompt."""
+        overhead = self.token_counter.count_messages(SYSTEM_MESSAGE, create_batch_analysis_prompt([]))
+        batches, current, used = [], [], overhead
+        for item in items:
+            tokens = self.token_counter.count(item[1]) + 10  # context plus its FUNCTION ID header
+            if current and (used + tokens > self.batch_token_budget or len(current) >= self.batch_size):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(item)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _cached_response(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        response = self.cache.get(request)
+        self.profiler.count("llm_cache_hits" if response is not None else "llm_cache_misses")
+        return response
+
+    def _parse_response(self, request: Dict[str, Any], response) -> Dict[str, Any]:
+        """Decode the JSON answer of a chat completion (fallback response if invalid).
+        Valid answers are stored in the response cache."""
+        self.record_usage(response)
+
+        content = response.choices[0].message.content.strip()
+
+        # Extract JSON from response if it contains extra text
+        content = self._extract_json_from_response(content)
 
+        try:
+            parsed = json.loads(content)
         except json.JSONDecodeError as e:
             print(f"JSON decode error: {e}")
             print(f"Response content: {content}")
+            self.profiler.count("llm_fallbacks")
             return self._create_fallback_response()
 
-        except Exception as e:
-            print(f"API call error: {e}")
-            return self._create_fallback_response()
+        if self.cache is not None and isinstance(parsed, dict):
+            usage = getattr(response, "usage", None)
+            self.cache.put(
+                request,
+                parsed,
+                prompt_tokens=(usage.prompt_tokens or 0) if usage is not None else 0,
+                completion_tokens=(usage.completion_tokens or 0) if usage is not None else 0,
+            )
+        return parsed
+
+    def record_usage(self, response):
+        """Count the API call and the tokens it reported"""
+        self.profiler.count("llm_calls")
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.profiler.count("llm_prompt_tokens", usage.prompt_tokens or 0)
+            self.profiler.count("llm_completion_tokens", usage.completion_tokens or 0)
 
     def _extract_json_from_response(self, content: str) -> str:
         """Extract JSON from response that might contain extra text"""
@@ -258,29 +511,84 @@ class LLMComplexityAnalyzer:
             + llm_metrics.refactoring_urgency * 2.0
         ) / 11.0  # Normalize to 1-10 scale
 
-        # Normalize structural score to 1-10 scale
-        # Assuming structural scores can be quite high, we need to map them appropriately
-        # You may need to adjust this based on your typical structural score ranges
-        normalized_structural = min(structural_score / 10.0, 10.0)
-
-        # Alternative normalization if structural scores are typically much higher:
-        # normalized_structural = min(structural_score / 50.0 * 10.0, 10.0)
+        # Normalize structural score to 1-10 scale: its percentile among the repository's
+        # functions when known, otherwise a fixed mapping of typical score ranges
+        if self.structural_normalizer is not None:
+            normalized_structural = self.structural_normalizer(structural_score)
+        else:
+            normalized_structural = min(structural_score / 10.0, 10.0)
 
         # Combine scores (60% LLM, 40% structural)
         final_score = (llm_metrics.llm_score * 0.6) + (normalized_structural * 0.4)
 
         return final_score
 
+    def build_context(
+        self, target_function: Dict[str, Any], all_functions: List[Dict[str, Any]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Analysis context for one function, with its related functions, and its budget report"""
+        related_functions = self.find_related_functions(target_function, all_functions)
+        context, report = self.build_analysis_context(target_function, related_functions)
+        self.report_prompt(target_function, report)
+        return context, report
+
+    def build_prompt(
+        self, target_function: Dict[str, Any], all_functions: List[Dict[str, Any]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Analysis prompt for one function, with its related functions as context"""
+        context, report = self.build_context(target_function, all_functions)
+        return create_analysis_prompt(context), report
+
+    def report_prompt(self, target_function: Dict[str, Any], report: Dict[str, Any]):
+        """Print and count the prompt tokens of a function and how its context was shrunk"""
+        self.profiler.count("llm_context_tokens", report["prompt_tokens"])
+        changes = []
+        if report["compacted"]:
+            changes.append("compacted")
+            self.profiler.count("llm_contexts_compacted")
+        for step in ("summarized", "omitted"):
+            if report[step]:
+                changes.append(f"{report[step]} related {step}")
+                self.profiler.count(f"llm_related_{step}", report[step])
+        if report["truncated"]:
+            changes.append("target truncated")
+            self.profiler.count("llm_targets_truncated")
+        suffix = f" ({', '.join(changes)})" if changes else ""
+        print(f"Prompt tokens for {target_function['function_name']}: "
+              f"{report['prompt_tokens']}/{report['budget']}{suffix}")
+
     def analyze_function(
         self, target_function: Dict[str, Any], all_functions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze a single function with LLM"""
 
         print(f"Analyzing function: {target_function['function_name']}")
-        related_functions = self.find_related_functions(target_function, all_functions)
-        context = self.build_analysis_context(target_function, related_functions)
-        prompt = create_analysis_prompt(context)
+        prompt, report = self.build_prompt(target_function, all_functions)
         llm_response = self.call_openai_api(prompt)
+        return self.apply_llm_response(target_function, llm_response, report)
+
+    async def analyze_function_async(
+        self,
+        target_function: Dict[str, Any],
+        all_functions: List[Dict[str, Any]],
+        client: AsyncOpenAI,
+        limiter: RateLimiter,
+    ) -> Dict[str, Any]:
+        """Analyze a single function with LLM, concurrently with others"""
+
+        print(f"Analyzing function: {target_function['function_name']}")
+        prompt, report = self.build_prompt(target_function, all_functions)
+        llm_response = await self.call_openai_api_async(client, limiter, prompt)
+        return self.apply_llm_response(target_function, llm_response, report)
+
+    def apply_llm_response(
+        self,
+        target_function: Dict[str, Any],
+        llm_response: Dict[str, Any],
+        prompt_report: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Combine the LLM ratings with the structural score into the enhanced record
+        (with the prompt's token count from its budget report, if given)"""
         llm_metrics = LLMComplexityMetrics(
             semantic_complexity=llm_response.get("semantic_complexity", 5),
             cognitive_load=llm_response.get("cognitive_load", 5),
@@ -315,33 +623,76 @@ class LLMComplexityAnalyzer:
                 "combined_complexity_score": final_score,
             }
         )
+        if prompt_report is not None:
+            enhanced_function["llm_analysis"]["prompt_tokens"] = prompt_report["prompt_tokens"]
 
         return enhanced_function
 
     def analyze_top_functions(
-        self, complex_functions_file: str, top_n: int = 20
+        self,
+        complex_functions_file: str,
+        top_n: int = 20,
+        store_file: Optional[str] = None,
+        graph_file: Optional[str] = None,
+        source: Optional[ZipSource] = None,
     ) -> List[Dict[str, Any]]:
-        """Analyze top N most complex functions with LLM"""
-
-        # Load Phase 1 results
-        with open(complex_functions_file, "r") as f:
-            all_functions = json.load(f)
+        """
+        Analyze top N most complex functions with LLM
+
+        Structural scores are normalized by percentile among every function in the Phase 1
+        store (store_file) when it exists, otherwise among the functions in the results file.
+        Related functions are the callees in the Phase 1 call graph (graph_file) when it
+        exists next to the store, their code read from source (the archive Phase 1 read)
+        or the checkout; otherwise called names are looked up among the whole store,
+        results file first.
+        """
 
-        top_functions = all_functions[:top_n]
+        store = FunctionStore.read(store_file) if store_file and os.path.exists(store_file) else None
+
+        # Stream the Phase 1 results: only the top_n analyzed functions are kept, later
+        # ones are referenced by their store row. Without a store the results file is
+        # the only copy of them, so they are kept for the related-function index.
+        top_functions: List[Dict[str, Any]] = []
+        later_keys: List[Tuple[str, int]] = []
+        later_functions: List[Dict[str, Any]] = []
+        reference_scores = store.scores if store is not None else []
+        for func in read_records(complex_functions_file):
+            if len(top_functions) < top_n:
+                top_functions.append(func)
+            elif store is not None:
+                later_keys.append((self.get_file_path(func), func["start_line"]))
+            else:
+                later_functions.append(func)
+            if store is None:
+                reference_scores.append(func["rule_analysis"]["rule_score"])
+        self.structural_normalizer = PercentileNormalizer(reference_scores)
+        all_functions = top_functions + later_functions
+        self.store, self.source, self.call_graph, self.symbol_index = store, source, None, None
+        self._source_lines = {}
+        if store is not None and graph_file and os.path.exists(graph_file):
+            self.load_call_graph(graph_file, top_functions)
+        if self.call_graph is None or len(self._store_rows) < len(top_functions):
+            # Store rows found by lookups carry their code, like the results-file functions
+            self.symbol_index = SymbolIndex.build(
+                all_functions, self.get_file_path, store, self.store_function, later_keys
+            )
+            print(f"Indexed {len(self.symbol_index)} function definitions")
 
         print(f"Starting LLM analysis of top {len(top_functions)} functions...")
-        enhanced_results = []
-        for i, func in enumerate(top_functions, 1):
-            print(f"Progress: {i}/{len(top_functions)}")
+        if self.batch_token_budget:
+            enhanced_results = asyncio.run(self._analyze_batched(top_functions, all_functions))
+        elif self.concurrency > 1:
+            enhanced_results = asyncio.run(self._analyze_concurrently(top_functions, all_functions))
+        else:
+            enhanced_results = []
+            for i, func in enumerate(top_functions, 1):
+                print(f"Progress: {i}/{len(top_functions)}")
 
-            try:
-                enhanced_func = self.analyze_function(func, all_functions)
-                enhanced_results.append(enhanced_func)
-            except Exception as e:
-                print(f"Error analyzing {func['function_name']}: {e}")
-                # Add original function with error marker
-                func["llm_analysis"] = {"error": str(e)}
-                enhanced_results.append(func)
+                try:
+                    enhanced_func = self.analyze_function(func, all_functions)
+                    enhanced_results.append(enhanced_func)
+                except Exception as e:
+                    enhanced_results.append(self._mark_error(func, e))
 
         # Re-sort by combined score
         enhanced_results.sort(
@@ -350,9 +701,93 @@ class LLMComplexityAnalyzer:
 
         return enhanced_results
 
+    async def _analyze_concurrently(
+        self, top_functions: List[Dict[str, Any]], all_functions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Analyze top_functions with up to self.concurrency requests in flight; results
+        are returned in the order of top_functions"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+        done = 0
+
+        async def analyze(func: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal done
+            async with semaphore:
+                try:
+                    return await self.analyze_function_async(func, all_functions, client, limiter)
+                except Exception as e:
+                    return self._mark_error(func, e)
+                finally:
+                    done += 1
+                    print(f"Progress: {done}/{len(top_functions)}")
+
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url) as client:
+            return await asyncio.gather(*(analyze(func) for func in top_functions))
+
+    async def _analyze_batched(
+        self, top_functions: List[Dict[str, Any]], all_functions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Analyze the uncached top_functions in packed multi-function requests (up to
+        self.concurrency in flight). Functions a batch answer lacks or garbles are
+        re-issued individually. Results are returned in the order of top_functions."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+        responses: Dict[int, Dict[str, Any]] = {}
+        reports: Dict[int, Dict[str, Any]] = {}
+        errors: Dict[int, Exception] = {}
+
+        pending = []
+        for index, func in enumerate(top_functions):
+            try:
+                context, reports[index] = self.build_context(func, all_functions)
+            except Exception as e:
+                errors[index] = e
+                continue
+            prompt = create_analysis_prompt(context)
+            cached = self._cached_response(self.create_request(prompt))
+            if cached is not None:
+                responses[index] = cached
+            else:
+                pending.append((index, context, prompt))
+
+        async def retry(index: int, prompt: str):
+            async with semaphore:
+                responses[index] = await self.call_openai_api_async(client, limiter, prompt, check_cache=False)
+
+        async def run_batch(batch: List[Tuple[int, str, str]]):
+            answers = {}
+            if len(batch) > 1:
+                async with semaphore:
+                    answers = await self.call_openai_batch_async(client, limiter, batch)
+                responses.update(answers)
+                self.profiler.count("llm_batch_retries", len(batch) - len(answers))
+            await asyncio.gather(*(retry(index, prompt) for index, _, prompt in batch if index not in answers))
+
+        batches = self.pack_batches(pending)
+        print(f"Packed {len(pending)} uncached functions into {len(batches)} requests")
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url) as client:
+            await asyncio.gather(*(run_batch(batch) for batch in batches))
+
+        enhanced_results = []
+        for index, func in enumerate(top_functions):
+            try:
+                if index in errors:
+                    raise errors[index]
+                enhanced_results.append(self.apply_llm_response(func, responses[index], reports[index]))
+            except Exception as e:
+                enhanced_results.append(self._mark_error(func, e))
+        return enhanced_results
+
+    def _mark_error(self, func: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        print(f"Error analyzing {func['function_name']}: {error}")
+        # Add original function with error marker
+        func["llm_analysis"] = {"error": str(error)}
+        return func
 
-def main():
-    """Main execution function for Phase 2"""
+
+def main(profiler: Optional[Profiler] = None, source: Optional[ZipSource] = None):
+    """Main execution function for Phase 2. Related functions' code is read from source
+    (the archive Phase 1 analyzed) if given, otherwise from the checkout."""
 
     # Configuration
     API_KEY = os.getenv("OPENAI_API_KEY")  # Set your API key as environment variable
@@ -361,17 +796,49 @@ def main():
         return
 
     MODEL = "gpt-3.5-turbo"  # or "gpt-4" or "gpt-4-turbo" or "gpt-3.5-turbo"
-    INPUT_FILE = "./complex_functions.json"  # Output from Phase 1
-    OUTPUT_FILE = "./llm_analyzed_functions.json"
-    TOP_N = 8  # Number of functions to analyze
-    # TOP_N = 20
-
-    analyzer = LLMComplexityAnalyzer(API_KEY, MODEL)
-    results = analyzer.analyze_top_functions(INPUT_FILE, TOP_N)
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(results, f, indent=2)
+    INPUT_FILE = "./complex_functions.ndjson"  # Output from Phase 1
+    STORE_FILE = "./complex_functions.store"  # Every Phase 1 function, for score percentiles
+    GRAPH_FILE = "./complex_functions.graph"  # Phase 1 call graph, for related functions
+    OUTPUT_FILE = "./llm_analyzed_functions.ndjson"
+    TOP_N = int(os.getenv("LLM_TOP_N", "8"))  # Number of functions to analyze
+    # Requests in flight and the account's rate limits (0: unlimited)
+    CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+    REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")) or None
+    TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000")) or None
+    # Prompt tokens per multi-function request (0: one request per function)
+    BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "8000")) or None
+    # Responses are reused across runs until they expire (empty path disables the cache)
+    CACHE_PATH = os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH)
+    CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+    # Tokens per single-function prompt; larger contexts are compacted and cut down
+    PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+
+    cache = LLMResponseCache(CACHE_PATH, ttl_seconds=CACHE_TTL_DAYS * 24 * 3600) if CACHE_PATH else None
+    analyzer = LLMComplexityAnalyzer(
+        API_KEY,
+        MODEL,
+        profiler=profiler,
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        concurrency=CONCURRENCY,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        cache=cache,
+        batch_token_budget=BATCH_TOKEN_BUDGET,
+        max_prompt_tokens=PROMPT_TOKEN_BUDGET,
+    )
+    results = analyzer.analyze_top_functions(INPUT_FILE, TOP_N, STORE_FILE, GRAPH_FILE, source)
+    write_records(OUTPUT_FILE, results)
     print(f"\n{'=' * 80}")
     print(f"LLM ANALYSIS COMPLETE - Top {len(results)} Functions")
+    if cache is not None:
+        stats = cache.stats
+        analyzer.profiler.count("llm_cache_saved_tokens", stats["saved_prompt_tokens"] + stats["saved_completion_tokens"])
+        print(
+            f"Response cache: {stats['hits']} hits / {stats['misses']} misses "
+            f"({cache.hit_rate():.0%} hit rate), saved {stats['saved_prompt_tokens']} prompt "
+            f"+ {stats['saved_completion_tokens']} completion tokens"
+        )
+        cache.close()
     print(f"{'=' * 80}")
 
 
@@ -1,12 +1,8 @@
-def create_analysis_prompt(context: str) -> str:
-    """Create the prompt for LLM analysis"""
+from typing import List, Tuple
 
-    prompt = f"""You are an expert code reviewer analyzing function complexity. Your goal is to provide DIFFERENTIATED ratings that distinguish between functions of varying complexity levels.
-
-CONTEXT:
-{context}
+INTRO = "You are an expert code reviewer analyzing function complexity. Your goal is to provide DIFFERENTIATED ratings that distinguish between functions of varying complexity levels."
 
-ANALYSIS REQUIREMENTS:
+ANALYSIS_REQUIREMENTS = """ANALYSIS REQUIREMENTS:
 
 Rate each aspect on a 1-10 scale. BE SPECIFIC and use the FULL RANGE of scores:
 - Use 1-3 for simple/excellent code
@@ -56,11 +52,9 @@ Rate each aspect on a 1-10 scale. BE SPECIFIC and use the FULL RANGE of scores:
 - Functions with 100+ lines should get higher cognitive load scores
 - Functions with nesting depth 5+ should get higher maintainability concerns
 - Compare this function's complexity to what you'd expect from typical enterprise code
-- If function content is not available, base analysis primarily on the structural metrics provided
+- If function content is not available, base analysis primarily on the structural metrics provided"""
 
-Please respond with ONLY the JSON (no other text):
-{{
-    "semantic_complexity": <number 1-10>,
+RESPONSE_FIELDS = """    "semantic_complexity": <number 1-10>,
     "cognitive_load": <number 1-10>,
     "maintainability": <number 1-10>,
     "documentation_quality": <number 1-10>,
@@ -72,9 +66,50 @@ Please respond with ONLY the JSON (no other text):
         "<specific actionable suggestion 1>",
         "<specific actionable suggestion 2>",
         "<specific actionable suggestion 3>"
-    ]
+    ]"""
+
+
+def create_analysis_prompt(context: str) -> str:
+    """Create the prompt for LLM analysis"""
+
+    prompt = f"""{INTRO}
+
+CONTEXT:
+{context}
+
+{ANALYSIS_REQUIREMENTS}
+
+Please respond with ONLY the JSON (no other text):
+{{
+{RESPONSE_FIELDS}
 }}
 
 Focus on what makes THIS SPECIFIC function more or less complex than average code."""
 
     return prompt
+
+
+def create_batch_analysis_prompt(contexts: List[Tuple[str, str]]) -> str:
+    """Create one prompt analyzing several functions, given as (function_id, context)"""
+
+    sections = "\n\n".join(f"=== FUNCTION ID: {function_id} ===\n{context}" for function_id, context in contexts)
+    prompt = f"""{INTRO}
+
+You are given {len(contexts)} functions, each under its FUNCTION ID. Analyze every function independently; the requirements below apply to each one.
+
+CONTEXTS:
+{sections}
+
+{ANALYSIS_REQUIREMENTS}
+
+Please respond with ONLY a JSON array (no other text) holding one object per function:
+[
+  {{
+    "function_id": "<the FUNCTION ID exactly as given>",
+{RESPONSE_FIELDS}
+  }}
+]
+
+Focus on what makes EACH function more or less complex than average code."""
+
+    return prompt
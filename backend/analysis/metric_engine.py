@@ -0,0 +1,215 @@
+"""
+Single-pass metric engine for Phase 1
+Computes every ComplexityMetrics field of a function in one tokenizing pass over its
+lines, using patterns compiled once per language.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+# Keywords that open a nested block in Python (matched as substrings, see cognitive score)
+PYTHON_NESTING_KEYWORDS = ["if", "for", "while", "try", "with"]
+
+BOOLEAN_OPERATORS = ["and", "or", "&&", r"\|\|"]
+
+# Leading literal of a regex, e.g. "/\*" in r"/\*[\s\S]*?\*/"
+_LITERAL_PREFIX = re.compile(r"^(?:\\.|[^\\.*+?()\[\]{}|^$])+")
+_PARAMETERS = re.compile(r"\(([^)]*)\)")
+# Lazy "<open>[\s\S]*?<close>" patterns (block comments, docstrings)
+_DELIMITED = re.compile(
+    r"^((?:\\.|[^\\.*+?()\[\]{}|^$])+)\[\\s\\S\]\*\?((?:\\.|[^\\.*+?()\[\]{}|^$])+)$"
+)
+
+
+def _unescape(literal: str) -> str:
+    return re.sub(r"\\(.)", r"\1", literal)
+
+
+class CommentPattern:
+    """
+    Counts the non-overlapping matches of one comment pattern. Delimited patterns are
+    scanned with str.find, which stays linear when a comment is never closed (the regex
+    retries every later opener to the end of the text, quadratic in the input).
+    """
+
+    def __init__(self, pattern: str):
+        delimited = _DELIMITED.match(pattern)
+        if delimited:
+            self.opening, self.closing = _unescape(delimited.group(1)), _unescape(delimited.group(2))
+            self.regex = None
+        else:
+            self.opening = self.closing = None
+            self.regex = re.compile(pattern, re.MULTILINE)
+
+    def count(self, content: str) -> int:
+        if self.regex is not None:
+            return len(self.regex.findall(content))
+
+        count = 0
+        start = content.find(self.opening)
+        while start != -1:
+            end = content.find(self.closing, start + len(self.opening))
+            if end == -1:
+                break  # unclosed: no later opener can be closed either
+            count += 1
+            start = content.find(self.opening, end + len(self.closing))
+        return count
+
+
+@lru_cache(maxsize=None)
+def comment_pattern(pattern: str) -> CommentPattern:
+    """Shared CommentPattern of a comment_patterns entry"""
+    return CommentPattern(pattern)
+
+
+class CompiledLanguage:
+    """Patterns of one language_patterns entry, compiled once"""
+
+    def __init__(self, language: str, config: Dict[str, Any]):
+        self.is_python = language == "python"
+
+        keywords = "|".join(config["branching_keywords"])
+        operators = "|".join(BOOLEAN_OPERATORS)
+        # Group 1 = branching keyword, otherwise a boolean operator
+        self.decision_points = re.compile(
+            r"\b(?:(" + keywords + r")|(?:" + operators + r"))\b", re.IGNORECASE
+        )
+        self.python_nesting = re.compile("|".join(PYTHON_NESTING_KEYWORDS))
+
+        # "<marker>.*" patterns match once per line containing the marker, everything
+        # else (block comments, docstrings) is run over the joined function text, but
+        # only when one of the lines contains its opening literal
+        self.line_comment_markers = []
+        self.block_comments = []
+        for pattern in config["comment_patterns"]:
+            prefix = _LITERAL_PREFIX.match(pattern)
+            literal = re.sub(r"\\(.)", r"\1", prefix.group(0)) if prefix else ""
+            if prefix and pattern[prefix.end():] == ".*":
+                self.line_comment_markers.append(literal)
+            else:
+                if prefix and pattern[prefix.end():prefix.end() + 1] in ("*", "?", "{"):
+                    literal = ""  # last atom is optional, no reliable prefilter
+                self.block_comments.append((literal, comment_pattern(pattern)))
+
+
+class MetricEngine:
+    """Computes all structural metrics of a function in a single pass"""
+
+    def __init__(self, language_patterns: Dict[str, Dict[str, Any]]):
+        self.languages = {
+            language: CompiledLanguage(language, config)
+            for language, config in language_patterns.items()
+        }
+
+    def measure(self, lines: List[str], language: str) -> Tuple[int, int, int, int, int, int]:
+        """
+        Return (cyclomatic_complexity, nesting_depth, function_length, parameter_count,
+        cognitive_complexity, documentation_score) for the given function lines.
+        Scores are identical to the per-metric calculate_* methods.
+        """
+        compiled = self.languages.get(language)
+
+        decisions = 0
+        max_depth = 0
+        brace_depth = 0
+        code_lines = 0
+        non_blank_lines = 0
+        cognitive_score = 0
+        nesting_level = 0
+        comment_lines = 0
+        block_candidates = set()
+
+        for line in lines:
+            stripped = line.strip()
+
+            # Length, nesting and documentation bookkeeping
+            if stripped:
+                non_blank_lines += 1
+                if not stripped.startswith("#") and not stripped.startswith("//"):
+                    code_lines += 1
+                if compiled is not None and compiled.is_python:
+                    max_depth = max(max_depth, (len(line) - len(line.lstrip())) // 4)
+            if compiled is None or not compiled.is_python:
+                brace_depth += line.count("{") - line.count("}")
+                max_depth = max(max_depth, brace_depth)
+
+            if compiled is None:
+                continue
+
+            for marker in compiled.line_comment_markers:
+                if marker in line:
+                    comment_lines += 1
+            for prefix, pattern in compiled.block_comments:
+                if not prefix or prefix in line:
+                    block_candidates.add(pattern)
+
+            # Decision points (cyclomatic) and control structures (cognitive)
+            keywords = set()
+            for match in compiled.decision_points.finditer(line):
+                decisions += 1
+                if match.group(1):
+                    keywords.add(match.group(1).lower())
+
+            if compiled.is_python:
+                if compiled.python_nesting.search(line):
+                    nesting_level += 1
+                    cognitive_score += nesting_level
+            else:
+                if "{" in line:
+                    nesting_level += 1
+                if "}" in line:
+                    nesting_level = max(0, nesting_level - 1)
+                cognitive_score += len(keywords) * (nesting_level + 1)
+
+        if compiled is None:
+            return 1, max_depth, code_lines, 0, 0, 5
+
+        if block_candidates:
+            content = "\n".join(lines)
+            for pattern in block_candidates:
+                comment_lines += pattern.count(content)
+
+        return (
+            decisions + 1,
+            max_depth,
+            code_lines,
+            self._count_parameters(lines, compiled),
+            cognitive_score,
+            self._documentation_score(comment_lines, non_blank_lines),
+        )
+
+    def _count_parameters(self, lines: List[str], compiled: CompiledLanguage) -> int:
+        """Count parameters of the signature on the first line"""
+        param_match = _PARAMETERS.search(lines[0]) if lines else None
+        if not param_match:
+            return 0
+
+        params = param_match.group(1).strip()
+        if not params:
+            return 0
+
+        param_count = params.count(",") + 1
+        if compiled.is_python and "self" in params:
+            param_count -= 1
+
+        return max(0, param_count)
+
+    def _documentation_score(self, comment_lines: int, total_lines: int) -> int:
+        """Map the comment/code line ratio to a 0-10 score"""
+        if total_lines == 0:
+            return 5
+
+        doc_ratio = comment_lines / total_lines
+        if doc_ratio >= 0.3:
+            return 10
+        elif doc_ratio >= 0.2:
+            return 8
+        elif doc_ratio >= 0.15:
+            return 6
+        elif doc_ratio >= 0.1:
+            return 4
+        elif doc_ratio >= 0.05:
+            return 2
+        else:
+            return 0
@@ -0,0 +1,240 @@
+"""
+Python front end for Phase 1
+Parses a file once with ast and yields exact function spans (functions, methods and
+nested functions) together with nesting depth, cognitive complexity and parameter
+count computed from the syntax tree. Files that do not parse (e.g. Python 2 sources)
+fall back to an indentation-based scanner.
+"""
+
+import ast
+import re
+from typing import Any, Dict, List, Tuple
+
+_DEF_LINE = re.compile(r"^(\s*)(?:async\s+)?def\s+(\w+)\s*\(")
+
+
+class _TreeMetrics(ast.NodeVisitor):
+    """
+    Nesting depth and cognitive complexity of one function body.
+
+    depth counts every nested block (compound statements and nested functions),
+    nesting follows the cognitive complexity rules: if/loops/except/match/ternaries add
+    1 + nesting, elif/else and boolean operator sequences add 1, and only structures
+    that hurt readability (not try or with) increase the nesting of their body.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.max_depth = 0
+        self.nesting = 0
+        self.cognitive = 0
+
+    def measure(self, node: ast.AST) -> Tuple[int, int]:
+        for statement in node.body:
+            self.visit(statement)
+        return self.max_depth, self.cognitive
+
+    def _block(self, nodes, nests: bool = True):
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        if nests:
+            self.nesting += 1
+        for node in nodes:
+            self.visit(node)
+        if nests:
+            self.nesting -= 1
+        self.depth -= 1
+
+    def _increment(self):
+        self.cognitive += 1 + self.nesting
+
+    def visit_If(self, node: ast.If):
+        self._increment()
+        self._if_chain(node)
+
+    def _if_chain(self, node: ast.If):
+        self.visit(node.test)
+        self._block(node.body)
+        orelse = node.orelse
+        if len(orelse) == 1 and isinstance(orelse[0], ast.If) and orelse[0].col_offset == node.col_offset:
+            self.cognitive += 1  # elif
+            self._if_chain(orelse[0])
+        elif orelse:
+            self.cognitive += 1  # else
+            self._block(orelse)
+
+    def _loop(self, node):
+        self._increment()
+        for field in ("target", "iter", "test"):
+            value = getattr(node, field, None)
+            if value is not None:
+                self.visit(value)
+        self._block(node.body)
+        if node.orelse:
+            self.cognitive += 1
+            self._block(node.orelse)
+
+    visit_For = visit_AsyncFor = visit_While = _loop
+
+    def visit_Try(self, node):
+        self._block(node.body, nests=False)
+        for handler in node.handlers:
+            self._increment()
+            if handler.type is not None:
+                self.visit(handler.type)
+            self._block(handler.body)
+        if node.orelse:
+            self._block(node.orelse, nests=False)
+        if node.finalbody:
+            self._block(node.finalbody, nests=False)
+
+    visit_TryStar = visit_Try
+
+    def _with(self, node):
+        for item in node.items:
+            self.visit(item.context_expr)
+        self._block(node.body, nests=False)
+
+    visit_With = visit_AsyncWith = _with
+
+    def visit_Match(self, node):
+        self._increment()
+        self.visit(node.subject)
+        self._block(node.cases)
+
+    def visit_IfExp(self, node: ast.IfExp):
+        self._increment()
+        self.generic_visit(node)
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        # "a and b and c" is one BoolOp, mixing operators nests them
+        self.cognitive += 1
+        self.generic_visit(node)
+
+    def _nested_scope(self, node):
+        for decorator in getattr(node, "decorator_list", []):
+            self.visit(decorator)
+        self._block(node.body)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _nested_scope
+
+    def visit_Lambda(self, node: ast.Lambda):
+        self._block([node.body])
+
+
+def _parameter_count(node: ast.AST) -> int:
+    """Count declared parameters, not counting self/cls"""
+    args = node.args
+    positional = args.posonlyargs + args.args
+    count = len(positional) + len(args.kwonlyargs) + bool(args.vararg) + bool(args.kwarg)
+    if positional and positional[0].arg in ("self", "cls"):
+        count -= 1
+    return count
+
+
+def _function_nodes(tree: ast.Module) -> List[ast.AST]:
+    """All function definitions in source order. Definitions are statements, so only
+    statement blocks are searched instead of every expression node."""
+    found = []
+    blocks = [tree.body]
+    while blocks:
+        for statement in blocks.pop():
+            if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                found.append(statement)
+            for field in ("body", "orelse", "finalbody"):
+                block = getattr(statement, field, None)
+                if block and isinstance(block, list):
+                    blocks.append(block)
+            for clause in getattr(statement, "handlers", None) or getattr(statement, "cases", None) or ():
+                blocks.append(clause.body)
+    found.sort(key=lambda node: (node.lineno, node.col_offset))
+    return found
+
+
+def _called_names(node: ast.AST) -> List[str]:
+    """Names the function body calls (f(...) and obj.f(...)), in first-call order.
+    Decorators, defaults and annotations of the signature are not part of the body."""
+    names = {}
+    for statement in node.body:
+        for child in ast.walk(statement):
+            if isinstance(child, ast.Call):
+                func = child.func
+                if isinstance(func, ast.Name):
+                    names.setdefault(func.id)
+                elif isinstance(func, ast.Attribute):
+                    names.setdefault(func.attr)
+    return list(names)
+
+
+def split_source_lines(content: str) -> List[str]:
+    """Split on the same line endings the Python tokenizer uses (\\n, \\r\\n, \\r)"""
+    return content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+
+def extract_python_functions(content: str) -> List[Dict[str, Any]]:
+    """Return every function/method in source order with its exact line span"""
+    lines = split_source_lines(content)
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return _extract_by_indentation(lines)
+
+    functions = []
+    for node in _function_nodes(tree):
+        nesting_depth, cognitive_complexity = _TreeMetrics().measure(node)
+        functions.append({
+            "name": node.name,
+            "start_line": node.lineno,
+            "end_line": node.end_lineno,
+            "content": lines[node.lineno - 1:node.end_lineno],
+            "language": "python",
+            # Tree-based metrics take precedence over the line-based engine
+            "metrics": {
+                "nesting_depth": nesting_depth,
+                "cognitive_complexity": cognitive_complexity,
+                "parameter_count": _parameter_count(node),
+            },
+            "calls": _called_names(node),
+        })
+    return functions
+
+
+def _extract_by_indentation(lines: List[str]) -> List[Dict[str, Any]]:
+    """Fallback for unparsable files: a def ends at the first line indented at or
+    above it once its (possibly multi-line) signature is closed"""
+    functions = []
+    for i, line in enumerate(lines):
+        match = _DEF_LINE.match(line)
+        if not match:
+            continue
+        indent = len(match.group(1).expandtabs())
+
+        # Skip to the end of the signature
+        end = i
+        depth = 0
+        while end < len(lines):
+            code = lines[end].split("#", 1)[0]
+            depth += code.count("(") + code.count("[") - code.count(")") - code.count("]")
+            if depth <= 0 and ":" in code:
+                break
+            end += 1
+
+        # Body: blank lines or anything indented deeper than the def
+        last = end
+        for j in range(end + 1, len(lines)):
+            body_line = lines[j].expandtabs()
+            if not body_line.strip():
+                continue
+            if len(body_line) - len(body_line.lstrip()) <= indent:
+                break
+            last = j
+        last = min(last, len(lines) - 1)
+
+        functions.append({
+            "name": match.group(2),
+            "start_line": i + 1,
+            "end_line": last + 1,
+            "content": lines[i:last + 1],
+            "language": "python",
+        })
+    return functions
@@ -0,0 +1,76 @@
+"""
+Client-side rate limiting for concurrent LLM requests
+A RateLimiter holds one token bucket for requests per minute and one for tokens per
+minute (either may be unlimited). Callers reserve one request and their estimated
+tokens before each call and refund what the response did not use, so bursts are
+smoothed to the provider's limits instead of being answered with 429s.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to one minute's allowance"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount is available (requests larger than the bucket wait for
+        a full bucket)"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Args:
+            requests_per_minute: Request budget (None: unlimited)
+            tokens_per_minute: Prompt plus completion token budget (None: unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Waiters are served in arrival order, so one large request cannot be starved
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request and tokens fit in the budgets, then reserve them"""
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self.requests is not None:
+                    wait = self.requests.delay(1)
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.delay(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+
+    def refund(self, tokens: int):
+        """Return reserved tokens the request did not use"""
+        if self.tokens is not None and tokens > 0:
+            self.tokens.refund(tokens)
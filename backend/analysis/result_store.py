@@ -0,0 +1,215 @@
+"""
+Compact columnar store for Phase 1 function metrics
+Every analyzed function is kept as one row of typed arrays (line span, metrics, score)
+with paths, languages and names interned in string tables. The names each function
+calls are kept in CSR form (offsets into one array of name ids) for the call graph.
+Result dicts are only materialized when rows are serialized for the API or JSON.
+"""
+
+import heapq
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple
+
+MAGIC = b"DBFS"
+# Version 2 added the called names; version 1 stores are read without them
+FORMAT_VERSION = 2
+
+METRIC_FIELDS = (
+    "cyclomatic_complexity",
+    "nesting_depth",
+    "function_length",
+    "parameter_count",
+    "cognitive_complexity",
+    "documentation_score",
+)
+
+
+class FunctionRecord(NamedTuple):
+    """Extracted function with its raw metrics, as produced for (and cached per) file"""
+
+    name: str
+    start_line: int
+    end_line: int
+    cyclomatic_complexity: int
+    nesting_depth: int
+    function_length: int
+    parameter_count: int
+    cognitive_complexity: int
+    documentation_score: int
+    total_score: float
+
+
+def result_dict(root_path: str, rel_path: str, language: str, record: FunctionRecord, github_repo_url: str) -> Dict[str, Any]:
+    """The JSON result shape shared by Phase 1 output, Phase 2 input and the API"""
+    file_url = f"file:///{os.path.join(root_path, rel_path)}"
+    github_url = f"{github_repo_url}{rel_path}#L{record.start_line}-L{record.end_line}"
+
+    return {
+        "function_name": record.name,
+        "file_url": file_url,
+        "github_url": github_url,
+        "start_line": record.start_line,
+        "end_line": record.end_line,
+        "language": language,
+        "rule_analysis": {
+            "cyclomatic_complexity": record.cyclomatic_complexity,
+            "nesting_depth": record.nesting_depth,
+            "function_length": record.function_length,
+            "parameter_count": record.parameter_count,
+            "cognitive_complexity": record.cognitive_complexity,
+            "documentation_score": record.documentation_score,
+            "rule_score": record.total_score,
+        },
+    }
+
+
+class _StringTable:
+    """Interned strings addressed by their insertion index"""
+
+    def __init__(self, values: List[str] = None):
+        self.values = list(values or [])
+        self._ids = {value: i for i, value in enumerate(self.values)}
+
+    def intern(self, value: str) -> int:
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class FunctionStore:
+    """Columnar, array-backed table of every function Phase 1 analyzed"""
+
+    def __init__(self, root_path: str = "", github_repo_url: str = ""):
+        self.root_path = root_path
+        self.github_repo_url = github_repo_url
+        self.paths = _StringTable()
+        self.languages = _StringTable()
+        self.names = _StringTable()
+
+        self.path_ids = array("I")
+        self.language_ids = array("B")
+        self.name_ids = array("I")
+        self.start_lines = array("I")
+        self.end_lines = array("I")
+        self.metrics = {field: array("i") for field in METRIC_FIELDS}
+        self.scores = array("d")
+        # Names called by row i: names.values[call_ids[call_offsets[i]:call_offsets[i + 1]]]
+        self.call_offsets = array("I", [0])
+        self.call_ids = array("I")
+
+    def _columns(self) -> List[array]:
+        """All columns in on-disk order"""
+        return [
+            self.path_ids, self.language_ids, self.name_ids, self.start_lines, self.end_lines,
+            *(self.metrics[field] for field in METRIC_FIELDS), self.scores,
+        ]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def add(self, rel_path: str, language: str, record: FunctionRecord, calls: Iterable[str] = ()) -> int:
+        """Append a function row (with the names it calls) and return its index"""
+        self.path_ids.append(self.paths.intern(rel_path))
+        self.language_ids.append(self.languages.intern(language))
+        self.name_ids.append(self.names.intern(record.name))
+        self.start_lines.append(record.start_line)
+        self.end_lines.append(record.end_line)
+        for field in METRIC_FIELDS:
+            self.metrics[field].append(getattr(record, field))
+        self.scores.append(record.total_score)
+        self.call_ids.extend(self.names.intern(name) for name in calls)
+        self.call_offsets.append(len(self.call_ids))
+        return len(self.scores) - 1
+
+    def rel_path(self, index: int) -> str:
+        return self.paths.values[self.path_ids[index]]
+
+    def language(self, index: int) -> str:
+        return self.languages.values[self.language_ids[index]]
+
+    def name(self, index: int) -> str:
+        return self.names.values[self.name_ids[index]]
+
+    def calls(self, index: int) -> List[str]:
+        """Names the function calls, in first-call order"""
+        names = self.names.values
+        return [names[name_id] for name_id in self.call_ids[self.call_offsets[index]:self.call_offsets[index + 1]]]
+
+    def record(self, index: int) -> FunctionRecord:
+        return FunctionRecord(
+            self.names.values[self.name_ids[index]],
+            self.start_lines[index],
+            self.end_lines[index],
+            *(self.metrics[field][index] for field in METRIC_FIELDS),
+            self.scores[index],
+        )
+
+    def to_dict(self, index: int) -> Dict[str, Any]:
+        """Materialize one row as a Phase 1 result dict"""
+        return result_dict(
+            self.root_path, self.rel_path(index), self.language(index), self.record(index), self.github_repo_url
+        )
+
+    def top_indices(self, k: int) -> List[int]:
+        """Rows of the k highest scores. Rows are kept in walk order, so ties go to the
+        earlier row exactly like the top-K heap in analyze_codebase."""
+        scores = self.scores
+        return heapq.nlargest(k, range(len(scores)), key=lambda index: (scores[index], -index))
+
+    def iter_dicts(self, indices=None) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)) if indices is None else indices:
+            yield self.to_dict(index)
+
+    def write(self, path: str):
+        """Write the store as a header (string tables) followed by the raw columns"""
+        header = json.dumps({
+            "root_path": self.root_path,
+            "github_repo_url": self.github_repo_url,
+            "count": len(self),
+            "call_count": len(self.call_ids),
+            "paths": self.paths.values,
+            "languages": self.languages.values,
+            "names": self.names.values,
+        }).encode()
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<HI", FORMAT_VERSION, len(header)))
+            f.write(header)
+            for column in self._columns() + [self.call_offsets, self.call_ids]:
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+
+    @classmethod
+    def read(cls, path: str) -> "FunctionStore":
+        with open(path, "rb") as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path} is not a function store")
+            version, header_size = struct.unpack("<HI", f.read(6))
+            if version not in (1, FORMAT_VERSION):
+                raise ValueError(f"Unsupported function store version {version}")
+            header = json.loads(f.read(header_size))
+
+            store = cls(header["root_path"], header["github_repo_url"])
+            store.paths = _StringTable(header["paths"])
+            store.languages = _StringTable(header["languages"])
+            store.names = _StringTable(header["names"])
+            columns = [(column, header["count"]) for column in store._columns()]
+            if version >= 2:
+                store.call_offsets = array("I")
+                columns += [(store.call_offsets, header["count"] + 1), (store.call_ids, header["call_count"])]
+            else:
+                store.call_offsets = array("I", bytes(4 * (header["count"] + 1)))
+            for column, count in columns:
+                column.fromfile(f, count)
+                if sys.byteorder == "big":
+                    column.byteswap()
+        return store
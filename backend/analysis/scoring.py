@@ -0,0 +1,91 @@
+"""
+Vectorized scoring over stored Phase 1 metrics
+The raw metrics of every stored function form an (n, 6) matrix; a ScoringEngine
+applies a weight set to all rows at once, so re-weighting and re-ranking a whole
+repository takes milliseconds instead of a re-parse. PercentileNormalizer maps scores
+onto 0-10 by their rank within a reference distribution.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from analysis.result_store import METRIC_FIELDS, FunctionStore
+
+# Same defaults as CodeComplexityAnalyzer.complexity_weights
+DEFAULT_WEIGHTS = {
+    "cyclomatic_complexity": 3.0,
+    "nesting_depth": 2.5,
+    "function_length": 1.5,
+    "parameter_count": 1.0,
+    "cognitive_complexity": 2.0,
+    "documentation_penalty": 2.0,
+}
+
+_COLUMN = {field: i for i, field in enumerate(METRIC_FIELDS)}
+
+
+def metrics_matrix(store: FunctionStore) -> np.ndarray:
+    """(len(store), 6) float64 matrix of raw metrics in METRIC_FIELDS order. Column-major,
+    so each metric is one contiguous column like in the store."""
+    matrix = np.zeros((len(store), len(METRIC_FIELDS)), order="F")
+    if len(store):
+        for i, field in enumerate(METRIC_FIELDS):
+            matrix[:, i] = np.frombuffer(store.metrics[field], dtype=np.int32)
+    return matrix
+
+
+class ScoringEngine:
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            weights: complexity_weights-style mapping; missing keys use DEFAULT_WEIGHTS
+        """
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        """Total score per row. Terms are added in the order analyze_function adds them,
+        so default weights reproduce the stored scores bit for bit."""
+        w = self.weights
+        m = matrix
+        total = m[:, _COLUMN["cyclomatic_complexity"]] * w["cyclomatic_complexity"]
+        total += m[:, _COLUMN["nesting_depth"]] * w["nesting_depth"]
+        total += (m[:, _COLUMN["function_length"]] / 10) * w["function_length"]
+        total += m[:, _COLUMN["parameter_count"]] * w["parameter_count"]
+        total += m[:, _COLUMN["cognitive_complexity"]] * w["cognitive_complexity"]
+        total += (10 - m[:, _COLUMN["documentation_score"]]) / 10 * w["documentation_penalty"]
+        return total
+
+    def rank(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, descending; ties go to the lower index like
+        the top-K heap in analyze_codebase"""
+        k = min(k, len(scores))
+        if k == 0:
+            return np.zeros(0, dtype=np.intp)
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        # argpartition breaks ties arbitrarily: widen to every row tied with the cut-off
+        threshold = scores[candidates].min()
+        candidates = np.flatnonzero(scores >= threshold)
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:k]]
+
+    def rerank(self, store: FunctionStore, k: int, matrix: Optional[np.ndarray] = None) -> List[int]:
+        """Row indices of the store's top k under these weights"""
+        if matrix is None:
+            matrix = metrics_matrix(store)
+        return self.rank(self.score(matrix), k).tolist()
+
+
+class PercentileNormalizer:
+    """Maps a score to 0-10 by the share of reference scores at or below it"""
+
+    def __init__(self, reference_scores: Iterable[float]):
+        self.reference = np.sort(np.asarray(list(reference_scores), dtype=np.float64))
+
+    def normalize(self, scores: np.ndarray) -> np.ndarray:
+        if not len(self.reference):
+            return np.zeros(len(scores))
+        return np.searchsorted(self.reference, scores, side="right") / len(self.reference) * 10.0
+
+    def __call__(self, score: float) -> float:
+        return float(self.normalize(np.asarray([score]))[0])
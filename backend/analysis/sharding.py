@@ -0,0 +1,127 @@
+"""
+Sharded Phase 1: partition the file list across nodes and merge partial results
+Every node walks the same sorted file list and analyzes the files whose path hashes
+to its shard. A shard artifact carries the shard's own top-K with each function's
+global order key (file index in the walk, function index in the file) plus file
+statistics, so merging any complete set of shards reproduces exactly the top-K,
+summary and store of a single-node run.
+"""
+
+import hashlib
+import heapq
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from analysis.artifacts import ArtifactWriter, read_records
+from analysis.result_store import FunctionStore
+
+SHARD_FORMAT = 1
+
+
+def shard_of(rel_path: str, shard_count: int) -> int:
+    """Deterministic shard of a /-separated repository path (stable across processes)"""
+    digest = hashlib.blake2b(rel_path.encode("utf-8", "surrogateescape"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shard_count
+
+
+def shard_path(path: str, shard_index: int, shard_count: int) -> str:
+    """complex_functions.ndjson -> complex_functions.shard0of4.ndjson"""
+    directory, name = os.path.split(path)
+    stem, dot, suffix = name.partition(".")
+    return os.path.join(directory, f"{stem}.shard{shard_index}of{shard_count}{dot}{suffix}")
+
+
+class ShardEntry(NamedTuple):
+    """One top-K candidate of a shard with its position in the global walk"""
+
+    score: float
+    file_index: int
+    function_index: int
+    result: Dict[str, Any]
+
+    def sort_key(self) -> Tuple[float, int, int]:
+        # Same key as the analyze_codebase heap: ties go to the function found first
+        return (self.score, -self.file_index, -self.function_index)
+
+
+def write_shard(
+    path: str,
+    shard_index: int,
+    shard_count: int,
+    stats: Dict[str, int],
+    skipped_files: List[Dict[str, str]],
+    file_order: Dict[str, int],
+    entries: Iterable[ShardEntry],
+):
+    """Write a shard artifact: one header record, then one record per top-K candidate.
+    file_order maps every stored path of the shard to its global walk index."""
+    with ArtifactWriter(path) as writer:
+        writer.write({
+            "shard": {
+                "format": SHARD_FORMAT,
+                "index": shard_index,
+                "count": shard_count,
+                "stats": stats,
+                "skipped_files": skipped_files,
+                "file_order": file_order,
+            }
+        })
+        for entry in entries:
+            writer.write({"order": [entry.file_index, entry.function_index], "result": entry.result})
+
+
+class MergedShards(NamedTuple):
+    top: List[Dict[str, Any]]
+    stats: Dict[str, int]
+    skipped_files: List[Dict[str, str]]
+    file_order: Dict[str, int]
+
+
+def merge_shards(paths: List[str], top_k: int) -> MergedShards:
+    """Combine a complete set of shard artifacts into the global top-K and statistics"""
+    headers = []
+    entries: List[ShardEntry] = []
+    for path in paths:
+        records = read_records(path)
+        header = next(records, {}).get("shard")
+        if header is None or header.get("format") != SHARD_FORMAT:
+            raise ValueError(f"{path} is not a Phase 1 shard")
+        headers.append(header)
+        for record in records:
+            file_index, function_index = record["order"]
+            score = record["result"]["rule_analysis"]["rule_score"]
+            entries.append(ShardEntry(score, file_index, function_index, record["result"]))
+
+    counts = {header["count"] for header in headers}
+    indices = sorted(header["index"] for header in headers)
+    if len(counts) != 1 or indices != list(range(counts.pop())):
+        raise ValueError(f"Incomplete or mixed shard set: {indices}")
+
+    stats: Dict[str, int] = {}
+    skipped_files: List[Dict[str, str]] = []
+    file_order: Dict[str, int] = {}
+    for header in headers:
+        for name, value in header["stats"].items():
+            stats[name] = stats.get(name, 0) + value
+        skipped_files.extend(header["skipped_files"])
+        file_order.update(header["file_order"])
+    skipped_files.sort(key=lambda skipped: skipped["file_url"])
+
+    top = heapq.nlargest(top_k, entries, key=ShardEntry.sort_key)
+    return MergedShards([entry.result for entry in top], stats, skipped_files, file_order)
+
+
+def merge_stores(store_paths: List[str], file_order: Dict[str, int]) -> FunctionStore:
+    """Interleave shard stores back into global walk order"""
+    stores = [FunctionStore.read(path) for path in store_paths]
+    rows = []
+    for store_index, store in enumerate(stores):
+        for row in range(len(store)):
+            rows.append((file_order[store.rel_path(row)], store_index, row))
+    rows.sort()
+
+    merged = FunctionStore(stores[0].root_path, stores[0].github_repo_url) if stores else FunctionStore()
+    for _, store_index, row in rows:
+        store = stores[store_index]
+        merged.add(store.rel_path(row), store.language(row), store.record(row), store.calls(row))
+    return merged
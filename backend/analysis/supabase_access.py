@@ -1,22 +1,41 @@
 import json
 import os
+import sys
+from typing import Optional
 
+if not __package__:
+    # Run as a script (python backend/analysis/supabase_access.py): make the analysis package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.artifacts import read_records
+from analysis.instrumentation import Profiler
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
 
-def upload_function_complexity():
-    json_path = "./llm_analyzed_functions.json"
+# Rows per insert request; records are streamed from the artifact batch by batch
+BATCH_SIZE = 500
+
+
+def upload_function_complexity(profiler: Optional[Profiler] = None, batch_size: int = BATCH_SIZE):
+    """
+    Append the Phase 2 results to function_complexity in batches of batch_size rows.
+    Every batch is its own insert request, so the upload is not atomic: if a batch
+    fails, the batches before it stay in the table and the error is raised. Running
+    the upload again appends every row again, including those already inserted. Clean
+    up the partial rows first (e.g. by github_url) or pass batch_size large enough for
+    one request to restore all-or-nothing behaviour.
+    """
+    profiler = profiler or Profiler()
+    json_path = "./llm_analyzed_functions.ndjson"
     load_dotenv()
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_KEY")
     supabase: Client = create_client(supabase_url, supabase_key)
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
     # Flatten and prepare records
     records = []
-    for item in data:
+    for item in read_records(json_path):
         record = {
             "function_name": item["function_name"],
             "file_url": item["file_url"],
@@ -48,8 +67,18 @@ def upload_function_complexity():
             "llm_suggestions": json.dumps(item["llm_analysis"]["suggestions"]),
         }
         records.append(record)
+        if len(records) >= batch_size:
+            insert_batch(supabase, records, profiler)
+            records = []
+
+    if records:
+        insert_batch(supabase, records, profiler)
+
 
-    response = supabase.table("function_complexity").insert(records).execute()
+def insert_batch(supabase: Client, records, profiler: Profiler):
+    with profiler.stage("insert", rows=len(records)):
+        response = supabase.table("function_complexity").insert(records).execute()
+    profiler.count("rows_uploaded", len(records))
     print("Insert response:", response)
 
 
@@ -0,0 +1,123 @@
+"""
+Symbol index for related-function lookup
+Maps every function name to its definitions grouped by directory, so finding the
+functions a target calls (defined next to it) is one dictionary hit per called name
+instead of a scan over every function. Built once per Phase 2 run, either from the
+Phase 1 results or from the whole repository's function store; store rows are only
+materialized as result dicts (with their source, given a store_row reader) when they
+are looked up.
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from analysis.result_store import FunctionStore
+
+
+class SymbolIndex:
+    """Function definitions by name and directory, in priority order"""
+
+    def __init__(
+        self,
+        functions: List[Dict[str, Any]],
+        store: Optional[FunctionStore] = None,
+        store_row: Optional[Callable[[int], Dict[str, Any]]] = None,
+    ):
+        """
+        Args:
+            functions: Result dicts, ranked before the store in this order
+            store: Function store whose rows rank after functions in walk order
+            store_row: Result dict of a store row, e.g. with its function_content read
+                from the source (defaults to store.to_dict, metrics only)
+        """
+        self.functions = functions
+        self.store = store
+        self.store_row = store_row or (store.to_dict if store is not None else None)
+        # (name, directory) -> ranks (ascending). A rank below len(functions) is an
+        # index into functions, the next len(_ranked_rows) ranks are the ranked store
+        # rows, and the ranks after them are the other store rows in walk order.
+        self._definitions: Dict[Tuple[str, str], List[int]] = {}
+        self._ranked_rows: List[int] = []
+
+    def __len__(self) -> int:
+        return sum(len(ranks) for ranks in self._definitions.values())
+
+    def _add(self, name: str, directory: str, rank: int):
+        ranks = self._definitions.get((name, directory))
+        if ranks is None:
+            self._definitions[(name, directory)] = [rank]
+        else:
+            ranks.append(rank)
+
+    @classmethod
+    def build(
+        cls,
+        functions: List[Dict[str, Any]],
+        path_of: Callable[[Dict[str, Any]], str],
+        store: Optional[FunctionStore] = None,
+        store_row: Optional[Callable[[int], Dict[str, Any]]] = None,
+        ranked: Sequence[Tuple[str, int]] = (),
+    ) -> "SymbolIndex":
+        """
+        Index functions (in order), then the store rows of the ranked (file path, start
+        line) keys (in order), then every other function of store in walk order.
+        path_of gives a result dict's file path; store rows use the same path form.
+        """
+        index = cls(functions, store, store_row)
+        seen = set()
+        directories: Dict[str, str] = {}
+        for rank, func in enumerate(functions):
+            file_path = path_of(func)
+            directory = directories.get(file_path)
+            if directory is None:
+                directory = directories[file_path] = os.path.dirname(file_path)
+            index._add(func["function_name"], directory, rank)
+            seen.add((file_path, func["start_line"]))
+
+        if store is not None:
+            # Same file path as path_of(store.to_dict(row)), computed once per file
+            file_paths = [
+                os.path.join(store.root_path, rel_path).replace("/", os.sep) for rel_path in store.paths.values
+            ]
+            path_directories = [os.path.dirname(file_path) for file_path in file_paths]
+            names = store.names.values
+            add = index._add
+            wanted: Dict[Tuple[str, int], int] = {}
+            for position, key in enumerate(ranked):
+                if key not in seen:
+                    wanted.setdefault(key, position)
+            index._ranked_rows = [-1] * len(ranked)  # keys missing from the store stay -1
+            base = len(functions) + len(ranked)
+            for row, (path_id, name_id, start_line) in enumerate(
+                zip(store.path_ids, store.name_ids, store.start_lines)
+            ):
+                if not seen and not wanted:
+                    add(names[name_id], path_directories[path_id], base + row)
+                    continue
+                key = (file_paths[path_id], start_line)
+                position = wanted.get(key)
+                if position is not None:
+                    index._ranked_rows[position] = row
+                    add(names[name_id], path_directories[path_id], len(functions) + position)
+                elif key not in seen:
+                    add(names[name_id], path_directories[path_id], base + row)
+        return index
+
+    def lookup(self, names: Iterable[str], file_path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Definitions of names in the directory of file_path, in priority order"""
+        directory = os.path.dirname(file_path)
+        found = []
+        for name in names:
+            found.extend(self._definitions.get((name, directory), ()))
+        found.sort()
+        if limit is not None:
+            found = found[:limit]
+        return [self._materialize(rank) for rank in found]
+
+    def _materialize(self, rank: int) -> Dict[str, Any]:
+        if rank < len(self.functions):
+            return self.functions[rank]
+        rank -= len(self.functions)
+        if rank < len(self._ranked_rows):
+            return self.store_row(self._ranked_rows[rank])
+        return self.store_row(rank - len(self._ranked_rows))
@@ -0,0 +1,225 @@
+"""
+Token budgeting of LLM analysis contexts
+Prompts are measured locally (with tiktoken when installed, otherwise a slightly
+pessimistic estimate) before they are sent. A context over budget is shrunk step by
+step until it fits, keeping as much of the target function as possible:
+
+    1. comments and blank lines are stripped from the related functions, then the target
+    2. related functions are reduced to their signature, lowest priority (last) first
+    3. related functions are omitted, lowest priority first
+    4. the middle of the target function is cut, keeping its head and tail
+"""
+
+import io
+import re
+import tokenize
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from analysis.brace_lexer import BraceLexer
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact counts for OpenAI models
+    tiktoken = None
+
+# Without tiktoken: words cost a token per four characters, operator and punctuation
+# runs a token per two and indentation runs one (slightly more than BPE encoders count)
+_WORD = re.compile(r"\w+")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_INDENTATION = re.compile(r"\s{2,}")
+# Tokens the chat format adds around every message
+_MESSAGE_OVERHEAD = 4
+
+# Context windows by model name prefix (longest prefix wins)
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+# Most completion tokens a model returns per request
+MAX_OUTPUT_TOKENS = {
+    "gpt-3.5-turbo": 4096,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 4096,
+    "gpt-4o": 16384,
+    "gpt-4.1": 32768,
+}
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
+# Same lexer flavours as Phase 1
+_BRACE_LEXERS = {
+    "java": BraceLexer(text_blocks=True),
+    "go": BraceLexer(backtick_strings=True),
+    "csharp": BraceLexer(text_blocks=True, verbatim_strings=True),
+    "cpp": BraceLexer(raw_strings=True, digit_separators=True),
+}
+_C_STYLE_LEXER = BraceLexer()
+
+
+def context_window(model: str) -> int:
+    """Context window of model in tokens (DEFAULT_CONTEXT_WINDOW if unknown)"""
+    matches = [prefix for prefix in CONTEXT_WINDOWS if model.startswith(prefix)]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def max_output_tokens(model: str) -> int:
+    """Completion limit of model in tokens (DEFAULT_MAX_OUTPUT_TOKENS if unknown)"""
+    matches = [prefix for prefix in MAX_OUTPUT_TOKENS if model.startswith(prefix)]
+    return MAX_OUTPUT_TOKENS[max(matches, key=len)] if matches else DEFAULT_MAX_OUTPUT_TOKENS
+
+
+class TokenCounter:
+    """Counts prompt tokens for one model"""
+
+    def __init__(self, model: str):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        words = sum((len(piece) + 3) // 4 for piece in _WORD.findall(text))
+        punctuation = sum((len(piece) + 1) // 2 for piece in _PUNCTUATION.findall(text))
+        return words + punctuation + len(_INDENTATION.findall(text))
+
+    def count_messages(self, *contents: str) -> int:
+        """Prompt tokens of a chat request with these message contents"""
+        return sum(self.count(content) + _MESSAGE_OVERHEAD for content in contents)
+
+
+def strip_comments(code: str, language: str) -> str:
+    """Remove the comments of code (docstrings are kept). Code that does not tokenize
+    is returned unchanged."""
+    if language != "python":
+        return _BRACE_LEXERS.get(language, _C_STYLE_LEXER).strip_comments(code)
+
+    comments: Dict[int, int] = {}
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.COMMENT:
+                comments[token.start[0]] = token.start[1]
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return code
+    if not comments:
+        return code
+    lines = code.split("\n")
+    for row, column in comments.items():
+        lines[row - 1] = lines[row - 1][:column]
+    return "\n".join(lines)
+
+
+def compact_code(code: str, language: str) -> str:
+    """code without comments, blank lines and trailing whitespace"""
+    lines = (line.rstrip() for line in strip_comments(code, language).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def signature(code: str) -> str:
+    """The lines of code up to the one opening its body (a summary of the function)"""
+    lines = code.split("\n")
+    for end, line in enumerate(lines[:10], 1):
+        stripped = line.rstrip()
+        if "{" in stripped or stripped.endswith(":"):
+            break
+    else:
+        end = 1
+    omitted = len(lines) - end
+    head = "\n".join(lines[:end])
+    return f"{head}\n    ... ({omitted} lines omitted)" if omitted > 0 else head
+
+
+def truncate_middle(code: str, keep: int) -> str:
+    """code with all but keep lines cut from the middle (two thirds of them from the head)"""
+    lines = code.split("\n")
+    if keep >= len(lines):
+        return code
+    head = (keep * 2 + 2) // 3
+    tail = keep - head
+    kept = lines[:head] + [f"    ... ({len(lines) - keep} lines omitted to fit the token budget) ..."]
+    return "\n".join(kept + (lines[-tail:] if tail else []))
+
+
+class ContextBudgeter:
+    """Shrinks an analysis context until its prompt fits max_tokens"""
+
+    def __init__(self, counter: TokenCounter, max_tokens: int, overhead: int = 0):
+        """
+        Args:
+            counter: Token counter of the model the prompt is sent to
+            max_tokens: Prompt token budget
+            overhead: Tokens of the prompt outside the context (system message, template)
+        """
+        self.counter = counter
+        self.max_tokens = max_tokens
+        self.overhead = overhead
+
+    def fit(
+        self,
+        render: Callable[[Optional[str], List[Optional[str]]], str],
+        target: Optional[str],
+        related: List[Optional[str]],
+        language: str,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render the context from the target code and the related functions' code (most
+        relevant first; None renders as omitted) and shrink them until it fits.
+        Returns the context and a report: prompt_tokens, budget and what was shrunk.
+        """
+        report = {"prompt_tokens": 0, "budget": self.max_tokens, "compacted": False,
+                  "summarized": 0, "omitted": 0, "truncated": False}
+        related = list(related)
+
+        def fits() -> bool:
+            nonlocal context
+            context = render(target, related)
+            report["prompt_tokens"] = self.overhead + self.counter.count(context)
+            return report["prompt_tokens"] <= self.max_tokens
+
+        context = ""
+        if fits():
+            return context, report
+
+        # 1. Compact the related functions, then the target
+        report["compacted"] = True
+        related = [compact_code(code, language) if code else code for code in related]
+        if fits():
+            return context, report
+        if target:
+            target = compact_code(target, language)
+            if fits():
+                return context, report
+
+        # 2./3. Summarize, then omit, related functions from the least relevant up
+        for step, reduce in (("summarized", signature), ("omitted", lambda code: None)):
+            for i in reversed(range(len(related))):
+                if related[i] is None:
+                    continue
+                related[i] = reduce(related[i])
+                report[step] += 1
+                if fits():
+                    return context, report
+
+        # 4. Keep as many head and tail lines of the target as fit
+        if target:
+            full = target
+            low, high = 0, full.count("\n")
+            while low < high:
+                keep = (low + high + 1) // 2
+                target = truncate_middle(full, keep)
+                if fits():
+                    low = keep
+                else:
+                    high = keep - 1
+            target = truncate_middle(full, low)
+            report["truncated"] = True
+            fits()
+        return context, report
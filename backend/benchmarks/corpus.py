@@ -0,0 +1,284 @@
+"""
+Deterministic synthetic corpus generator for Phase 1 benchmarks
+Writes Python, Java, Go, C# and C++ trees whose size and shape (files, functions per
+file, nesting depth, line length) are fully determined by the arguments and the seed.
+"""
+
+import os
+import random
+from typing import Dict, List
+
+# Per-language source templates. "{name}", "{cond}", "{n}" and "{pad}" are filled in by
+# the generator; block_close is None for indentation-based languages. Statements put
+# braces and quotes inside strings, chars and comments to exercise the lexers.
+LANGUAGES: Dict[str, Dict] = {
+    "python": {
+        "extension": ".py",
+        "file_header": "",
+        "file_footer": "",
+        "base_indent": 0,
+        "function_open": "def {name}(a, b, items):\n{indent}\"\"\"Generated function {name}.\"\"\"",
+        "function_close": "{indent}return total",
+        "blocks": ["if {cond}:", "for x in items:", "while a > {n}:", "with open(b) as handle:"],
+        "block_close": None,
+        "statements": [
+            "total = a + b  # {pad}",
+            "label = \"{pad}\"",
+            "total += len('{pad}')",
+            "a = b and items or {n}",
+        ],
+        "init": "total = 0",
+    },
+    "java": {
+        "extension": ".java",
+        "file_header": "package bench;\n\npublic class {module} {{\n",
+        "file_footer": "}}\n",
+        "base_indent": 1,
+        "function_open": "public int {name}(int a, int b, String text) {{",
+        "function_close": "{indent}return total;\n{outer}}}",
+        "blocks": ["if ({cond}) {{", "for (int x = 0; x < b; x++) {{", "while (a > {n}) {{", "switch (a) {{"],
+        "block_close": "}}",
+        "statements": [
+            "total += a * b; // {pad}",
+            "String label = \"{pad} }}\";",
+            "char brace = '{{';",
+            "/* {pad} */ total -= {n};",
+        ],
+        "init": "int total = 0;",
+    },
+    "go": {
+        "extension": ".go",
+        "file_header": "package bench\n\n",
+        "file_footer": "",
+        "base_indent": 0,
+        "function_open": "func {name}(a int, b int, args ...interface{{}}) int {{",
+        "function_close": "{indent}return total\n{outer}}}",
+        "blocks": ["if {cond} {{", "for x := 0; x < b; x++ {{", "switch a {{", "select {{"],
+        "block_close": "}}",
+        "statements": [
+            "total += a * b // {pad}",
+            "label := `{pad} }}`",
+            "r := '{{'",
+            "total -= {n} /* {pad} */",
+        ],
+        "init": "total := 0",
+    },
+    "csharp": {
+        "extension": ".cs",
+        "file_header": "namespace Bench\n{{\n    public class {module}\n    {{\n",
+        "file_footer": "    }}\n}}\n",
+        "base_indent": 2,
+        "function_open": "public int {name}(int a, int b, string text) {{",
+        "function_close": "{indent}return total;\n{outer}}}",
+        "blocks": ["if ({cond}) {{", "for (int x = 0; x < b; x++) {{", "while (a > {n}) {{", "try {{"],
+        "block_close": "}}",
+        "statements": [
+            "total += a * b; // {pad}",
+            "var label = @\"{pad} }}\";",
+            "var brace = '{{';",
+            "/* {pad} */ total -= {n};",
+        ],
+        "init": "int total = 0;",
+    },
+    "cpp": {
+        "extension": ".cpp",
+        "file_header": "#include <string>\n\n",
+        "file_footer": "",
+        "base_indent": 0,
+        "function_open": "int {name}(int a, int b, const std::string& text) {{",
+        "function_close": "{indent}return total;\n{outer}}}",
+        "blocks": ["if ({cond}) {{", "for (int x = 0; x < b; x++) {{", "while (a > {n}) {{", "switch (a) {{"],
+        "block_close": "}}",
+        "statements": [
+            "total += a * b; // {pad}",
+            "std::string label = R\"x({pad} }})x\";",
+            "char brace = '{{';",
+            "total -= 1'000 + {n}; /* {pad} */",
+        ],
+        "init": "int total = 0;",
+    },
+}
+
+CONDITIONS = ["a > {n}", "b < {n}", "a == b", "a != {n}"]
+INDENT = "    "
+
+
+def _padding(rng: random.Random, width: int) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < width:
+        words.append(rng.choice(["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]))
+    return " ".join(words)
+
+
+def _block(rng: random.Random, template: Dict, depth: int, nesting_depth: int, line_length: int, level: int) -> List[str]:
+    """Statements at the current level plus one nested block until nesting_depth"""
+    indent = INDENT * level
+    lines = []
+    for _ in range(rng.randint(1, 3)):
+        statement = rng.choice(template["statements"])
+        pad = _padding(rng, max(0, line_length - len(indent) - len(statement)))
+        lines.append(indent + statement.format(pad=pad, n=rng.randint(0, 99)))
+
+    if depth < nesting_depth:
+        cond = rng.choice(CONDITIONS).format(n=rng.randint(0, 99))
+        opener = rng.choice(template["blocks"]).format(cond=cond, n=rng.randint(0, 99))
+        lines.append(indent + opener)
+        lines.extend(_block(rng, template, depth + 1, nesting_depth, line_length, level + 1))
+        if template["block_close"] is not None:
+            lines.append(indent + template["block_close"].format())
+    return lines
+
+
+def generate_source(language: str, module: str, functions: int, nesting_depth: int, line_length: int, rng: random.Random) -> str:
+    template = LANGUAGES[language]
+    base = template["base_indent"]
+    outer = INDENT * base
+    inner = INDENT * (base + 1)
+
+    lines = [template["file_header"].format(module=module)]
+    for index in range(functions):
+        name = f"{module.lower()}_func_{index}"
+        lines.append(outer + template["function_open"].format(name=name, indent=inner))
+        lines.append(inner + template["init"])
+        lines.extend(_block(rng, template, 0, nesting_depth, line_length, base + 1))
+        lines.append(template["function_close"].format(indent=inner, outer=outer))
+        lines.append("")
+    lines.append(template["file_footer"].format())
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    root_path: str,
+    languages: List[str] = None,
+    files: int = 20,
+    functions_per_file: int = 10,
+    nesting_depth: int = 3,
+    line_length: int = 80,
+    seed: int = 0,
+) -> List[str]:
+    """Write files per language under root_path/<language>/pkgN/ and return their paths"""
+    rng = random.Random(seed)
+    written = []
+    for language in languages or list(LANGUAGES):
+        template = LANGUAGES[language]
+        for index in range(files):
+            directory = os.path.join(root_path, language, f"pkg{index % 10}")
+            os.makedirs(directory, exist_ok=True)
+            module = f"Module{index}"
+            path = os.path.join(directory, module + template["extension"])
+            source = generate_source(language, module, functions_per_file, nesting_depth, line_length, rng)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+            written.append(path)
+    return written
+
+
+# Inputs that have triggered super-linear regex behaviour: (name, language, source)
+PATHOLOGICAL_INPUTS = [
+    ("escaped_quotes_line", "java", 'void f() {\n  s = "' + '\\"' * 20000 + '\n}\n'),
+    ("quote_soup_line", "cpp", "int f() {\n  " + "\"'" * 20000 + "\n}\n"),
+    ("unclosed_block_comments", "go", "func f() {\n" + "/* x\n" * 5000 + "}\n"),
+    ("unclosed_docstrings", "python", "def f():\n" + "    '''x\"\"\"\n" * 5000),
+    ("long_boolean_line", "csharp", "public void F() {\n  if (" + " && ".join(["a"] * 20000) + ") {}\n}\n"),
+    ("deep_nesting", "java", "void f() {\n" + "if (a) {\n" * 3000 + "}\n" * 3001),
+    ("long_signature_soup", "java", "int " * 5000 + "f(\n"),
+]
+
+# Headers the original extractor found and any front end must keep finding:
+# (name, language, source, [(function name, start line, end line)])
+EXTRACTION_CASES = [
+    (
+        "go_interface_result", "go",
+        "package x\n\nfunc Values() map[string]interface{} {\n\treturn nil\n}\n",
+        [("Values", 3, 5)],
+    ),
+    (
+        "go_struct_channel_result", "go",
+        "package x\n\nfunc Done() <-chan struct{} {\n\treturn nil\n}\n",
+        [("Done", 3, 5)],
+    ),
+    (
+        "go_struct_literal_result", "go",
+        "package x\n\nfunc Pair() struct{ a int; b string } {\n\treturn struct{ a int; b string }{}\n}\n",
+        [("Pair", 3, 5)],
+    ),
+]
+
+# Call graph regression cases: (name, [(path, language, source)], expected edges as
+# [("path:caller line", "path:callee line")]). Headers are not calls, and a name with
+# several definitions in the nearest scope is ambiguous and gets no edge.
+CALL_GRAPH_CASES = [
+    (
+        "go_same_named_methods",
+        [("shapes/shapes.go", "go", (
+            "package shapes\n"
+            "\n"
+            "func (c Circle) String() string {\n"
+            "\treturn describe(\"circle\")\n"
+            "}\n"
+            "\n"
+            "func (s Square) String() string {\n"
+            "\tdefer cleanup()\n"
+            "\treturn s.inner.String() + describe(\"square\")\n"
+            "}\n"
+            "\n"
+            "func (l Line) String() string {\n"
+            "\tf := func() string { return \"line\" }\n"
+            "\treturn f()\n"
+            "}\n"
+            "\n"
+            "func describe(kind string) string {\n"
+            "\treturn kind\n"
+            "}\n"
+            "\n"
+            "func cleanup() {\n"
+            "}\n"
+        ))],
+        [
+            ("shapes/shapes.go:3", "shapes/shapes.go:17"),
+            ("shapes/shapes.go:7", "shapes/shapes.go:21"),
+            ("shapes/shapes.go:7", "shapes/shapes.go:17"),
+        ],
+    ),
+    (
+        "java_overloads",
+        [("calc/Calc.java", "java", (
+            "package calc;\n"
+            "\n"
+            "public class Calc {\n"
+            "    public int add(int a) {\n"
+            "        return add(a, 0);\n"
+            "    }\n"
+            "\n"
+            "    public int add(int a, int b) {\n"
+            "        if (check(a)) {\n"
+            "            return a + b;\n"
+            "        }\n"
+            "        return 0;\n"
+            "    }\n"
+            "\n"
+            "    private boolean check(int a) {\n"
+            "        return a > 0;\n"
+            "    }\n"
+            "}\n"
+        ))],
+        [("calc/Calc.java:8", "calc/Calc.java:15")],
+    ),
+    (
+        "python_decorators",
+        [("app/routes.py", "python", (
+            "def register(path):\n"
+            "    return lambda func: func\n"
+            "\n"
+            "\n"
+            "@register(\"/items\")\n"
+            "def items(limit=register(\"default\")):\n"
+            "    return load(limit)\n"
+            "\n"
+            "\n"
+            "def load(limit):\n"
+            "    return []\n"
+        ))],
+        [("app/routes.py:6", "app/routes.py:10")],
+    ),
+]
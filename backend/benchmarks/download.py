@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Repository download benchmark against a local stand-in for GitHub
+Serves a synthetic archive of the requested size from a local HTTP server (with Range
+support, optionally dropping the first connection part-way) and downloads it with
+fetch_github_repo_zip, reporting throughput, peak Python memory and whether the
+resumed download is byte-identical. The oversize guard is checked as well.
+
+Usage: python backend/benchmarks/download.py --size-mb 512 --interrupt-at-mb 100
+"""
+
+import argparse
+import hashlib
+import http.server
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from analysis.download_github_repo import fetch_github_repo_zip
+
+BLOCK = os.urandom(1024 * 1024)
+
+
+def archive_bytes(start: int, end: int):
+    """Yield bytes [start, end) of the synthetic archive (BLOCK repeated)"""
+    pos = start
+    while pos < end:
+        offset = pos % len(BLOCK)
+        chunk = BLOCK[offset: offset + min(len(BLOCK) - offset, end - pos)]
+        yield chunk
+        pos += len(chunk)
+
+
+def make_handler(size: int, interrupt_at: int, ranges: bool, served: dict):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            start, status = 0, 200
+            header = self.headers.get("Range")
+            if ranges and header and header.startswith("bytes="):
+                start, status = int(header[6:].split("-")[0]), 206
+            self.send_response(status)
+            self.send_header("Content-Length", str(size - start))
+            self.send_header("ETag", '"synthetic"')
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            self.end_headers()
+
+            served["requests"] += 1
+            stop = size
+            if interrupt_at and served["requests"] == 1:
+                stop = min(size, interrupt_at)  # then hang up mid-body
+            try:
+                for chunk in archive_bytes(start, stop):
+                    self.wfile.write(chunk)
+            except ConnectionError:
+                pass  # client gave up (e.g. the oversize guard)
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def expected_digest(size: int) -> str:
+    digest = hashlib.sha256()
+    for chunk in archive_bytes(0, size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256, help="Archive size")
+    parser.add_argument("--interrupt-at-mb", type=int, default=64, help="Drop the first connection here (0: never)")
+    parser.add_argument("--no-ranges", action="store_true", help="Server ignores Range (download restarts)")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    served = {"requests": 0}
+    handler = make_handler(size, args.interrupt_at_mb * 1024 * 1024, not args.no_ranges, served)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    repo_url = f"http://127.0.0.1:{server.server_port}/owner/repo"
+
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        archive = fetch_github_repo_zip(repo_url)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        digest = hashlib.sha256()
+        with archive:
+            for chunk in iter(lambda: archive.read(1024 * 1024), b""):
+                digest.update(chunk)
+        identical = digest.hexdigest() == expected_digest(size)
+
+        served["requests"] = 0
+        try:
+            fetch_github_repo_zip(repo_url, max_bytes=size // 2)
+            refused = False
+        except HTTPException as e:
+            refused = e.status_code == 413
+    finally:
+        server.shutdown()
+
+    print(f"Archive:            {args.size_mb} MB")
+    print(f"Download:           {elapsed:.2f}s ({args.size_mb / elapsed:.0f} MB/s)")
+    print(f"Peak Python memory: {peak / 1024 / 1024:.1f} MB")
+    print(f"Byte-identical:     {identical}")
+    print(f"Oversize refused:   {refused}")
+    if not identical or not refused:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
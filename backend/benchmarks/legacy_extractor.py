@@ -0,0 +1,66 @@
+"""
+Reference copy of the original line/regex-based function extractor
+Kept only as a baseline for the front end benchmarks; production code uses
+CodeComplexityAnalyzer.extract_functions.
+"""
+
+import re
+from typing import Any, Dict, List
+
+
+def strip_string_literals(line: str) -> str:
+    """Remove all string literals (single and double quoted) from the line."""
+    return re.sub(r'(["\'])(?:\\.|[^\\])*?\1', '', line)
+
+
+def extract_functions_regex(content: str, language: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Original extract_functions: function_pattern per line, then raw brace counting"""
+    functions = []
+    lines = content.splitlines()
+    total_lines = len(lines)
+    i = 0
+
+    while i < total_lines:
+        line = lines[i]
+        func_match = re.search(config["function_pattern"], line)
+
+        if func_match:
+            func_name = func_match.group(1)
+            start_line = i + 1
+            function_lines = [line]
+
+            # Capture full multi-line signature
+            while "{" not in line and i + 1 < total_lines:
+                i += 1
+                line = lines[i]
+                function_lines.append(line)
+                if "{" in line:
+                    break
+
+            if "{" not in line:
+                i += 1
+                continue  # skip malformed/abstract
+
+            # Begin brace counting (ignore braces inside strings)
+            brace_count = strip_string_literals(line).count("{") - strip_string_literals(line).count("}")
+            i += 1
+
+            while i < total_lines and brace_count > 0:
+                line = lines[i]
+                code_only = strip_string_literals(line)
+                brace_count += code_only.count("{") - code_only.count("}")
+                function_lines.append(line)
+                i += 1
+
+            end_line = start_line + len(function_lines) - 1
+            functions.append({
+                "name": func_name,
+                "start_line": start_line,
+                "end_line": end_line,
+                "content": function_lines,
+                "language": language,
+            })
+        else:
+            i += 1
+
+    return functions
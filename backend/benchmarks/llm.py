@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Phase 2 benchmark against a local fake OpenAI-compatible server
+Runs Phase 1 on a synthetic corpus, then analyzes the top functions serially, with the
+concurrent async client and with batched multi-function prompts. The fake server
+answers /v1/chat/completions after a fixed latency with ratings derived from each
+function's context (also inside batch prompts), so every mode must produce exactly the
+same results in the same order. It records requests, prompt tokens and the peak number
+of requests in flight; --drop-every N leaves every Nth batch item unanswered to
+exercise the individual retries. --prompt-budget shrinks the function contexts to a
+small token budget, so every mode also sends the same compacted prompts.
+
+Usage: python backend/benchmarks/llm.py --functions 100 --latency 0.5 --concurrency 16
+"""
+
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.artifacts import write_records
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+from analysis.llm_complexity_analyzer import LLMComplexityAnalyzer
+from benchmarks.corpus import generate_corpus
+
+
+class FakeOpenAI(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, drop_every: int = 0):
+        super().__init__(("127.0.0.1", 0), FakeOpenAIHandler)
+        self.latency = latency
+        self.drop_every = drop_every
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.batch_items = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class FakeOpenAIHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        time.sleep(server.latency)
+
+        prompt = body["messages"][-1]["content"]
+        if "\nCONTEXTS:\n" in prompt:
+            sections = prompt.split("\nCONTEXTS:\n", 1)[1].split("\n\nANALYSIS REQUIREMENTS:", 1)[0]
+            items = re.split(r"(?:^|\n\n)=== FUNCTION ID: (\S+) ===\n", sections)[1:]
+            answers = []
+            for function_id, context in zip(items[::2], items[1::2]):
+                with server.lock:
+                    server.batch_items += 1
+                    dropped = server.drop_every and server.batch_items % server.drop_every == 0
+                if not dropped:
+                    answers.append({"function_id": function_id, **fake_answer(context)})
+            content = json.dumps(answers, indent=2)
+        else:
+            context = prompt.split("\nCONTEXT:\n", 1)[1].split("\n\nANALYSIS REQUIREMENTS:", 1)[0]
+            content = json.dumps(fake_answer(context))
+
+        prompt_tokens = len(prompt) // 4
+        with server.lock:
+            server.prompt_tokens += prompt_tokens
+        response = json.dumps({
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 60, "total_tokens": prompt_tokens + 60},
+        }).encode()
+        with server.lock:
+            server.in_flight -= 1
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_answer(context: str):
+    digest = hashlib.sha256(context.encode()).digest()
+    return {
+        "semantic_complexity": 1 + digest[0] % 10,
+        "cognitive_load": 1 + digest[1] % 10,
+        "maintainability": 1 + digest[2] % 10,
+        "documentation_quality": 1 + digest[3] % 10,
+        "refactoring_urgency": 1 + digest[4] % 10,
+        "explanation": f"fake analysis {digest.hex()[:8]}",
+        "business_description": "",
+        "developer_description": "",
+        "suggestions": [],
+    }
+
+
+def run(server: FakeOpenAI, input_file: str, functions: int, **options):
+    server.requests = server.peak_in_flight = server.prompt_tokens = 0
+    analyzer = LLMComplexityAnalyzer("sk-fake", "gpt-3.5-turbo", base_url=server.base_url, **options)
+    start = time.perf_counter()
+    results = analyzer.analyze_top_functions(input_file, functions)
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "results": results, "peak": server.peak_in_flight,
+            "requests": server.requests, "prompt_tokens": server.prompt_tokens}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--functions", type=int, default=100, help="TOP_N analyzed by Phase 2")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per fake completion")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rpm", type=float, default=None, help="Requests per minute limit of the concurrent run")
+    parser.add_argument("--batch-budget", type=int, default=8000, help="Prompt tokens per batched request")
+    parser.add_argument("--drop-every", type=int, default=0, help="Leave every Nth batch item unanswered")
+    parser.add_argument("--prompt-budget", type=int, default=None, help="Tokens per single-function prompt")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="docubuddy_llm_") as root_path:
+        generate_corpus(os.path.join(root_path, "repo"), files=10, functions_per_file=10)
+        phase1 = CodeComplexityAnalyzer(workers=1, top_k=args.functions)
+        phase1.github_repo_url = "https://github.com/example/repo/blob/main/"
+        input_file = os.path.join(root_path, "complex_functions.ndjson")
+        write_records(input_file, phase1.analyze_codebase(os.path.join(root_path, "repo")))
+
+        server = FakeOpenAI(args.latency, args.drop_every)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        budget = {"max_prompt_tokens": args.prompt_budget}
+        try:
+            runs = {
+                "serial": run(server, input_file, args.functions, **budget),
+                f"concurrent ({args.concurrency})": run(
+                    server, input_file, args.functions, concurrency=args.concurrency,
+                    requests_per_minute=args.rpm, **budget,
+                ),
+                f"batched ({args.concurrency})": run(
+                    server, input_file, args.functions, concurrency=args.concurrency,
+                    requests_per_minute=args.rpm, batch_token_budget=args.batch_budget, **budget,
+                ),
+            }
+        finally:
+            server.shutdown()
+
+    serial = runs["serial"]
+    print(f"\nFunctions analyzed: {len(serial['results'])}")
+    print(f"{'mode':<18} {'seconds':>8} {'speedup':>8} {'requests':>9} {'prompt tokens':>14} {'peak':>5}  identical")
+    for name, result in runs.items():
+        print(f"{name:<18} {result['seconds']:>8.2f} {serial['seconds'] / result['seconds']:>7.1f}x "
+              f"{result['requests']:>9} {result['prompt_tokens']:>14} {result['peak']:>5}  "
+              f"{result['results'] == serial['results']}")
+    if any(result["results"] != serial["results"] for result in runs.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Phase 1 parallel scaling benchmark
+Times CodeComplexityAnalyzer.analyze_codebase with 1..N worker processes on the same
+tree and checks that every parallel run returns exactly the serial result.
+
+Usage: python backend/benchmarks/parallel_scaling.py ./repo --max-workers 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+
+
+def worker_counts(max_workers: int):
+    """1, 2, 4, ... up to max_workers (always including max_workers itself)"""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run(root_path: str, workers: int, repeat: int):
+    """Return (best wall time, results) for analyze_codebase with the given worker count"""
+    analyzer = CodeComplexityAnalyzer(workers=workers)
+    best = float("inf")
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = analyzer.analyze_codebase(root_path)
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root_path", help="Codebase to analyze")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is reported)")
+    args = parser.parse_args()
+
+    serial_time, serial_results = None, None
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'identical':>10}")
+    for workers in worker_counts(args.max_workers):
+        elapsed, results = run(args.root_path, workers, args.repeat)
+        if serial_results is None:
+            serial_time, serial_results = elapsed, results
+        identical = results == serial_results
+        print(f"{workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>7.2f}x {str(identical):>10}")
+        if not identical:
+            sys.exit(f"Parallel run with {workers} workers diverged from the serial result")
+
+
+if __name__ == "__main__":
+    main()
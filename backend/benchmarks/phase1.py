@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Phase 1 benchmark suite
+Generates a deterministic synthetic corpus (Python, Java, Go, C#, C++), then times
+extract_functions per language, every calculate_* metric, the single-pass metric
+engine and a full analyze_codebase run. Known pathological inputs are run in a child
+process with a timeout so a catastrophic regex shows up as "timeout" instead of a hang,
+and regression cases check that known headers are still extracted with the right spans.
+Results are written as JSON so runs on different commits can be compared.
+
+Usage: python backend/benchmarks/phase1.py --out phase1.json --compare previous.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+from benchmarks.corpus import EXTRACTION_CASES, LANGUAGES, PATHOLOGICAL_INPUTS, generate_corpus
+
+# (name, call(analyzer, content, language)) for every per-metric method
+METRICS = [
+    ("calculate_cyclomatic_complexity", lambda a, c, l: a.calculate_cyclomatic_complexity(c, l)),
+    ("calculate_nesting_depth", lambda a, c, l: a.calculate_nesting_depth(c, l)),
+    ("calculate_function_length", lambda a, c, l: a.calculate_function_length(c)),
+    ("count_parameters", lambda a, c, l: a.count_parameters(c, l)),
+    ("calculate_cognitive_complexity", lambda a, c, l: a.calculate_cognitive_complexity(c, l)),
+    ("calculate_documentation_score", lambda a, c, l: a.calculate_documentation_score(c, l)),
+]
+
+
+def best_of(repeat: int, fn):
+    """Return (best wall time, value of the last call)"""
+    best = float("inf")
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def result(name: str, seconds: float, items: int, unit: str):
+    return {
+        "name": name,
+        "seconds": round(seconds, 6),
+        "items": items,
+        "unit": unit,
+        "per_second": round(items / seconds, 1) if seconds else None,
+    }
+
+
+def run_suite(root_path: str, repeat: int):
+    analyzer = CodeComplexityAnalyzer(workers=1)
+    sources = {}
+    for filepath, language in analyzer.collect_source_files(root_path):
+        with open(filepath, "r", encoding="utf-8") as f:
+            sources.setdefault(language, []).append(f.read())
+
+    results = []
+    functions = []
+    for language, contents in sorted(sources.items()):
+        seconds, extracted = best_of(repeat, lambda: [
+            func for content in contents for func in analyzer.extract_functions(content, language)
+        ])
+        functions.extend(extracted)
+        results.append(result(f"extract_functions[{language}]", seconds, len(extracted), "functions"))
+
+    joined = [("\n".join(func["content"]), func["language"]) for func in functions]
+    for name, metric in METRICS:
+        seconds, _ = best_of(repeat, lambda: [metric(analyzer, content, language) for content, language in joined])
+        results.append(result(name, seconds, len(joined), "functions"))
+
+    seconds, _ = best_of(repeat, lambda: [analyzer.metric_engine.measure(func["content"], func["language"]) for func in functions])
+    results.append(result("metric_engine.measure", seconds, len(functions), "functions"))
+
+    files = sum(len(contents) for contents in sources.values())
+    seconds, _ = best_of(repeat, lambda: CodeComplexityAnalyzer(workers=1).analyze_codebase(root_path))
+    results.append(result("analyze_codebase", seconds, files, "files"))
+    return results
+
+
+def _time_stages(language: str, source: str, queue):
+    """Child process: time extraction and every metric on one pathological input"""
+    analyzer = CodeComplexityAnalyzer(workers=1)
+    stages = {}
+    start = time.perf_counter()
+    analyzer.extract_functions(source, language)
+    stages["extract_functions"] = time.perf_counter() - start
+    for name, metric in METRICS:
+        start = time.perf_counter()
+        metric(analyzer, source, language)
+        stages[name] = time.perf_counter() - start
+    start = time.perf_counter()
+    analyzer.metric_engine.measure(source.splitlines(), language)
+    stages["metric_engine.measure"] = time.perf_counter() - start
+    queue.put(stages)
+
+
+def run_pathological(timeout: float, slow_seconds: float):
+    """Run each pathological input in a child; status is ok, slow or timeout"""
+    results = []
+    for name, language, source in PATHOLOGICAL_INPUTS:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_time_stages, args=(language, source, queue))
+        process.start()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            results.append({"name": name, "language": language, "bytes": len(source), "status": "timeout", "seconds": None})
+            continue
+
+        stages = queue.get() if not queue.empty() else {}
+        slowest = max(stages, key=stages.get) if stages else None
+        seconds = stages.get(slowest, 0.0)
+        results.append({
+            "name": name,
+            "language": language,
+            "bytes": len(source),
+            "status": ("error" if not stages else "slow" if seconds > slow_seconds else "ok"),
+            "seconds": round(seconds, 6),
+            "slowest_stage": slowest,
+        })
+    return results
+
+
+def run_extraction_cases():
+    """Extract every regression case; status is ok or the spans actually found"""
+    analyzer = CodeComplexityAnalyzer(workers=1)
+    results = []
+    for name, language, source, expected in EXTRACTION_CASES:
+        found = [
+            (func["name"], func["start_line"], func["end_line"])
+            for func in analyzer.extract_functions(source, language)
+        ]
+        results.append({
+            "name": name,
+            "language": language,
+            "status": "ok" if found == expected else "mismatch",
+            "found": found,
+        })
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path: str, report):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {entry["name"]: entry for entry in json.load(f)["benchmarks"]}
+
+    print(f"\nCompared with {previous_path}:")
+    print(f"{'benchmark':<36} {'before':>10} {'after':>10} {'change':>8}")
+    for entry in report["benchmarks"]:
+        before = previous.get(entry["name"])
+        if before is None or not before["seconds"]:
+            continue
+        change = entry["seconds"] / before["seconds"]
+        print(f"{entry['name']:<36} {before['seconds']:>10.4f} {entry['seconds']:>10.4f} {change:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20, help="Files per language")
+    parser.add_argument("--functions-per-file", type=int, default=10)
+    parser.add_argument("--nesting-depth", type=int, default=3)
+    parser.add_argument("--line-length", type=int, default=80)
+    parser.add_argument("--languages", nargs="+", default=list(LANGUAGES), choices=list(LANGUAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (best is reported)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds before a pathological input counts as a hang")
+    parser.add_argument("--slow-seconds", type=float, default=1.0, help="Slowest stage above this flags an input as slow")
+    parser.add_argument("--out", default="phase1_benchmark.json", help="JSON results file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    config = {
+        "files_per_language": args.files,
+        "functions_per_file": args.functions_per_file,
+        "nesting_depth": args.nesting_depth,
+        "line_length": args.line_length,
+        "languages": args.languages,
+        "seed": args.seed,
+        "repeat": args.repeat,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="docubuddy_bench_") as root_path:
+        generate_corpus(
+            root_path, args.languages, args.files, args.functions_per_file,
+            args.nesting_depth, args.line_length, args.seed,
+        )
+        benchmarks = run_suite(root_path, args.repeat)
+    pathological = run_pathological(args.timeout, args.slow_seconds)
+    extraction = run_extraction_cases()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "benchmarks": benchmarks,
+        "pathological": pathological,
+        "extraction_cases": extraction,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<36} {'seconds':>10} {'rate':>16}")
+    for entry in benchmarks:
+        print(f"{entry['name']:<36} {entry['seconds']:>10.4f} {entry['per_second'] or 0:>10,.0f} {entry['unit']}/s")
+    print(f"\n{'pathological input':<36} {'seconds':>10} {'status':>8}")
+    for entry in pathological:
+        seconds = f"{entry['seconds']:.4f}" if entry["seconds"] is not None else "-"
+        print(f"{entry['name']:<36} {seconds:>10} {entry['status']:>8}")
+
+    print(f"\n{'extraction case':<36} {'status':>10}")
+    for entry in extraction:
+        print(f"{entry['name']:<36} {entry['status']:>10}")
+
+    if args.compare:
+        compare(args.compare, report)
+    print(f"\nResults written to {args.out}")
+
+    flagged = [entry["name"] for entry in pathological if entry["status"] != "ok"]
+    if flagged:
+        sys.exit(f"Pathological inputs flagged: {', '.join(flagged)}")
+    mismatched = [entry["name"] for entry in extraction if entry["status"] != "ok"]
+    if mismatched:
+        sys.exit(f"Extraction cases mismatched: {', '.join(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
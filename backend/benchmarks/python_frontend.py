@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Python front end benchmark
+Compares the ast-based Python extractor with the original regex/brace extractor on a
+Python corpus (defaults to the standard library of the running interpreter), for
+speed (files/sec) and correctness against the spans reported by ast.
+
+Usage: python backend/benchmarks/python_frontend.py [corpus_dir] [--limit N]
+"""
+
+import argparse
+import ast
+import os
+import sys
+import sysconfig
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+from analysis.python_frontend import extract_python_functions
+from benchmarks.legacy_extractor import extract_functions_regex
+
+
+def load_corpus(root_path: str, limit: int):
+    """Return [(path, source, {(name, start, end)} expected spans)] for parsable files"""
+    corpus = []
+    for root, dirs, files in os.walk(root_path):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith(".py"):
+                continue
+            path = os.path.join(root, file)
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                source = f.read()
+            try:
+                tree = ast.parse(source)
+            except (SyntaxError, ValueError):
+                continue
+            expected = {
+                (node.name, node.lineno, node.end_lineno)
+                for node in ast.walk(tree)
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            }
+            corpus.append((path, source, expected))
+            if len(corpus) >= limit:
+                return corpus
+    return corpus
+
+
+def evaluate(name: str, extract, corpus):
+    start = time.perf_counter()
+    found = [extract(source) for _, source, _ in corpus]
+    elapsed = time.perf_counter() - start
+
+    expected_total = sum(len(expected) for _, _, expected in corpus)
+    reported = sum(len(functions) for functions in found)
+    exact = sum(
+        len(expected & {(f["name"], f["start_line"], f["end_line"]) for f in functions})
+        for (_, _, expected), functions in zip(corpus, found)
+    )
+    print(
+        f"{name:<8} {len(corpus) / elapsed:>10,.0f} files/sec  "
+        f"reported {reported:>7}  exact spans {exact:>7}/{expected_total} "
+        f"({exact / max(expected_total, 1):.1%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=sysconfig.get_paths()["stdlib"])
+    parser.add_argument("--limit", type=int, default=2000, help="Maximum number of files")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.limit)
+    lines = sum(source.count("\n") for _, source, _ in corpus)
+    print(f"Corpus: {len(corpus)} files, {lines:,} lines from {args.corpus}\n")
+
+    config = CodeComplexityAnalyzer(workers=1).language_patterns["python"]
+    evaluate("regex", lambda source: extract_functions_regex(source, "python", config), corpus)
+    evaluate("ast", extract_python_functions, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Related-function lookup benchmark
+Builds a synthetic repository-wide function store (functions spread over packages, each
+target calling a handful of names), then times the original scan of find_related_functions,
+which looped over every function per target and re-parsed both paths per comparison,
+against the SymbolIndex lookup. Both must return the same functions in the same order.
+It also times building, writing and loading the Phase 1 call graph of the store (every
+function calls a few names) and the O(degree) callee lookups Phase 2 makes with it,
+and checks the graph's edges on the CALL_GRAPH_CASES regression sources.
+
+Usage: python backend/benchmarks/related.py --functions 200000 --targets 100
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.call_graph import CallGraph
+from analysis.complexity_analyzer import CodeComplexityAnalyzer
+from analysis.llm_complexity_analyzer import LLMComplexityAnalyzer
+from analysis.result_store import FunctionRecord, FunctionStore
+from analysis.symbol_index import SymbolIndex
+from benchmarks.corpus import CALL_GRAPH_CASES
+
+
+def legacy_find_related(analyzer, target_function, all_functions):
+    """Original find_related_functions: a scan over all_functions per target"""
+    if not target_function.get("function_content"):
+        return []
+    called_functions = analyzer.extract_function_calls(target_function["function_content"], target_function["language"])
+    target_file_path = analyzer.get_file_path(target_function)
+    related = []
+    for func in all_functions:
+        if func["function_name"] in called_functions:
+            func_file_path = analyzer.get_file_path(func)
+            if func_file_path == target_file_path or os.path.dirname(func_file_path) == os.path.dirname(target_file_path):
+                related.append(func)
+    return related[:5]
+
+
+def build_store(functions: int, packages: int, seed: int = 7) -> FunctionStore:
+    rng = random.Random(seed)
+    store = FunctionStore("/repo", "https://github.com/example/repo/blob/main/")
+    for i in range(functions):
+        module = i // 20
+        rel_path = f"src/pkg{module % packages}/module{module}.py"
+        name = f"helper_{rng.randrange(functions // 4)}"
+        calls = [f"helper_{rng.randrange(functions // 4)}" for _ in range(8)] + ["len", "print"]
+        store.add(rel_path, "python", FunctionRecord(name, i % 500 + 1, i % 500 + 10, 1, 1, 10, 2, 1, 0, rng.random() * 100), calls)
+    return store
+
+
+def run_call_graph_cases():
+    """Build the graph of every regression case; status is ok or the edges actually found"""
+    analyzer = CodeComplexityAnalyzer(workers=1)
+    results = []
+    for name, files, expected in CALL_GRAPH_CASES:
+        store = FunctionStore("/repo")
+        for rel_path, language, source in files:
+            records, calls = analyzer.analyze_source(source, language)
+            for record, called in zip(records, calls):
+                store.add(rel_path, language, record, called)
+        graph = CallGraph.build(store)
+        key = lambda row: f"{store.rel_path(row)}:{store.record(row).start_line}"
+        found = [(key(row), key(callee)) for row in range(len(store)) for callee in graph.callees(row)]
+        results.append((name, "ok" if found == expected else f"mismatch {found}"))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--functions", type=int, default=200000, help="Functions in the repository")
+    parser.add_argument("--packages", type=int, default=500, help="Directories they are spread over")
+    parser.add_argument("--targets", type=int, default=100, help="Functions analyzed by Phase 2")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    store = build_store(args.functions, args.packages)
+    all_functions = list(store.iter_dicts())
+    targets = [dict(all_functions[i]) for i in store.top_indices(args.targets)]
+    for target in targets:
+        calls = [f"helper_{rng.randrange(args.functions // 4)}({i})" for i in range(12)]
+        # Also call functions of the target's own package so lookups find something
+        calls += [f"{func['function_name']}()" for func in rng.sample(all_functions, 2000)
+                  if os.path.dirname(func["file_url"]) == os.path.dirname(target["file_url"])]
+        target["function_content"] = "def target():\n    " + "\n    ".join(calls)
+
+    analyzer = LLMComplexityAnalyzer("sk-unused", "gpt-3.5-turbo")
+
+    start = time.perf_counter()
+    legacy = [legacy_find_related(analyzer, target, all_functions) for target in targets]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer.symbol_index = SymbolIndex.build(all_functions, analyzer.get_file_path)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [analyzer.find_related_functions(target, all_functions) for target in targets]
+    lookup_seconds = time.perf_counter() - start
+
+    # Repository-wide index straight from the store (rows materialized on lookup only)
+    start = time.perf_counter()
+    analyzer.symbol_index = SymbolIndex.build([], analyzer.get_file_path, store)
+    store_build_seconds = time.perf_counter() - start
+    from_store = [analyzer.find_related_functions(target, []) for target in targets]
+
+    found = sum(len(related) for related in legacy)
+    print(f"\n{args.functions} functions, {args.targets} targets, {found} related functions found")
+    print(f"legacy scan:        {legacy_seconds:8.3f}s")
+    print(f"index from dicts:   {build_seconds:8.3f}s build + {lookup_seconds:.4f}s lookups "
+          f"({legacy_seconds / lookup_seconds:.0f}x faster lookups)")
+    print(f"index from store:   {store_build_seconds:8.3f}s build")
+    start = time.perf_counter()
+    graph = CallGraph.build(store)
+    graph_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory(prefix="docubuddy_graph_") as directory:
+        path = os.path.join(directory, "complex_functions.graph")
+        graph.write(path)
+        graph_bytes = os.path.getsize(path)
+        start = time.perf_counter()
+        loaded = CallGraph.read(path)
+        load_seconds = time.perf_counter() - start
+    rows = store.top_indices(args.targets)
+    start = time.perf_counter()
+    degrees = [len(loaded.callees(row)) for row in rows]
+    callee_seconds = time.perf_counter() - start
+    print(f"call graph:         {graph_seconds:8.3f}s build, {graph.edge_count} edges, "
+          f"{graph_bytes / 1e6:.1f} MB, {load_seconds:.4f}s load, {callee_seconds * 1e6:.0f}us for "
+          f"{len(degrees)} callee lookups (mean degree {sum(degrees) / max(1, len(degrees)):.1f})")
+
+    identical = indexed == legacy and from_store == legacy and loaded.targets == graph.targets
+    print(f"identical results:  {identical}")
+    cases = run_call_graph_cases()
+    for name, status in cases:
+        print(f"{name + ':':<20} {status}")
+    if not identical or any(status != "ok" for _, status in cases):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
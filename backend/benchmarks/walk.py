@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Directory walk benchmark
+Builds a synthetic tree with hundreds of thousands of entries (source files, config
+files, a vendored node_modules and a .gitignore'd generated tree), then times the
+legacy os.walk walker, which rebuilt its skip sets for every entry, against
+collect_source_files.
+
+Usage: python backend/benchmarks/walk.py --dirs 400 --files-per-dir 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.complexity_analyzer import SKIP_DIRS, SKIP_EXTENSIONS, SKIP_FILES, CodeComplexityAnalyzer
+
+FILE_NAMES = ["module_{}.py", "Service{}.java", "handler_{}.go", "Widget{}.cs", "engine_{}.cpp", "notes_{}.md", "config_{}.json"]
+
+
+def build_tree(root_path: str, dirs: int, files_per_dir: int) -> int:
+    """Create the tree and return the number of entries written"""
+    entries = 0
+    for d in range(dirs):
+        for top in ("src", "node_modules", "generated"):
+            directory = os.path.join(root_path, top, f"pkg{d // 20}", f"mod{d}")
+            os.makedirs(directory, exist_ok=True)
+            count = files_per_dir if top == "src" else files_per_dir // 4
+            for f in range(count):
+                name = FILE_NAMES[f % len(FILE_NAMES)].format(f)
+                open(os.path.join(directory, name), "w").close()
+                entries += 1
+            entries += 1
+    with open(os.path.join(root_path, ".gitignore"), "w") as f:
+        f.write("/generated/\n*.min.js\n")
+    return entries
+
+
+def legacy_collect(analyzer: CodeComplexityAnalyzer, root_path: str):
+    """The walker before scandir: os.walk with per-call skip set construction"""
+
+    def should_skip_directory(dirpath):
+        skip_dirs = set(SKIP_DIRS)
+        dir_name = os.path.basename(dirpath.rstrip(os.sep))
+        return dir_name in skip_dirs or dir_name.startswith(".")
+
+    def detect_language(filepath):
+        skip_files, skip_extensions = set(SKIP_FILES), set(SKIP_EXTENSIONS)
+        filename = os.path.basename(filepath).lower()
+        ext = os.path.splitext(filename)[1]
+        if filename in skip_files or ext in skip_extensions:
+            return "skip"
+        for language, config in analyzer.language_patterns.items():
+            if ext in config["extensions"]:
+                return language
+        return "unknown"
+
+    source_files = []
+    for root, dirs, files in os.walk(root_path):
+        if should_skip_directory(root):
+            continue
+        dirs[:] = [d for d in dirs if not should_skip_directory(os.path.join(root, d))]
+        for file in files:
+            filepath = os.path.join(root, file)
+            language = detect_language(filepath)
+            if language not in ("unknown", "skip"):
+                source_files.append((filepath, language))
+    return source_files
+
+
+def best_of(repeat: int, fn):
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=400, help="Leaf directories per top-level tree")
+    parser.add_argument("--files-per-dir", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per walker (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="docubuddy_walk_") as root_path:
+        entries = build_tree(root_path, args.dirs, args.files_per_dir)
+        analyzer = CodeComplexityAnalyzer(workers=1)
+        no_gitignore = CodeComplexityAnalyzer(workers=1, use_gitignore=False)
+
+        legacy_time, legacy_files = best_of(args.repeat, lambda: legacy_collect(analyzer, root_path))
+        scandir_time, scandir_files = best_of(args.repeat, lambda: no_gitignore.collect_source_files(root_path))
+        ignore_time, ignore_files = best_of(args.repeat, lambda: analyzer.collect_source_files(root_path))
+
+    print(f"Entries in tree:        {entries:,}")
+    print(f"os.walk (legacy):       {legacy_time:.3f}s  {len(legacy_files):,} files")
+    print(f"scandir walker:         {scandir_time:.3f}s  {len(scandir_files):,} files ({legacy_time / scandir_time:.2f}x)")
+    print(f"scandir + .gitignore:   {ignore_time:.3f}s  {len(ignore_files):,} files ({legacy_time / ignore_time:.2f}x)")
+    if sorted(legacy_files) != sorted(scandir_files):
+        sys.exit("scandir walker found a different file set than os.walk")
+
+
+if __name__ == "__main__":
+    main()
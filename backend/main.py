@@ -1,5 +1,6 @@
 import os
 import sys
+from typing import Dict
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -9,11 +10,15 @@ from analysis import (
     llm_complexity_analyzer,
     supabase_access,
 )
+from analysis.archive_cache import ArchiveCache
+from analysis.instrumentation import Profiler
+from analysis.result_store import FunctionStore
+from analysis.scoring import DEFAULT_WEIGHTS, ScoringEngine, metrics_matrix
 from business_QA import get_business_qa
 from developer_QA import get_developer_qa
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
 app = FastAPI(
     title="My API",
@@ -30,6 +35,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Set to write a Chrome trace (chrome://tracing, Perfetto) of every /download-repo run
+TRACE_PATH = os.environ.get("DOCUBUDDY_TRACE_PATH")
+# Repository archives are reused while the branch still points to the same commit
+# (set to an empty string to always download)
+ARCHIVE_CACHE_DIR = os.environ.get("DOCUBUDDY_ARCHIVE_CACHE", "./.docubuddy_cache/archives")
+
 
 class Developer(BaseModel):
     user_query: str
@@ -39,6 +50,19 @@ class GitHubRepoRequest(BaseModel):
     url: HttpUrl
 
 
+class RerankRequest(BaseModel):
+    weights: Dict[str, float] = {}
+    top_k: int = Field(100, gt=0)
+
+    @field_validator("weights")
+    @classmethod
+    def known_weights(cls, weights: Dict[str, float]) -> Dict[str, float]:
+        unknown = sorted(set(weights) - set(DEFAULT_WEIGHTS))
+        if unknown:
+            raise ValueError(f"Unknown weights {unknown}, expected some of {sorted(DEFAULT_WEIGHTS)}")
+        return weights
+
+
 # Routes
 @app.get("/")
 async def root():
@@ -56,18 +80,61 @@ async def root():
 
 @app.post("/download-repo")
 def download_repo(payload: GitHubRepoRequest):
+    profiler = Profiler()
     try:
         url = str(payload.url).rstrip("/")
-        if not url.startswith("https://github.com/"):
+        if not url.startswith(f"{download_github_repo.GITHUB_URL}/"):
             raise ValueError("Invalid GitHub URL format")
-        dest_path = download_github_repo.download_github_repo_zip(url)
-        complexity_analyzer.main(repo_url=f"{url}/blob/main/")
-        llm_complexity_analyzer.main()
-        supabase_access.upload_function_complexity()
-
-        return {"message": "Repository analised successfully", "path": dest_path}
+        # The cached archive stays pinned (safe from eviction) until the cache is closed
+        cache = ArchiveCache(ARCHIVE_CACHE_DIR) if ARCHIVE_CACHE_DIR else None
+        try:
+            with profiler.stage("download"):
+                # Phase 1 reads the members straight from the archive
+                source = download_github_repo.open_github_repo_zip(url, cache=cache)
+            try:
+                with profiler.stage("phase1"):
+                    complexity_analyzer.main(repo_url=f"{url}/blob/main/", profiler=profiler, source=source)
+                # Phase 2 reads the related functions' code from the same archive
+                with profiler.stage("phase2"):
+                    llm_complexity_analyzer.main(profiler=profiler, source=source)
+            finally:
+                source.close()
+        finally:
+            if cache is not None:
+                cache.close()
+        # "path" is where the repository would be extracted (results' file paths are
+        # relative to it); "archive" is the cached archive the analysis read, if any
+        archive_path = source.archive if isinstance(source.archive, str) else None
+        with profiler.stage("upload"):
+            supabase_access.upload_function_complexity(profiler=profiler)
+
+        return {
+            "message": "Repository analised successfully",
+            "path": source.root_path,
+            "archive": archive_path,
+            "timings": profiler.as_dict(),
+        }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if TRACE_PATH:
+            profiler.write_chrome_trace(TRACE_PATH)
+
+
+@app.post("/rerank")
+def rerank(payload: RerankRequest):
+    """Re-rank the last Phase 1 run under new complexity weights without re-parsing"""
+    if not os.path.exists(complexity_analyzer.STORE_PATH):
+        raise HTTPException(status_code=404, detail="No Phase 1 results to re-rank")
+    store = FunctionStore.read(complexity_analyzer.STORE_PATH)
+    engine = ScoringEngine(payload.weights)
+    scores = engine.score(metrics_matrix(store))
+    results = []
+    for index in engine.rank(scores, payload.top_k).tolist():
+        result = store.to_dict(index)
+        result["rule_analysis"]["rule_score"] = float(scores[index])
+        results.append(result)
+    return results
 
 
 @app.post("/developer", status_code=status.HTTP_201_CREATED)